@@ -0,0 +1,19 @@
+"""
+ASGI config for teachers project.
+
+Serve it with an ASGI server, for example:
+
+    uvicorn teachers.asgi:application --host 0.0.0.0 --port 8000
+
+One process then handles many concurrent requests. The async views (clock
+in/out, recent sessions, salary reports) wait on the database without
+holding a thread.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'teachers.settings')
+
+application = get_asgi_application()
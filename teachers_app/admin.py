@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Teacher, Inspector, Student, Task, WorkSession, SuperUser, CustomUser
+from django.db import transaction
+from .models import (
+    Teacher, Inspector, Student, Task, WorkSession, SuperUser, CustomUser, TeacherMonthSummary, KioskToken,
+    KioskEvent
+)
 from decimal import Decimal
 
 @admin.register(Task)
@@ -44,11 +48,68 @@ class StudentAdmin(admin.ModelAdmin):
 
 @admin.register(WorkSession)
 class WorkSessionAdmin(admin.ModelAdmin):
-    list_display = ('teacher', 'task', 'entry_type', 'created_at', 'total_amount')
-    list_filter = ('entry_type', 'created_at', 'task')
+    list_display = ('teacher', 'task', 'entry_type', 'created_at', 'total_amount', 'is_deleted')
+    list_filter = ('entry_type', 'created_at', 'task', 'is_deleted')
     search_fields = ('teacher__user__username', 'task__name')
 
+    def get_queryset(self, request):
+        # Show trashed sessions too so they can be inspected
+        return WorkSession.all_objects.select_related('teacher__user', 'task')
+
+    def delete_model(self, request, obj):
+        # Live sessions go to the trash; trashed ones are purged. Either way the
+        # model keeps the ledger, the report cache and stale reports in step.
+        if obj.is_deleted:
+            obj.hard_delete()
+        else:
+            obj.delete()
+
+    def delete_queryset(self, request, queryset):
+        # "Delete selected" would otherwise hard delete rows with one query
+        with transaction.atomic():
+            for session in queryset:
+                self.delete_model(request, session)
+
 @admin.register(SuperUser)
 class SuperUserAdmin(admin.ModelAdmin):
     list_display = ('user', 'last_login')
     search_fields = ('user__username',)
+
+@admin.register(TeacherMonthSummary)
+class TeacherMonthSummaryAdmin(admin.ModelAdmin):
+    list_display = ('teacher', 'task', 'year', 'month', 'hours', 'amount', 'session_count')
+    list_filter = ('year', 'month', 'task')
+    search_fields = ('teacher__user__username', 'task__name')
+
+    # The ledger follows WorkSession; fix drift with `manage.py rebuild_summaries`
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(KioskToken)
+class KioskTokenAdmin(admin.ModelAdmin):
+    list_display = ('teacher', 'created_at')
+    search_fields = ('teacher__user__username',)
+    readonly_fields = ('teacher', 'digest', 'created_at')
+
+    def has_add_permission(self, request):
+        # Tokens are issued with `manage.py issue_kiosk_token`, which shows the token once
+        return False
+
+@admin.register(KioskEvent)
+class KioskEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'teacher', 'action', 'occurred_at', 'received_at')
+    list_filter = ('action',)
+    search_fields = ('event_id', 'teacher__user__username')
+    readonly_fields = ('event_id', 'teacher', 'session', 'action', 'occurred_at', 'received_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,297 @@
+"""
+JSON API for work sessions, tasks, teachers and salary reports, for
+integrations that used to scrape the HTML pages.
+
+Clients sign in with a normal session (so writes carry the CSRF token).
+Teachers see their own sessions, reports and teacher record; superusers
+and inspectors see everyone's. Only superusers write, apart from teachers
+adding their own sessions.
+
+Lists take ?fields=a,b for a sparse fieldset, ?limit= and ?cursor=, and
+answer {"results": [...], "next": <URL of the next page or null>}.
+"""
+import json
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET, require_http_methods
+
+from .forms import TaskForm
+from .models import SalaryReport, Task, Teacher, WorkSession
+from .routers import read_from_replica
+from .serializers import SalaryReportSerializer, TaskSerializer, TeacherSerializer, WorkSessionSerializer
+from .services import WorkSessionImportService, WorkSessionListService
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+MAX_BULK = 500  # Sessions per POST
+
+API_ROLES = ('superuser', 'teacher', 'inspector')
+
+
+class BadRequest(ValueError):
+    """A query parameter or body the API cannot use; the message is returned as the error"""
+
+
+def api_view(view):
+    """JSON 401/403 answers instead of login redirects; the API is for staff roles only"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        if request.role not in API_ROLES:
+            return JsonResponse({'error': 'This account has no API access'}, status=403)
+        if request.role == 'teacher' and not isinstance(request.profile, Teacher):
+            # Flagged as a teacher without a Teacher row; there is nothing of theirs to show
+            return JsonResponse({'error': 'This account has no teacher profile'}, status=403)
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return JsonResponse({'error': str(error)}, status=400)
+    return wrapper
+
+
+def superuser_only(request):
+    if request.role != 'superuser':
+        return JsonResponse({'error': 'Only superusers can do this'}, status=403)
+    return None
+
+
+def own_teacher_id(request):
+    """The teacher id a teacher's requests are limited to; None for superusers and inspectors"""
+    return request.profile.id if request.role == 'teacher' else None
+
+
+def int_param(request, name, default=None):
+    value = request.GET.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f'{name} must be an integer')
+
+
+def fields_param(request, serializer):
+    try:
+        return serializer.parse_fields(request.GET.get('fields'))
+    except ValueError as error:
+        raise BadRequest(str(error))
+
+
+def json_body(request):
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        raise BadRequest('Expected a JSON body')
+
+
+def list_response(request, serializer, queryset):
+    """One cursor page of queryset as JSON"""
+    names = fields_param(request, serializer)
+    limit = int_param(request, 'limit', DEFAULT_LIMIT)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise BadRequest(f'limit must be between 1 and {MAX_LIMIT}')
+    rows, next_cursor = serializer.page(queryset, names, after=int_param(request, 'cursor'), limit=limit)
+    next_url = None
+    if next_cursor is not None:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = f'{request.path}?{params.urlencode()}'
+    return JsonResponse({'results': rows, 'next': next_url})
+
+
+def detail_response(request, serializer, queryset, pk, status=200):
+    rows = serializer.rows(queryset.filter(pk=pk), fields_param(request, serializer))
+    if not rows:
+        return JsonResponse({'error': 'Not found'}, status=404)
+    return JsonResponse(rows[0], status=status)
+
+
+def visible_sessions(request):
+    teacher_id = own_teacher_id(request)
+    sessions = WorkSession.objects.all()
+    return sessions if teacher_id is None else sessions.filter(teacher_id=teacher_id)
+
+
+@api_view
+@require_http_methods(['GET', 'POST'])
+@read_from_replica
+def sessions(request):
+    """
+    GET: live work sessions, filtered by ?teacher=, ?task=, ?entry_type= and
+    ?start_date=/?end_date= (inclusive YYYY-MM-DD days).
+    POST: one session object or a list of up to MAX_BULK of them, with the
+    CSV import's fields (teacher and task by id or name). Nothing is created
+    unless every session is valid.
+    """
+    if request.method == 'POST':
+        return create_sessions(request)
+
+    dates = {}
+    for name in ('start_date', 'end_date'):
+        if request.GET.get(name):
+            try:
+                dates[name] = parse_date(request.GET[name])
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise BadRequest(f'{name} must be a YYYY-MM-DD date')
+    sessions = WorkSessionListService.filter_sessions(
+        teacher=own_teacher_id(request) or int_param(request, 'teacher'),
+        task=int_param(request, 'task'),
+        entry_type=request.GET.get('entry_type'),
+        **dates
+    )
+    return list_response(request, WorkSessionSerializer, sessions)
+
+
+def create_sessions(request):
+    teacher_id = own_teacher_id(request)
+    if teacher_id is None and request.role != 'superuser':
+        return JsonResponse({'error': 'Only superusers and teachers can add sessions'}, status=403)
+    data = json_body(request)
+    items = data if isinstance(data, list) else [data]
+    if not items or len(items) > MAX_BULK or not all(isinstance(item, dict) for item in items):
+        raise BadRequest(f'Expected a session object or a list of 1 to {MAX_BULK} of them')
+    names = fields_param(request, WorkSessionSerializer)
+
+    teachers, tasks = WorkSessionImportService.lookup_maps()
+    created, errors = [], []
+    for index, item in enumerate(items):
+        # The import reads CSV text; JSON numbers become the ids it also accepts
+        row = {column: '' if value is None else str(value) for column, value in item.items()}
+        if teacher_id is not None:
+            if row.setdefault('teacher', str(teacher_id)) not in (str(teacher_id), request.user.username):
+                errors.append({'index': index, 'errors': {'teacher': ['Teachers can only add their own sessions']}})
+                continue
+        try:
+            created.append(WorkSessionImportService.build_session(row, teachers, tasks))
+        except ValidationError as error:
+            errors.append({'index': index, 'errors': error.message_dict if hasattr(error, 'error_dict')
+                           else {'__all__': error.messages}})
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    created = WorkSession.objects.create_many(created)
+    rows = WorkSessionSerializer.rows(
+        WorkSession.objects.filter(pk__in=[session.pk for session in created]).order_by('pk'), names
+    )
+    return JsonResponse({'results': rows}, status=201)
+
+
+@api_view
+@require_GET
+@read_from_replica
+def session_detail(request, session_id):
+    return detail_response(request, WorkSessionSerializer, visible_sessions(request), session_id)
+
+
+def visible_tasks(request):
+    # Teachers only ever pick from the active tasks
+    return Task.objects.filter(is_active=True) if request.role == 'teacher' else Task.objects.all()
+
+
+@api_view
+@require_http_methods(['GET', 'POST'])
+@read_from_replica
+def tasks(request):
+    """GET: tasks. POST: a new task, with the fields of the task form"""
+    if request.method == 'GET':
+        return list_response(request, TaskSerializer, visible_tasks(request))
+
+    denied = superuser_only(request)
+    if denied:
+        return denied
+    data = json_body(request)
+    if not isinstance(data, dict):
+        raise BadRequest('Expected a task object')
+    form = TaskForm(data)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    task = form.save()
+    return detail_response(request, TaskSerializer, Task.objects.all(), task.pk, status=201)
+
+
+@api_view
+@require_GET
+@read_from_replica
+def task_detail(request, task_id):
+    return detail_response(request, TaskSerializer, visible_tasks(request), task_id)
+
+
+def visible_teachers(request):
+    teacher_id = own_teacher_id(request)
+    return Teacher.objects.all() if teacher_id is None else Teacher.objects.filter(pk=teacher_id)
+
+
+@api_view
+@require_GET
+@read_from_replica
+def teachers(request):
+    """Teacher accounts are created with a password, through the dashboard only"""
+    return list_response(request, TeacherSerializer, visible_teachers(request))
+
+
+@api_view
+@require_GET
+@read_from_replica
+def teacher_detail(request, teacher_id):
+    return detail_response(request, TeacherSerializer, visible_teachers(request), teacher_id)
+
+
+def visible_reports(request):
+    teacher_id = own_teacher_id(request)
+    reports = SalaryReport.objects.filter(is_deleted=False)
+    return reports if teacher_id is None else reports.filter(teacher_id=teacher_id)
+
+
+@api_view
+@require_http_methods(['GET', 'POST'])
+@read_from_replica
+def salary_reports(request):
+    """
+    GET: live salary reports, filtered by ?teacher=.
+    POST: {"teacher", "year", "month", "notes"} freezes a new report for the
+    month; the month's earlier reports are soft-deleted, as the dashboard does.
+    """
+    if request.method == 'GET':
+        reports = visible_reports(request)
+        teacher_id = int_param(request, 'teacher')
+        if teacher_id is not None:
+            reports = reports.filter(teacher_id=teacher_id)
+        return list_response(request, SalaryReportSerializer, reports)
+
+    denied = superuser_only(request)
+    if denied:
+        return denied
+    data = json_body(request)
+    try:
+        teacher_id, year, month = (int(data[key]) for key in ('teacher', 'year', 'month'))
+        # Also rejects years whose month ends past datetime's range
+        start_date, end_date = SalaryReport.month_period(year, month)
+    except (TypeError, KeyError, ValueError, OverflowError):
+        raise BadRequest('Expected {"teacher": <id>, "year": <year>, "month": <1-12>}')
+    teacher = Teacher.objects.filter(pk=teacher_id).first()
+    if teacher is None:
+        raise BadRequest(f'Unknown teacher {teacher_id}')
+
+    now = timezone.now()
+    with transaction.atomic():
+        SalaryReport.objects.filter(
+            teacher=teacher, start_date__gte=start_date, start_date__lt=end_date, is_deleted=False
+        ).update(is_deleted=True, deleted_at=now, updated_at=now)
+        report = SalaryReport.create_for_month(teacher, year, month, request.user,
+                                               notes=str(data.get('notes') or ''))
+    return detail_response(request, SalaryReportSerializer, visible_reports(request), report.pk, status=201)
+
+
+@api_view
+@require_GET
+@read_from_replica
+def salary_report_detail(request, report_id):
+    return detail_response(request, SalaryReportSerializer, visible_reports(request), report_id)
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.contrib.auth.signals import user_logged_in
+from django.db.backends.signals import connection_created
+
+
+class TeachersAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'teachers_app'
+
+    def ready(self):
+        from .db import configure_sqlite
+        from .middleware import install_query_counter, remember_role
+        connection_created.connect(configure_sqlite, dispatch_uid='teachers_app.configure_sqlite')
+        connection_created.connect(install_query_counter, dispatch_uid='teachers_app.install_query_counter')
+        user_logged_in.connect(remember_role, dispatch_uid='teachers_app.remember_role')
@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+# Role -> the CustomUser reverse one-to-one holding that role's profile
+ROLE_PROFILES = {
+    'superuser': None,
+    'student': 'student',
+    'teacher': 'teacher',
+    'inspector': 'inspector',
+}
+PROFILE_RELATIONS = [relation for relation in ROLE_PROFILES.values() if relation]
+
+# The role the current request's session last resolved to, see ProfileMiddleware
+_expected_role = ContextVar('expected_role', default=None)
+
+
+@contextmanager
+def expected_role(role):
+    """Load users in this block with only the profile of `role` joined"""
+    token = _expected_role.set(role)
+    try:
+        yield
+    finally:
+        _expected_role.reset(token)
+
+
+def profile_relations():
+    """The profiles to select_related: the expected role's, or all of them when unknown"""
+    role = _expected_role.get()
+    if role in ROLE_PROFILES:
+        return [ROLE_PROFILES[role]] if ROLE_PROFILES[role] else []
+    return PROFILE_RELATIONS
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the signed-in user together with their
+    Teacher/Student/Inspector profile, so request.user.teacher and
+    friends cost no further query.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related(*profile_relations()).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = await UserModel._default_manager.select_related(*profile_relations()).aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,52 @@
+"""
+Per-connection database tuning.
+
+SQLite's defaults suit a single writer: the rollback journal blocks readers
+during a write, and a second writer fails with "database is locked" at once.
+configure_sqlite() applies settings.SQLITE_PRAGMAS to every new SQLite
+connection: WAL lets readers run alongside the writer, busy_timeout makes
+writers queue instead of failing. Write transactions should also start with
+BEGIN IMMEDIATE (DATABASES OPTIONS 'transaction_mode'), so a transaction
+that reads before it writes takes the write lock up front rather than
+failing when it tries to upgrade its read lock.
+
+WAL is a property of the file, not the connection, so files listed in
+settings.SQLITE_ROLLBACK_JOURNAL_DATABASES skip the WAL pragmas.
+"""
+import re
+
+from django.conf import settings
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+# Switch a file to WAL, or are only safe once it is
+WAL_PRAGMAS = ('journal_mode', 'synchronous')
+
+
+def connection_pragmas(connection):
+    """settings.SQLITE_PRAGMAS as they apply to this connection's database file"""
+    pragmas = dict(getattr(settings, 'SQLITE_PRAGMAS', {}))
+    if str(connection.settings_dict['NAME']) in getattr(settings, 'SQLITE_ROLLBACK_JOURNAL_DATABASES', ()):
+        for name in WAL_PRAGMAS:
+            pragmas.pop(name, None)
+    return pragmas
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver applying settings.SQLITE_PRAGMAS"""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in connection_pragmas(connection).items():
+        if not PRAGMA_NAME.match(name) or not re.match(r'^[A-Za-z0-9_-]+$', str(value)):
+            raise ValueError(f'Invalid SQLite pragma {name}={value}')
+        # Straight to sqlite3: these are not queries worth logging or counting
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def sqlite_pragmas(connection):
+    """Return the current value of each configured pragma on a connection"""
+    with connection.cursor() as cursor:
+        values = {}
+        for name in connection_pragmas(connection):
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+        return values
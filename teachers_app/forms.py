@@ -101,11 +101,36 @@ class WorkSessionTimeRangeForm(forms.ModelForm):
 
 class WorkSessionFilterForm(forms.Form):
     """
-    Form for filtering recent work sessions.
+    Form for filtering work sessions.
     """
-    task = forms.ModelChoiceField(queryset=Task.objects.all(), required=False, label="Task")
-    start_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="Start Date")
-    end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="End Date")
+    teacher = forms.ModelChoiceField(
+        queryset=Teacher.objects.select_related('user').order_by('user__username'),
+        required=False,
+        label="Teacher",
+        widget=forms.Select(attrs={"class": "form-control"})
+    )
+    task = forms.ModelChoiceField(
+        queryset=Task.objects.order_by('name'),
+        required=False,
+        label="Task",
+        widget=forms.Select(attrs={"class": "form-control"})
+    )
+    entry_type = forms.ChoiceField(
+        choices=[('', 'All')] + WorkSession.ENTRY_TYPE_CHOICES,
+        required=False,
+        label="Entry Type",
+        widget=forms.Select(attrs={"class": "form-control"})
+    )
+    start_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}), label="Start Date")
+    end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}), label="End Date")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise forms.ValidationError("Start date must not be after the end date")
+        return cleaned_data
 
 
 class AddTeacherForm(forms.Form):
@@ -283,3 +308,66 @@ class SalaryReportForm(forms.Form):
         label="Notes",
         widget=forms.Textarea(attrs={"class": "form-control", "rows": 3})
     )
+
+
+class PayrollExportForm(forms.Form):
+    DETAIL_CHOICES = [
+        ('task', 'One row per teacher and task'),
+        ('session', 'One row per work session'),
+    ]
+
+    start_year = forms.IntegerField(
+        required=True,
+        label="From Year",
+        widget=forms.NumberInput(attrs={"class": "form-control"})
+    )
+    start_month = forms.TypedChoiceField(
+        choices=[(i, i) for i in range(1, 13)],
+        coerce=int,
+        required=True,
+        label="From Month",
+        widget=forms.Select(attrs={"class": "form-control"})
+    )
+    end_year = forms.IntegerField(
+        required=True,
+        label="To Year",
+        widget=forms.NumberInput(attrs={"class": "form-control"})
+    )
+    end_month = forms.TypedChoiceField(
+        choices=[(i, i) for i in range(1, 13)],
+        coerce=int,
+        required=True,
+        label="To Month",
+        widget=forms.Select(attrs={"class": "form-control"})
+    )
+    detail = forms.ChoiceField(
+        choices=DETAIL_CHOICES,
+        initial='task',
+        required=True,
+        label="Detail",
+        widget=forms.Select(attrs={"class": "form-control"})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = (cleaned_data.get('start_year'), cleaned_data.get('start_month'))
+        end = (cleaned_data.get('end_year'), cleaned_data.get('end_month'))
+
+        if None not in start and None not in end and start > end:
+            raise forms.ValidationError("The start month must not be after the end month")
+
+        return cleaned_data
+
+
+class WorkSessionImportForm(forms.Form):
+    file = forms.FileField(
+        required=True,
+        label="CSV File",
+        help_text="Columns: teacher, task, entry_type, manual_hours, clock_in, clock_out, start_time, end_time, date",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,text/csv"})
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label="Only validate, do not import",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"})
+    )
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from teachers_app.models import CustomUser, SalaryReport, Task, Teacher
+from .run_benchmarks import summarize
+
+PREFIX = 'benchmark_asgi'
+SCENARIOS = ['recent_work_sessions', 'view_salary_report', 'clock_in']
+
+
+def wsgi_environ(request, host):
+    return {
+        'REQUEST_METHOD': request['method'],
+        'PATH_INFO': request['path'],
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': str(len(request['body'])),
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        **{'HTTP_' + name.upper().replace('-', '_'): value for name, value in request['headers'].items()},
+        'wsgi.input': BytesIO(request['body']),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def call_wsgi(application, request, host):
+    """Run one request through a WSGI application and return its status code"""
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    result = application(wsgi_environ(request, host), start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return statuses[0]
+
+
+async def call_asgi(application, request, host):
+    """Run one request through an ASGI application and return its status code"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': request['method'],
+        'scheme': 'http',
+        'path': request['path'],
+        'raw_path': request['path'].encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', host.encode()),
+            (b'content-type', b'application/x-www-form-urlencoded'),
+            (b'content-length', str(len(request['body'])).encode()),
+            *((name.lower().encode(), value.encode()) for name, value in request['headers'].items()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': (host, 80),
+    }
+    body_sent = False
+    statuses = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': request['body'], 'more_body': False}
+        # The client never disconnects; Django cancels this once it has responded
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+class Command(BaseCommand):
+    help = 'Compare WSGI and ASGI throughput of the busiest views under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per scenario and server interface')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once')
+        parser.add_argument('--teacher', type=int, help='Teacher whose pages are read; defaults to the busiest')
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Defaults to all of them')
+        parser.add_argument('--output', default='asgi_benchmark_results.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1')
+        # Import here: building the applications configures Django for each interface
+        from teachers.asgi import application as asgi_application
+        from teachers.wsgi import application as wsgi_application
+
+        teacher = self.get_teacher(options['teacher'])
+        task = Task.objects.order_by('id').first()
+        if task is None:
+            raise CommandError('No tasks to clock in on; run seed_benchmark_data first')
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+
+        # Leftovers from an interrupted run would skew the clock-in pages
+        CustomUser.objects.filter(username__startswith=f'{PREFIX}_').delete()
+        clients = []
+        try:
+            workers = [self.create_worker(i, clients) for i in range(options['concurrency'])]
+            scenarios = self.build_scenarios(options['scenario'] or SCENARIOS, teacher, task, workers)
+            results = {
+                'database': connection.vendor,
+                'teacher_id': teacher.id,
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'scenarios': {},
+            }
+            for name, build_request in scenarios.items():
+                wsgi = self.run_wsgi(wsgi_application, build_request, workers, host, options)
+                asgi = asyncio.run(self.run_asgi(asgi_application, build_request, workers, host, options))
+                results['scenarios'][name] = {
+                    'wsgi': wsgi,
+                    'asgi': asgi,
+                    'asgi_speedup': round(asgi['requests_per_second'] / wsgi['requests_per_second'], 2),
+                }
+                for interface, stats in (('wsgi', wsgi), ('asgi', asgi)):
+                    self.stdout.write(
+                        f"  {name:<22} {interface}  {stats['requests_per_second']:>8.1f} req/s  "
+                        f"p50 {stats['p50_ms']:>8.3f}ms  p95 {stats['p95_ms']:>8.3f}ms  errors {stats['errors']}"
+                    )
+        finally:
+            for client in clients:
+                client.logout()
+            CustomUser.objects.filter(username__startswith=f'{PREFIX}_').delete()
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def get_teacher(self, teacher_id):
+        teachers = Teacher.objects.exclude(user__username__startswith=f'{PREFIX}_')
+        if teacher_id:
+            teacher = teachers.filter(id=teacher_id).first()
+        else:
+            teacher = teachers.annotate(sessions=Count('worksession')).order_by('-sessions', 'id').first()
+        if teacher is None:
+            raise CommandError('No teacher to benchmark; run seed_benchmark_data first')
+        return teacher
+
+    def create_worker(self, index, clients):
+        """
+        Create a superuser who is also a teacher, so each concurrent worker
+        reads any teacher's pages and clocks in on its own. Return the
+        worker's teacher and request headers.
+        """
+        user = CustomUser.objects.create_superuser(username=f'{PREFIX}_{index}', password=None, is_teacher=True)
+        own_teacher = Teacher.objects.create(user=user)
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+        csrf_token = get_random_string(32)
+        cookies = {settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value,
+                   settings.CSRF_COOKIE_NAME: csrf_token}
+        return {
+            'teacher': own_teacher,
+            'headers': {
+                'Cookie': '; '.join(f'{name}={value}' for name, value in cookies.items()),
+                'X-CSRFToken': csrf_token,
+            },
+        }
+
+    def build_scenarios(self, names, teacher, task, workers):
+        """Map scenario names to functions building a worker's request"""
+        scenarios = {}
+
+        def get(path):
+            return lambda worker: {'method': 'GET', 'path': path, 'headers': worker['headers'], 'body': b''}
+
+        if 'recent_work_sessions' in names:
+            scenarios['recent_work_sessions'] = get(reverse('recent_work_sessions', args=[teacher.id]))
+        if 'view_salary_report' in names:
+            # Reading an existing report; a missing one would be created on the first request
+            report = SalaryReport.objects.filter(teacher=teacher).order_by('-start_date').first()
+            if report is None:
+                self.stdout.write(self.style.WARNING('Teacher has no salary reports; skipping view_salary_report'))
+            else:
+                scenarios['view_salary_report'] = get(reverse(
+                    'view_salary_report', args=[teacher.id, report.start_date.year, report.start_date.month]
+                ))
+        if 'clock_in' in names:
+            body = urlencode({'entry_type': 'clock', 'task': task.id}).encode()
+            scenarios['clock_in'] = lambda worker: {
+                'method': 'POST',
+                'path': reverse('record_work_with_teacher', args=[worker['teacher'].id]),
+                'headers': worker['headers'],
+                'body': body,
+            }
+        return scenarios
+
+    def stats(self, samples, statuses, seconds):
+        stats = summarize(samples)
+        stats['requests_per_second'] = round(len(samples) / seconds, 1)
+        stats['errors'] = sum(1 for status in statuses if status >= 400)
+        return stats
+
+    def run_wsgi(self, application, build_request, workers, host, options):
+        """Thread per request in flight, as a threaded WSGI server would run it"""
+        def worker_loop(worker, count):
+            samples, statuses = [], []
+            for _ in range(count):
+                start = time.perf_counter()
+                statuses.append(call_wsgi(application, build_request(worker), host))
+                samples.append(time.perf_counter() - start)
+            return samples, statuses
+
+        counts = self.split(options['requests'], len(workers))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            outcomes = list(executor.map(worker_loop, workers, counts))
+        seconds = time.perf_counter() - start
+        return self.stats(
+            [sample for samples, _ in outcomes for sample in samples],
+            [status for _, statuses in outcomes for status in statuses],
+            seconds,
+        )
+
+    async def run_asgi(self, application, build_request, workers, host, options):
+        """One event loop with every request in flight, as one ASGI server process would run it"""
+        async def worker_loop(worker, count):
+            samples, statuses = [], []
+            for _ in range(count):
+                start = time.perf_counter()
+                statuses.append(await call_asgi(application, build_request(worker), host))
+                samples.append(time.perf_counter() - start)
+            return samples, statuses
+
+        counts = self.split(options['requests'], len(workers))
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(worker_loop(worker, count) for worker, count in zip(workers, counts)))
+        seconds = time.perf_counter() - start
+        return self.stats(
+            [sample for samples, _ in outcomes for sample in samples],
+            [status for _, statuses in outcomes for status in statuses],
+            seconds,
+        )
+
+    @staticmethod
+    def split(total, parts):
+        """Spread total requests over parts workers as evenly as possible"""
+        return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
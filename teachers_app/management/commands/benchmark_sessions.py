@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from teachers_app.models import CustomUser, Task, Teacher, WorkSession
+from .run_benchmarks import summarize
+
+PREFIX = 'benchmark_sessions'
+
+
+class SessionWriteCounter:
+    """execute_wrapper counting statements that write django_session"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if '"django_session"' in sql and sql.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            with self._lock:
+                self.writes += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure how session writes contend with clock-in writes under each session strategy: '
+        'writers clock in and out while browsers sign in, load a page and sign out'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Cycles per worker and strategy')
+        parser.add_argument('--writers', type=int, default=4, help='Teachers clocking in and out at once')
+        parser.add_argument('--browsers', type=int, default=8, help='Users signing in and out at once')
+        parser.add_argument('--strategy', action='append', choices=settings.SESSION_STRATEGIES,
+                            help='Defaults to all of them')
+        parser.add_argument('--output', default='session_benchmark_results.json',
+                            help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['writers'] < 1 or options['browsers'] < 0:
+            raise CommandError('--iterations and --writers must be at least 1, --browsers at least 0')
+        task = Task.objects.filter(is_active=True).order_by('id').first()
+        if task is None:
+            raise CommandError('No tasks to clock in on; run seed_benchmark_data first')
+
+        self.host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        results = {
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'writers': options['writers'],
+            'browsers': options['browsers'],
+            'strategies': {},
+        }
+        # Leftovers from an interrupted run would skew the results
+        CustomUser.objects.filter(username__startswith=f'{PREFIX}_').delete()
+        try:
+            for strategy in options['strategy'] or settings.SESSION_STRATEGIES:
+                stats = self.run_strategy(strategy, task, options)
+                results['strategies'][strategy] = stats
+                self.stdout.write(
+                    f"  {strategy:<15} clock writes p50 {stats['clock_writes']['p50_ms']:>8.3f}ms  "
+                    f"p95 {stats['clock_writes']['p95_ms']:>8.3f}ms  "
+                    f"session writes {stats['session_writes']:>5}  errors {stats['errors']}"
+                )
+        finally:
+            CustomUser.objects.filter(username__startswith=f'{PREFIX}_').delete()
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def create_user(self, role, index):
+        user = CustomUser.objects.create_user(
+            username=f'{PREFIX}_{role}_{index}', password=None, is_teacher=True
+        )
+        return Teacher.objects.create(user=user)
+
+    def run_strategy(self, strategy, task, options):
+        """Run every worker against fresh clients using the strategy's session engine"""
+        with override_settings(SESSION_ENGINE=f'teachers_app.session_backends.{strategy}'):
+            caches[settings.SESSION_CACHE_ALIAS].clear()
+            writers = [self.create_user('writer', i) for i in range(options['writers'])]
+            browsers = [self.create_user('browser', i) for i in range(options['browsers'])]
+            counter = SessionWriteCounter()
+            errors = []
+
+            def run(loop, teacher):
+                # Each thread has its own connection to count on
+                try:
+                    with connection.execute_wrapper(counter):
+                        return loop(teacher, task, options['iterations'], errors)
+                finally:
+                    connection.close()
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(writers) + len(browsers)) as executor:
+                writer_futures = [executor.submit(run, self.clock_loop, teacher) for teacher in writers]
+                browser_futures = [executor.submit(run, self.browse_loop, teacher) for teacher in browsers]
+                clock_samples = [sample for future in writer_futures for sample in future.result()]
+                browse_samples = [sample for future in browser_futures for sample in future.result()]
+            seconds = time.perf_counter() - start
+
+            CustomUser.objects.filter(username__startswith=f'{PREFIX}_').delete()
+
+        stats = {
+            'clock_writes': summarize(clock_samples),
+            'sign_in_cycles': summarize(browse_samples) if browse_samples else None,
+            'session_writes': counter.writes,
+            'errors': len(errors),
+            'seconds': round(seconds, 3),
+        }
+        stats['clock_writes']['max_ms'] = round(max(clock_samples) * 1000, 3)
+        return stats
+
+    def clock_loop(self, teacher, task, iterations, errors):
+        """Clock in and out repeatedly; return each request's duration"""
+        client = Client(SERVER_NAME=self.host)
+        client.force_login(teacher.user)
+        samples = []
+        for _ in range(iterations):
+            for step in ('in', 'out'):
+                if step == 'in':
+                    path, data = reverse('record_work'), {'entry_type': 'clock', 'task': task.id}
+                else:
+                    open_session = WorkSession.objects.filter(
+                        teacher=teacher, entry_type='clock', clock_out__isnull=True
+                    ).values_list('id', flat=True).first()
+                    path, data = reverse('clock_out', args=[open_session or 0]), {}
+                start = time.perf_counter()
+                try:
+                    status = client.post(path, data).status_code
+                except DatabaseError:
+                    status = 500
+                samples.append(time.perf_counter() - start)
+                if status >= 400:
+                    errors.append(status)
+        client.logout()
+        return samples
+
+    def browse_loop(self, teacher, task, iterations, errors):
+        """Sign in, load the dashboard and sign out; return each cycle's duration"""
+        client = Client(SERVER_NAME=self.host)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            try:
+                client.force_login(teacher.user)
+                statuses = [client.get(reverse('teachers_dashboard')).status_code,
+                            client.post(reverse('logout')).status_code]
+            except DatabaseError:
+                statuses = [500]
+            samples.append(time.perf_counter() - start)
+            errors.extend(status for status in statuses if status >= 400)
+        return samples
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from teachers_app.services import PayrollExportService
+
+
+def parse_month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}', expected YYYY-MM")
+    if not 1 <= month <= 12:
+        raise CommandError(f"Invalid month '{value}', expected YYYY-MM")
+    return year, month
+
+
+class Command(BaseCommand):
+    help = 'Export payroll for all teachers over a month range as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help='First month to export (YYYY-MM)')
+        parser.add_argument('--end', help='Last month to export (YYYY-MM), defaults to --start')
+        parser.add_argument('--detail', choices=['task', 'session'], default='task',
+                            help='One row per teacher/task/month or one row per session')
+        parser.add_argument('--output', help='File to write, defaults to stdout')
+
+    def handle(self, *args, **options):
+        start_year, start_month = parse_month(options['start'])
+        end_year, end_month = parse_month(options['end'] or options['start'])
+        if (start_year, start_month) > (end_year, end_month):
+            raise CommandError('--start must not be after --end')
+
+        rows = PayrollExportService.rows(options['detail'], start_year, start_month, end_year, end_month)
+        lines = PayrollExportService.csv_lines(rows)
+
+        if options['output']:
+            count = -1  # Do not count the header
+            with open(options['output'], 'w', newline='') as output:
+                for line in lines:
+                    output.write(line)
+                    count += 1
+            self.stdout.write(self.style.SUCCESS(f"Wrote {count} rows to {options['output']}"))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
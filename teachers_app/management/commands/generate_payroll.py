@@ -0,0 +1,158 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+# Models are imported inside the functions below: worker processes may be
+# spawned fresh and must run django.setup() before any model import.
+
+
+def init_worker(settings_module):
+    """Give each worker process its own Django setup and database connections"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+    # Never share a connection inherited from the parent through fork()
+    connections.close_all()
+
+
+def compute_chunk(teacher_ids, year, month):
+    """Compute report totals and snapshots for a chunk of teachers"""
+    from teachers_app.models import SalaryReport, Teacher
+
+    results = []
+    for teacher in Teacher.objects.filter(id__in=teacher_ids).select_related('user'):
+        total_hours, total_amount, snapshot, _ = SalaryReport.compute_snapshot(teacher, year, month)
+        results.append({
+            'teacher_id': teacher.id,
+            'total_hours': total_hours,
+            'total_amount': total_amount,
+            'snapshot': snapshot,
+        })
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Generate salary reports for every teacher for a month using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True)
+        parser.add_argument('--month', type=int, required=True)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes; 1 computes in this process')
+        parser.add_argument('--chunk-size', type=int, default=50, help='Teachers per worker task')
+        parser.add_argument('--created-by', help='Username recorded as the author of the reports')
+        parser.add_argument('--replace', action='store_true',
+                            help='Soft-delete existing reports for the month instead of skipping those teachers')
+        parser.add_argument('--dry-run', action='store_true', help='Compute everything but write nothing')
+
+    def handle(self, *args, **options):
+        from teachers_app.models import CustomUser, SalaryReport, Teacher
+
+        year, month = options['year'], options['month']
+        if not 1 <= month <= 12:
+            raise CommandError('--month must be between 1 and 12')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        created_by = None
+        if options['created_by']:
+            try:
+                created_by = CustomUser.objects.get(username=options['created_by'])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"User {options['created_by']} does not exist")
+
+        start_date, end_date = SalaryReport.month_period(year, month)
+        timings = {}
+
+        phase_start = time.perf_counter()
+        existing = SalaryReport.objects.filter(
+            start_date__gte=start_date,
+            start_date__lt=end_date,
+            is_deleted=False
+        )
+        teachers = Teacher.objects.order_by('id')
+        if not options['replace']:
+            teachers = teachers.exclude(id__in=existing.values('teacher_id'))
+        teacher_ids = list(teachers.values_list('id', flat=True))
+        chunks = [
+            teacher_ids[i:i + options['chunk_size']]
+            for i in range(0, len(teacher_ids), options['chunk_size'])
+        ]
+        timings['load'] = time.perf_counter() - phase_start
+        self.stdout.write(f'{len(teacher_ids)} teachers in {len(chunks)} chunks')
+
+        phase_start = time.perf_counter()
+        results = self.compute(chunks, year, month, options['workers'], len(teacher_ids))
+        timings['compute'] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        now = timezone.now()
+        reports = [
+            SalaryReport(
+                teacher_id=result['teacher_id'],
+                start_date=start_date,
+                end_date=end_date,
+                total_hours=result['total_hours'],
+                total_amount=result['total_amount'],
+                snapshot=result['snapshot'],
+                snapshot_at=now,
+                created_by=created_by,
+            )
+            for result in results
+        ]
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: would write {len(reports)} salary reports')
+        else:
+            # One short write transaction for the whole month
+            with transaction.atomic():
+                if options['replace']:
+                    existing.filter(teacher_id__in=teacher_ids).update(is_deleted=True, deleted_at=now, updated_at=now)
+                SalaryReport.objects.bulk_create(reports, batch_size=500)
+            self.stdout.write(f'Wrote {len(reports)} salary reports')
+        timings['write'] = time.perf_counter() - phase_start
+
+        for phase, seconds in timings.items():
+            self.stdout.write(f'  {phase}: {seconds:.3f}s')
+        self.stdout.write(self.style.SUCCESS(f'Payroll for {year}-{month:02d} done'))
+
+    def worker_count(self, workers):
+        """
+        Workers read through connections of their own, so they cannot see an
+        in-memory SQLite database or rows of a transaction still open here
+        """
+        from teachers_app.models import Teacher
+
+        connection = connections[router.db_for_read(Teacher)]
+        if workers > 1 and (connection.in_atomic_block
+                            or connection.vendor == 'sqlite' and connection.is_in_memory_db()):
+            self.stdout.write('Workers cannot read this database; computing in this process')
+            return 1
+        return workers
+
+    def compute(self, chunks, year, month, workers, total):
+        results = []
+        workers = self.worker_count(workers)
+        if workers <= 1:
+            for chunk in chunks:
+                results.extend(compute_chunk(chunk, year, month))
+                self.stdout.write(f'Computed {len(results)}/{total} teachers')
+            return results
+
+        # Workers open their own connections; drop ours so fork() does not copy it
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'teachers.settings'),)
+        ) as executor:
+            futures = [executor.submit(compute_chunk, chunk, year, month) for chunk in chunks]
+            for future in as_completed(futures):
+                results.extend(future.result())
+                self.stdout.write(f'Computed {len(results)}/{total} teachers')
+        return results
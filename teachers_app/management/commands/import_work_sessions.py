@@ -0,0 +1,43 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from teachers_app.services import WorkSessionImportService
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import work sessions from a CSV timesheet, reporting rejected rows instead of aborting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--batch-size', type=int, default=WorkSessionImportService.BATCH_SIZE)
+        parser.add_argument('--rejects', help='Write rejected rows and their errors to this CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate every row but insert nothing')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        try:
+            f = open(options['path'], newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        with f:
+            reader = csv.DictReader(f)
+            missing = WorkSessionImportService.missing_columns(reader.fieldnames)
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(missing)}")
+            created, rejected = WorkSessionImportService.import_rows(
+                reader, batch_size=options['batch_size'], dry_run=options['dry_run']
+            )
+
+        if options['rejects'] and rejected:
+            with open(options['rejects'], 'w', newline='') as f:
+                csv.writer(f).writerows(WorkSessionImportService.rejected_rows(rejected))
+            self.stdout.write(f"Rejected rows written to {options['rejects']}")
+        for number, _, errors in rejected[:20]:
+            self.stdout.write(self.style.WARNING(f'  row {number}: {errors}'))
+        if len(rejected) > 20:
+            self.stdout.write(self.style.WARNING(f'  ... and {len(rejected) - 20} more'))
+
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {created} work sessions, rejected {len(rejected)} rows'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from teachers_app.models import KioskToken, Teacher
+
+
+class Command(BaseCommand):
+    help = "Issue a teacher's kiosk clock-in token, replacing any previous one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Username of the teacher')
+
+    def handle(self, *args, **options):
+        try:
+            teacher = Teacher.objects.get(user__username=options['username'])
+        except Teacher.DoesNotExist:
+            raise CommandError(f"Teacher {options['username']} does not exist")
+        token = KioskToken.issue(teacher)
+        self.stdout.write(f'Kiosk token for {teacher.user.username} (shown only once):')
+        self.stdout.write(token)
@@ -0,0 +1,53 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions in small batches, so a cron job can run it without holding '
+        "the database's write lock the way a single clearsessions DELETE does"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Sessions deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches, to leave room for other writers')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be pruned')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not issubclass(store, DatabaseSessionStore):
+            # Signed cookies keep nothing on the server; files are removed one by one anyway
+            if not options['dry_run']:
+                store.clear_expired()
+            self.stdout.write(self.style.SUCCESS(f'Cleared expired sessions of {settings.SESSION_ENGINE}'))
+            return
+
+        model = store.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: would prune {expired.count()} expired sessions')
+            return
+
+        # Served by the expire_date index; cached_db cache entries expire on their own
+        pruned = 0
+        while True:
+            with transaction.atomic():
+                keys = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+                if not keys:
+                    break
+                deleted, _ = model.objects.filter(pk__in=keys).delete()
+            pruned += deleted
+            self.stdout.write(f'Pruned {pruned} sessions')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} expired sessions'))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from teachers_app.models import WorkSession
+
+
+class Command(BaseCommand):
+    help = 'Permanently delete work sessions that have been in the trash longer than a retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=30,
+                            help='Only purge sessions deleted at least this many days ago')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches, to leave room for other writers')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be purged')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0:
+            raise CommandError('--older-than-days must not be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        cutoff = timezone.now() - timezone.timedelta(days=options['older_than_days'])
+        expired = WorkSession.all_objects.deleted().filter(deleted_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: would purge {expired.count()} work sessions')
+            return
+
+        # Trashed sessions are already out of the ledger, so rows can go in plain batches
+        purged = 0
+        while True:
+            with transaction.atomic():
+                ids = list(expired.order_by('deleted_at').values_list('pk', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                deleted, _ = WorkSession.all_objects.filter(pk__in=ids).delete()
+            purged += deleted
+            self.stdout.write(f'Purged {purged} work sessions')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} work sessions deleted before {cutoff:%Y-%m-%d}'))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from teachers_app.models import Teacher, TeacherMonthSummary, WorkSession
+from teachers_app.services import TeacherMonthSummaryService
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the TeacherMonthSummary ledger from WorkSession rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teacher', type=int, help='Only rebuild rows for this teacher id')
+        parser.add_argument('--year', type=int, help='Only rebuild rows for this year')
+        parser.add_argument('--month', type=int, help='Only rebuild rows for this month')
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift between the ledger and the sessions without writing')
+
+    def handle(self, *args, **options):
+        teacher = None
+        if options['teacher']:
+            try:
+                teacher = Teacher.objects.get(id=options['teacher'])
+            except Teacher.DoesNotExist:
+                raise CommandError(f"Teacher {options['teacher']} does not exist")
+
+        if options['check']:
+            drift = self.find_drift(teacher, options['year'], options['month'])
+            for key in drift:
+                self.stdout.write(f"Drift in teacher/task/year/month {key}")
+            if drift:
+                self.stdout.write(self.style.WARNING(f'{len(drift)} ledger rows out of sync'))
+            else:
+                self.stdout.write(self.style.SUCCESS('Ledger is in sync'))
+            return
+
+        written = TeacherMonthSummaryService.rebuild(
+            teacher=teacher,
+            year=options['year'],
+            month=options['month']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} ledger rows'))
+
+    def find_drift(self, teacher, year, month):
+        fields = ('seconds', 'amount_cents', 'session_count', 'rounded_session_count')
+        summaries = TeacherMonthSummary.objects.all()
+        aggregated = TeacherMonthSummaryService.aggregate_sessions(WorkSession.objects.all())
+        for name, value in (('teacher', teacher), ('year', year), ('month', month)):
+            if value is not None:
+                summaries = summaries.filter(**{name: value})
+                aggregated = aggregated.filter(**{name: value})
+
+        def keyed(rows):
+            return {
+                (row['teacher_id'], row['task_id'], row['year'], row['month']): tuple(row[f] or 0 for f in fields)
+                for row in rows
+            }
+
+        expected = keyed(aggregated)
+        actual = keyed(summaries.values('teacher_id', 'task_id', 'year', 'month', *fields))
+        return sorted(key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key))
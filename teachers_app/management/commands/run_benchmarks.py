@@ -0,0 +1,203 @@
+import json
+import platform
+import time
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from teachers_app.middleware import percentile
+from teachers_app.models import CustomUser, KioskToken, SalaryReport, Teacher, WorkSession
+from teachers_app.services import SalaryCalculationService
+
+
+class Rollback(Exception):
+    """Raised to undo everything a benchmark run wrote"""
+
+
+def summarize(samples):
+    """Return mean/p50/p95/min of a list of durations in seconds, as milliseconds"""
+    ordered = sorted(sample * 1000 for sample in samples)
+    return {
+        'runs': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered), 3),
+        'p50_ms': round(percentile(ordered, 0.50), 3),
+        'p95_ms': round(percentile(ordered, 0.95), 3),
+        'min_ms': round(ordered[0], 3),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline_p50, current_p50, ratio) for each benchmark slower than the threshold allows"""
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or not previous.get('p50_ms'):
+            continue
+        ratio = current['p50_ms'] / previous['p50_ms']
+        if ratio > 1 + threshold:
+            regressions.append((name, previous['p50_ms'], current['p50_ms'], ratio))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = 'Time the salary and work-session hot paths and compare them against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teacher', type=int, help='Teacher id to benchmark; defaults to the busiest teacher')
+        parser.add_argument('--year', type=int, help='Defaults to the current year')
+        parser.add_argument('--month', type=int, help='Defaults to the current month')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per benchmark')
+        parser.add_argument('--saves', type=int, default=200, help='WorkSession.save calls for the throughput run')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+        parser.add_argument('--baseline', default='benchmark_baseline.json', help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Also store these results as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed p50 slowdown against the baseline, as a fraction')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when any benchmark regressed')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['saves'] < 1:
+            raise CommandError('--iterations and --saves must be at least 1')
+
+        now = timezone.localtime()
+        year = options['year'] or now.year
+        month = options['month'] or now.month
+        teacher = self.get_teacher(options['teacher'])
+        self.stdout.write(f'Benchmarking teacher {teacher.id} ({teacher.user.username}) for {year}-{month:02d}')
+
+        results = {
+            'created_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'work_sessions': WorkSession.objects.count(),
+            'teacher_id': teacher.id,
+            'year': year,
+            'month': month,
+            'benchmarks': {},
+        }
+        # Everything below writes reports, sessions and a user; roll it all back
+        try:
+            with transaction.atomic():
+                self.run(results['benchmarks'], teacher, year, month, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        for name, stats in results['benchmarks'].items():
+            self.stdout.write(
+                f"  {name:<24} mean {stats['mean_ms']:>9.3f}ms  p50 {stats['p50_ms']:>9.3f}ms  "
+                f"p95 {stats['p95_ms']:>9.3f}ms  min {stats['min_ms']:>9.3f}ms"
+            )
+        self.write_json(options['output'], results)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        regressions = self.check_baseline(results, options['baseline'], options['threshold'])
+        if options['save_baseline']:
+            self.write_json(options['baseline'], results)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} benchmarks regressed')
+
+    def get_teacher(self, teacher_id):
+        if teacher_id:
+            try:
+                return Teacher.objects.select_related('user').get(id=teacher_id)
+            except Teacher.DoesNotExist:
+                raise CommandError(f'Teacher {teacher_id} does not exist')
+        teacher = Teacher.objects.select_related('user').annotate(
+            sessions=Count('worksession')
+        ).order_by('-sessions', 'id').first()
+        if teacher is None:
+            raise CommandError('No teachers to benchmark; run seed_benchmark_data first')
+        return teacher
+
+    def time(self, iterations, func):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    def run(self, benchmarks, teacher, year, month, options):
+        iterations = options['iterations']
+        user = CustomUser.objects.create_superuser(username='benchmark_admin', password=None)
+
+        benchmarks['calculate_salary'] = self.time(
+            iterations, lambda: SalaryCalculationService.calculate_salary(teacher, year, month)
+        )
+        benchmarks['create_for_month'] = self.time(
+            iterations, lambda: SalaryReport.create_for_month(teacher, year, month, user)
+        )
+
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        client = Client(HTTP_HOST=host)
+        client.force_login(user)
+        views = {
+            'list_work_sessions_view': reverse('superuser_list_work_sessions'),
+            'salary_report_view': reverse('view_salary_report', args=[teacher.id, year, month]),
+            'list_salary_reports_view': reverse('list_salary_reports'),
+        }
+        for name, url in views.items():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            benchmarks[name] = self.time(iterations, lambda: client.get(url))
+
+        task = WorkSession.objects.filter(teacher=teacher).values_list('task', flat=True).first()
+        if task is None:
+            self.stdout.write(self.style.WARNING('Teacher has no work sessions; skipping the write benchmarks'))
+            return
+
+        # Alternate kiosk clock-ins and clock-outs, timing each request
+        kiosk = Client(HTTP_HOST=host, HTTP_AUTHORIZATION=f'Token {KioskToken.issue(teacher)}')
+        kiosk_url = reverse('kiosk_clock')
+        WorkSession.objects.filter(teacher=teacher, entry_type='clock', clock_out__isnull=True).delete()
+        samples = []
+        for _ in range(iterations):
+            for action in ('in', 'out'):
+                body = json.dumps({'action': action, 'task': task})
+                start = time.perf_counter()
+                response = kiosk.post(kiosk_url, body, content_type='application/json')
+                samples.append(time.perf_counter() - start)
+                if response.status_code not in (200, 201):
+                    raise CommandError(f'{kiosk_url} returned {response.status_code}')
+        benchmarks['kiosk_clock'] = summarize(samples)
+        samples = []
+        for _ in range(options['saves']):
+            session = WorkSession(teacher=teacher, task_id=task, entry_type='manual', manual_hours=Decimal('1.50'))
+            start = time.perf_counter()
+            session.save()
+            samples.append(time.perf_counter() - start)
+        benchmarks['work_session_save'] = summarize(samples)
+        benchmarks['work_session_save']['saves_per_second'] = round(len(samples) / sum(samples), 1)
+
+    def check_baseline(self, results, path, threshold):
+        try:
+            with open(path) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(f'No baseline at {path}; nothing to compare against')
+            return []
+
+        regressions = compare(results, baseline, threshold)
+        for name, previous, current, ratio in regressions:
+            self.stdout.write(self.style.ERROR(
+                f'  {name} regressed: p50 {previous:.3f}ms -> {current:.3f}ms ({ratio:.2f}x)'
+            ))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'No regressions beyond {threshold:.0%} against {path}'))
+        return regressions
+
+    def write_json(self, path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.write('\n')
@@ -0,0 +1,145 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from teachers_app.models import CustomUser, Student, Task, Teacher, TeacherMonthSummary, WorkSession
+
+TASK_NAMES = ['Lesson', 'Tutoring', 'Exam Prep', 'Homework Review', 'Workshop', 'Meeting', 'Grading', 'Mentoring']
+HOURLY_RATES = [Decimal(rate) for rate in ('15.00', '18.50', '20.00', '22.50', '25.00', '30.00', '35.00', '40.00')]
+# Roughly how teachers record work: most sessions are clocked, some typed in
+ENTRY_TYPE_WEIGHTS = {'clock': 55, 'manual': 30, 'time_range': 15}
+MANUAL_HOURS = [Decimal(hours) for hours in ('0.50', '1.00', '1.00', '1.50', '2.00', '2.00', '3.00', '4.00')]
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate synthetic teachers, tasks, students and work sessions for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=50)
+        parser.add_argument('--tasks', type=int, default=8)
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--years', type=int, default=2, help='Years of history ending this month')
+        parser.add_argument('--sessions-per-month', type=int, default=40,
+                            help='Average sessions per teacher per month')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed, so runs are repeatable')
+        parser.add_argument('--prefix', default='bench', help='Username and task name prefix')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded data with this prefix first')
+
+    def handle(self, *args, **options):
+        for name in ('teachers', 'tasks', 'years', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+
+        if options['clear']:
+            self.clear(prefix)
+        elif CustomUser.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Data with prefix '{prefix}' already exists; use --clear or another --prefix")
+
+        # Hashing is deliberately slow, so every seeded user shares one hash
+        password = make_password(prefix)
+        with transaction.atomic():
+            teachers = self.create_teachers(prefix, options['teachers'], password)
+            tasks = self.create_tasks(prefix, options['tasks'], rng)
+            students = self.create_students(prefix, options['students'], password)
+        self.stdout.write(f'Created {len(teachers)} teachers, {len(tasks)} tasks, {students} students')
+
+        total = 0
+        for batch in self.generate_sessions(teachers, tasks, options, rng):
+            total += len(WorkSession.objects.create_many(batch))
+            self.stdout.write(f'Created {total} work sessions')
+
+        ledger_rows = TeacherMonthSummary.objects.filter(teacher__in=teachers).count()
+        self.stdout.write(self.style.SUCCESS(f'Seeded {total} work sessions and {ledger_rows} ledger rows'))
+
+    def clear(self, prefix):
+        users = CustomUser.objects.filter(username__startswith=f'{prefix}_')
+        WorkSession.all_objects.filter(teacher__user__in=users).delete()
+        Task.objects.filter(name__startswith=f'{prefix} ').delete()
+        deleted, _ = users.delete()
+        self.stdout.write(f'Deleted {deleted} previously seeded rows')
+
+    def create_teachers(self, prefix, count, password):
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'{prefix}_teacher_{i}', password=password, is_teacher=True)
+            for i in range(count)
+        ])
+        return Teacher.objects.bulk_create([Teacher(user=user) for user in users])
+
+    def create_tasks(self, prefix, count, rng):
+        return Task.objects.bulk_create([
+            Task(
+                name=f'{prefix} {TASK_NAMES[i % len(TASK_NAMES)]} {i}',
+                hourly_rate=rng.choice(HOURLY_RATES),
+            )
+            for i in range(count)
+        ])
+
+    def create_students(self, prefix, count, password):
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'{prefix}_student_{i}', password=password, is_student=True)
+            for i in range(count)
+        ])
+        Student.objects.bulk_create([Student(user=user) for user in users])
+        return len(users)
+
+    def generate_sessions(self, teachers, tasks, options, rng):
+        """Yield lists of unsaved WorkSessions, batch_size at a time"""
+        now = timezone.localtime()
+        months = []
+        year, month = now.year, now.month
+        for _ in range(options['years'] * 12):
+            months.append((year, month))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+
+        entry_types = list(ENTRY_TYPE_WEIGHTS)
+        weights = list(ENTRY_TYPE_WEIGHTS.values())
+        batch = []
+        for teacher in teachers:
+            # Each teacher mostly works on a few favourite tasks
+            favourites = rng.sample(tasks, min(len(tasks), 3))
+            workload = rng.uniform(0.5, 1.5)
+            for year, month in months:
+                count = max(0, round(rng.gauss(options['sessions_per_month'] * workload, 5)))
+                for _ in range(count):
+                    task = rng.choice(favourites) if rng.random() < 0.8 else rng.choice(tasks)
+                    entry_type = rng.choices(entry_types, weights)[0]
+                    batch.append(self.build_session(teacher, task, entry_type, year, month, now, rng))
+                    if len(batch) >= options['batch_size']:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+
+    def build_session(self, teacher, task, entry_type, year, month, now, rng):
+        day = rng.randint(1, 28)
+        start = timezone.make_aware(datetime(year, month, day, rng.randint(8, 18), rng.choice((0, 15, 30, 45))))
+        if start > now:
+            start = now - timedelta(hours=rng.randint(1, 8))
+        # Most sessions last one or two hours, a few run much longer
+        duration = timedelta(minutes=min(480, max(15, round(rng.lognormvariate(4.3, 0.5)))))
+
+        session = WorkSession(
+            teacher=teacher,
+            task=task,
+            entry_type=entry_type,
+            created_at=start,
+        )
+        if entry_type == 'manual':
+            session.manual_hours = rng.choice(MANUAL_HOURS)
+        elif entry_type == 'clock':
+            session.clock_in, session.clock_out = start, start + duration
+        else:
+            session.start_time, session.end_time = start, start + duration
+        # A small share of sessions end up deleted by an administrator
+        if rng.random() < 0.02:
+            session.is_deleted = True
+            session.deleted_at = start + timedelta(days=1)
+        return session
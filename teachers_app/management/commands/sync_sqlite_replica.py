@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy_sqlite_database(source, path):
+    """Copy the database behind a SQLite connection into the file at path"""
+    source.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        # The online backup API copies a consistent snapshot, even under WAL
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the replica file, to try replica routing locally'
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE
+        if not alias:
+            raise CommandError('No replica configured; set DATABASE_REPLICA_URL')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Both the primary and the replica must be SQLite databases')
+
+        # Drop the replica's own connection so it reopens the fresh copy
+        replica.close()
+        copy_sqlite_database(primary, replica.settings_dict['NAME'])
+        self.stdout.write(self.style.SUCCESS(f"Copied the primary into {replica.settings_dict['NAME']}"))
@@ -0,0 +1,306 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import auth
+
+from .backends import ROLE_PROFILES, expected_role
+from .routers import PIN_COOKIE, primary_pin, wrote_to_primary
+
+ROLE_SESSION_KEY = '_profile_role'
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values), math.ceil(fraction * len(sorted_values))) - 1)
+    return sorted_values[index]
+
+
+class RequestMetricsStore:
+    """
+    Keeps the most recent request samples per URL name in bounded ring
+    buffers. Samples are (wall_ms, db_ms, queries, duplicate_queries).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(self._new_buffer)
+
+    @staticmethod
+    def _new_buffer():
+        return deque(maxlen=getattr(settings, 'REQUEST_METRICS_BUFFER_SIZE', 500))
+
+    def record(self, url_name, wall_ms, db_ms, queries, duplicates):
+        with self._lock:
+            self._samples[url_name].append((wall_ms, db_ms, queries, duplicates))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        """Return per-URL-name percentiles, busiest URL names first"""
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+
+        rows = []
+        for name, samples in snapshot.items():
+            wall = sorted(sample[0] for sample in samples)
+            db = sorted(sample[1] for sample in samples)
+            queries = sorted(sample[2] for sample in samples)
+            duplicates = [sample[3] for sample in samples]
+            rows.append({
+                'url_name': name,
+                'requests': len(samples),
+                'wall_ms': {
+                    'p50': percentile(wall, 0.50),
+                    'p95': percentile(wall, 0.95),
+                    'p99': percentile(wall, 0.99),
+                },
+                'db_ms': {
+                    'p50': percentile(db, 0.50),
+                    'p95': percentile(db, 0.95),
+                    'p99': percentile(db, 0.99),
+                },
+                'queries': {
+                    'p50': percentile(queries, 0.50),
+                    'p95': percentile(queries, 0.95),
+                    'max': queries[-1],
+                },
+                'duplicate_queries': {
+                    'avg': sum(duplicates) / len(duplicates),
+                    'max': max(duplicates),
+                },
+            })
+        rows.sort(key=lambda row: row['requests'], reverse=True)
+        return rows
+
+
+request_metrics = RequestMetricsStore()
+
+
+class QueryCounter:
+    """Counts queries, their time and repeated SQL for one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.duplicates = 0
+        self.db_seconds = 0.0
+        self._seen = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if sql in self._seen:
+            self.duplicates += 1
+        else:
+            self._seen.add(sql)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+
+
+# The current request's counter. Connections are per thread, and async views
+# run their queries in worker threads, so rather than wrapping the middleware
+# thread's connections every connection carries count_queries and reports to
+# whichever counter the calling context holds.
+_query_counter = ContextVar('request_query_counter', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper forwarding to the current request's QueryCounter"""
+    counter = _query_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """connection_created receiver adding count_queries to every connection"""
+    if count_queries not in connection.execute_wrappers:
+        # Outermost, so execute_wrapper() blocks entered earlier still pop their own
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, database time, query count and duplicate-query count
+    for every request, keyed by the resolved URL name. A duplicate is a query
+    whose SQL text already ran earlier in the same request, which is how N+1
+    loops show up. Only counters are kept, never the SQL, so it is cheap
+    enough to leave on; set REQUEST_METRICS_ENABLED = False to bypass it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        token = _query_counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_counter.reset(token)
+        self.record(request, counter, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        counter = QueryCounter()
+        token = _query_counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_counter.reset(token)
+        self.record(request, counter, time.perf_counter() - start)
+        return response
+
+    def record(self, request, counter, wall_seconds):
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match and match.view_name else '<unresolved>'
+        request_metrics.record(
+            url_name,
+            wall_seconds * 1000,
+            counter.db_seconds * 1000,
+            counter.queries,
+            counter.duplicates,
+        )
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pins a browser's reads to the primary database for
+    REPLICA_STICKY_SECONDS after any request that wrote to it, so replica
+    lag never hides a user's own changes from them. See teachers_app.routers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with primary_pin(PIN_COOKIE in request.COOKIES):
+            response = self.get_response(request)
+            self.pin_writer(response)
+        return response
+
+    async def __acall__(self, request):
+        with primary_pin(PIN_COOKIE in request.COOKIES):
+            response = await self.get_response(request)
+            self.pin_writer(response)
+        return response
+
+    def pin_writer(self, response):
+        if wrote_to_primary():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+
+
+def user_role(user):
+    """The role dashboard_redirect sends a user by, or None"""
+    if not user.is_authenticated:
+        return None
+    if user.is_superuser:
+        return 'superuser'
+    if user.is_student:
+        return 'student'
+    if user.is_teacher:
+        return 'teacher'
+    if user.is_inspector:
+        return 'inspector'
+    return None
+
+
+def remember_role(sender, request, user, **kwargs):
+    """user_logged_in receiver caching the role with the login's session write"""
+    role = user_role(user)
+    if request is not None and role is not None:
+        request.session[ROLE_SESSION_KEY] = role
+
+
+class ProfileMiddleware:
+    """
+    Resolves the signed-in user, their role and their Teacher, Student or
+    Inspector profile once per request, as request.user, request.role and
+    request.profile (None for superusers and anonymous users). The user and
+    profile come from one query: the role is kept in the session from login
+    on, so only that profile's table is joined, and is updated should an
+    admin change it. Goes right after AuthenticationMiddleware, whose lazy
+    user it replaces.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with expected_role(request.session.get(ROLE_SESSION_KEY)):
+            user = auth.get_user(request)
+        self.attach(request, user, self.profile(user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        with expected_role(await request.session.aget(ROLE_SESSION_KEY)):
+            user = await auth.aget_user(request)
+        relation = ROLE_PROFILES.get(user_role(user))
+        if relation and not user._meta.get_field(relation).is_cached(user):
+            # Not joined with the user: a changed role, or a session signed
+            # in through ModelBackend. Query for it off the event loop.
+            profile = await sync_to_async(self.profile)(user)
+        else:
+            profile = self.profile(user)
+        self.attach(request, user, profile)
+        return await self.get_response(request)
+
+    @staticmethod
+    def profile(user):
+        """The user's role profile, or None; free when the role was expected"""
+        relation = ROLE_PROFILES.get(user_role(user))
+        return getattr(user, relation, None) if relation else None
+
+    @staticmethod
+    def attach(request, user, profile):
+        async def auser():
+            return user
+
+        # Sync and async code share the one user instead of loading it each
+        request.user = user
+        request.auser = auser
+        request.role = user_role(user)
+        request.profile = profile
+        if request.role is not None and request.session.get(ROLE_SESSION_KEY) != request.role:
+            request.session[ROLE_SESSION_KEY] = request.role
@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def backfill_summaries(apps, schema_editor):
+    WorkSession = apps.get_model('teachers_app', 'WorkSession')
+    TeacherMonthSummary = apps.get_model('teachers_app', 'TeacherMonthSummary')
+    rows = WorkSession.objects.filter(
+        is_deleted=False,
+        stored_hours__isnull=False
+    ).annotate(
+        year=ExtractYear('created_at'),
+        month=ExtractMonth('created_at'),
+    ).values(
+        'teacher_id', 'task_id', 'year', 'month'
+    ).annotate(
+        hours=Sum('stored_hours'),
+        amount=Sum('total_amount'),
+        session_count=Count('id'),
+        rounded_session_count=Count('id', filter=Q(entry_type__in=['clock', 'time_range'])),
+    ).order_by()
+    TeacherMonthSummary.objects.bulk_create([
+        TeacherMonthSummary(
+            teacher_id=row['teacher_id'],
+            task_id=row['task_id'],
+            year=row['year'],
+            month=row['month'],
+            hours=row['hours'] or Decimal('0.00'),
+            amount=row['amount'] or Decimal('0.00'),
+            session_count=row['session_count'],
+            rounded_session_count=row['rounded_session_count'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0006_service'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherMonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('hours', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('session_count', models.IntegerField(default=0)),
+                ('rounded_session_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teachers_app.task')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teachers_app.teacher')),
+            ],
+            options={
+                'verbose_name': 'Teacher Month Summary',
+                'verbose_name_plural': 'Teacher Month Summaries',
+                'constraints': [models.UniqueConstraint(fields=('teacher', 'year', 'month', 'task'), name='unique_teacher_month_task_summary')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
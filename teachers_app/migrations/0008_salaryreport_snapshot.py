@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 18:08
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0007_teachermonthsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salaryreport',
+            name='is_stale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='salaryreport',
+            name='snapshot',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.AddField(
+            model_name='salaryreport',
+            name='snapshot_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
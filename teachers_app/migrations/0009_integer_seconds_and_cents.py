@@ -0,0 +1,74 @@
+# Generated by Django 5.2 on 2026-10-18 18:13
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+
+
+def to_seconds(hours):
+    return int((Decimal(hours) * 3600).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def backfill_integers(apps, schema_editor):
+    WorkSession = apps.get_model('teachers_app', 'WorkSession')
+    TeacherMonthSummary = apps.get_model('teachers_app', 'TeacherMonthSummary')
+
+    sessions = []
+    for session in WorkSession.objects.only('id', 'stored_hours', 'total_amount').iterator(chunk_size=2000):
+        if session.stored_hours is not None:
+            session.duration_seconds = to_seconds(session.stored_hours)
+        if session.total_amount is not None:
+            session.amount_cents = to_cents(session.total_amount)
+        sessions.append(session)
+        if len(sessions) >= 2000:
+            WorkSession.objects.bulk_update(sessions, ['duration_seconds', 'amount_cents'])
+            sessions = []
+    WorkSession.objects.bulk_update(sessions, ['duration_seconds', 'amount_cents'])
+
+    summaries = list(TeacherMonthSummary.objects.all())
+    for summary in summaries:
+        summary.seconds = to_seconds(summary.hours)
+        summary.amount_cents = to_cents(summary.amount)
+    TeacherMonthSummary.objects.bulk_update(summaries, ['seconds', 'amount_cents'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0008_salaryreport_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teachermonthsummary',
+            name='amount_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teachermonthsummary',
+            name='seconds',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='amount_cents',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='duration_seconds',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_integers, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='teachermonthsummary',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='teachermonthsummary',
+            name='hours',
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0009_integer_seconds_and_cents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salaryreport',
+            index=models.Index(fields=['teacher', 'start_date', 'end_date', 'is_deleted'], name='salaryreport_teacher_period'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryreport',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-start_date'], name='salaryreport_live_start'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['teacher', 'created_at'], name='worksession_teacher_created'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['teacher', 'created_at'], name='worksession_live_teacher_month'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at'], name='worksession_live_created'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('clock_out__isnull', True)), fields=['teacher', 'entry_type'], name='worksession_open_clock'),
+        ),
+    ]
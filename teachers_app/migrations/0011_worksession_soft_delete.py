@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='worksession',
+            name='worksession_teacher_created',
+        ),
+        migrations.RemoveIndex(
+            model_name='worksession',
+            name='worksession_open_clock',
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('clock_out__isnull', True), ('is_deleted', False)), fields=['teacher', 'entry_type'], name='worksession_live_open_clock'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='worksession_trash'),
+        ),
+    ]
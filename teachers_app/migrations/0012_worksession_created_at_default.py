@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 18:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0011_worksession_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='worksession',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 18:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0012_worksession_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KioskToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='kiosk_token', to='teachers_app.teacher')),
+            ],
+        ),
+    ]
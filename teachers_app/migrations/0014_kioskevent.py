@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 18:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0013_kiosktoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KioskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=64, unique=True)),
+                ('action', models.CharField(choices=[('in', 'Clock in'), ('out', 'Clock out')], max_length=3)),
+                ('occurred_at', models.DateTimeField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='teachers_app.worksession')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teachers_app.teacher')),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_updated_at(apps, schema_editor):
+    # The latest timestamp each row already has, rather than the migration's
+    WorkSession = apps.get_model('teachers_app', 'WorkSession')
+    SalaryReport = apps.get_model('teachers_app', 'SalaryReport')
+    WorkSession.objects.update(updated_at=Coalesce('deleted_at', 'created_at'))
+    SalaryReport.objects.update(updated_at=Coalesce('deleted_at', 'snapshot_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0014_kioskevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salaryreport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['teacher', 'updated_at'], name='worksession_teacher_updated'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
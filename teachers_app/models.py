@@ -1,11 +1,48 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import AbstractUser, Permission
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from decimal import Decimal, ROUND_HALF_UP
 from django.db.models import Sum, F
-from datetime import datetime
+from datetime import date, datetime
+import hashlib
+import json
+import secrets
+from .report_cache import salary_report_cache
+from .routers import read_database
+
+
+def duration_hours(duration):
+    """Return a timedelta as exact Decimal hours, without a float round-trip"""
+    microseconds = duration // timezone.timedelta(microseconds=1)
+    return Decimal(microseconds) / Decimal(3600 * 10 ** 6)
+
+
+def hours_to_seconds(hours):
+    return int((hours * 3600).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def seconds_to_hours(seconds):
+    return (Decimal(seconds or 0) / 3600).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def amount_to_cents(amount):
+    return int((amount * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def cents_to_amount(cents):
+    return (Decimal(cents or 0) / 100).quantize(Decimal('0.01'))
+
+
+def salary_month_changed(entry):
+    """Flag reports and cached salaries covering a WorkSession.ledger_entry() as outdated"""
+    if entry is None:
+        return
+    SalaryReport.mark_stale(entry['teacher_id'], entry['year'], entry['month'])
+    salary_report_cache.bump_version(entry['teacher_id'], entry['year'], entry['month'])
 
 
 # Custom User Model
@@ -25,6 +62,60 @@ class Teacher(models.Model):
         return f"{self.user.username} - {self.subjects}" if self.subjects else self.user.username
 
 
+class KioskToken(models.Model):
+    """
+    Token a door kiosk presents to clock a teacher in and out. Only its
+    SHA-256 digest is stored; the token itself is shown once when issued.
+    """
+    teacher = models.OneToOneField(Teacher, on_delete=models.CASCADE, related_name='kiosk_token')
+    digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Kiosk token for {self.teacher}"
+
+    @staticmethod
+    def digest_for(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, teacher):
+        """Create or replace the teacher's token and return the new token"""
+        token = secrets.token_urlsafe(32)
+        cls.objects.update_or_create(teacher=teacher, defaults={'digest': cls.digest_for(token)})
+        return token
+
+    @classmethod
+    def teacher_id_for(cls, token):
+        """Return the id of the teacher a token belongs to, or None"""
+        return cls.objects.filter(
+            digest=cls.digest_for(token),
+            teacher__user__is_active=True
+        ).values_list('teacher_id', flat=True).first()
+
+
+class KioskEvent(models.Model):
+    """
+    A clock event uploaded by a kiosk that has been applied. Kiosks resend
+    their queue until the upload is acknowledged; the event id they assign
+    lets a replayed event be recognised instead of applied twice.
+    """
+    ACTION_CHOICES = [
+        ('in', 'Clock in'),
+        ('out', 'Clock out'),
+    ]
+
+    event_id = models.CharField(max_length=64, unique=True)
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    session = models.ForeignKey('WorkSession', on_delete=models.SET_NULL, null=True, blank=True)
+    action = models.CharField(max_length=3, choices=ACTION_CHOICES)
+    occurred_at = models.DateTimeField()
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.teacher} clocked {self.action} at {self.occurred_at}"
+
+
 # Task Model (different types of work with their rates)
 class Task(models.Model):
     name = models.CharField(max_length=200)
@@ -39,6 +130,94 @@ class Task(models.Model):
     def __str__(self):
         return f"{self.name} (${self.hourly_rate}/hour)"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Salary summaries show the task's name and current rate
+        self.invalidate_salary_cache()
+
+    def delete(self, *args, **kwargs):
+        months = self.salary_months()
+        result = super().delete(*args, **kwargs)
+        for teacher_id, year, month in months:
+            salary_report_cache.bump_version(teacher_id, year, month)
+        return result
+
+    def salary_months(self):
+        """Return the (teacher_id, year, month) tuples with work on this task"""
+        return list(TeacherMonthSummary.objects.filter(task_id=self.pk).values_list('teacher_id', 'year', 'month'))
+
+    def invalidate_salary_cache(self):
+        for teacher_id, year, month in self.salary_months():
+            salary_report_cache.bump_version(teacher_id, year, month)
+
+
+class WorkSessionQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(is_deleted=False)
+
+    def deleted(self):
+        return self.filter(is_deleted=True)
+
+    def create_many(self, rows, batch_size=None):
+        """
+        Create work sessions from dicts of field values or unsaved instances.
+
+        Does what save() does for each new row, in bulk: task rates for the
+        whole batch come from one query, compute_derived_fields() fills the
+        stored values, everything is inserted with bulk_create and the
+        monthly ledger is updated once per month touched, all in one
+        transaction. Returns the created sessions.
+        """
+        sessions = [row if isinstance(row, WorkSession) else WorkSession(**row) for row in rows]
+        rates = dict(Task.objects.filter(
+            pk__in={session.task_id for session in sessions}
+        ).values_list('pk', 'hourly_rate'))
+        for session in sessions:
+            # Store the hourly rate at creation time, as save() does
+            session.hourly_rate = rates[session.task_id]
+            session.compute_derived_fields()
+
+        with transaction.atomic():
+            created = self.bulk_create(sessions, batch_size=batch_size)
+            self.add_to_ledger(created)
+        return created
+
+    def close_many(self, sessions, batch_size=None):
+        """
+        Save the clock_out set on open clock sessions, in bulk.
+
+        compute_derived_fields() applies save()'s rounding to each session,
+        one bulk_update writes them and the monthly ledger is updated once
+        per month touched, all in one transaction. Open sessions have no
+        ledger entry, so there is nothing to subtract first.
+        """
+        now = timezone.now()
+        for session in sessions:
+            session.compute_derived_fields()
+            session.updated_at = now  # bulk_update skips auto_now
+        with transaction.atomic():
+            self.bulk_update(
+                sessions,
+                ['clock_out', 'stored_hours', 'total_amount', 'duration_seconds', 'amount_cents', 'updated_at'],
+                batch_size=batch_size
+            )
+            self.add_to_ledger(sessions)
+        return sessions
+
+    def add_to_ledger(self, sessions):
+        """Add sessions that had no ledger entry before to TeacherMonthSummary"""
+        entries = [session.ledger_entry() for session in sessions]
+        TeacherMonthSummary.apply_many(entries)
+        for entry in {(e['teacher_id'], e['year'], e['month']): e for e in entries if e}.values():
+            salary_month_changed(entry)
+
+
+class LiveWorkSessionManager(models.Manager.from_queryset(WorkSessionQuerySet)):
+    """Default WorkSession manager: soft-deleted sessions are left out"""
+
+    def get_queryset(self):
+        return super().get_queryset().live()
+
 
 # Work Session Model
 class WorkSession(models.Model):
@@ -67,14 +246,94 @@ class WorkSession(models.Model):
     start_time = models.DateTimeField(null=True, blank=True)
     end_time = models.DateTimeField(null=True, blank=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add so imports can keep the original work date
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Bulk .update()/bulk_update() callers set it themselves; pages use it as their validator
+    updated_at = models.DateTimeField(auto_now=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Integer copies of stored_hours and total_amount so the database sums them exactly
+    duration_seconds = models.IntegerField(null=True, blank=True)
+    amount_cents = models.BigIntegerField(null=True, blank=True)
+
+    # Default manager hides soft-deleted sessions; all_objects sees every row
+    objects = LiveWorkSessionManager()
+    all_objects = WorkSessionQuerySet.as_manager()
+
+    class Meta:
+        # Partial indexes hold live rows only, matching the default manager's filter
+        indexes = [
+            # A teacher's live sessions: recent lists and month ranges
+            models.Index(
+                fields=['teacher', 'created_at'],
+                condition=models.Q(is_deleted=False),
+                name='worksession_live_teacher_month'
+            ),
+            # Live sessions of every teacher over a month range (payroll export, list)
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(is_deleted=False),
+                name='worksession_live_created'
+            ),
+            # The open clock-in looked up on every record_work request
+            models.Index(
+                fields=['teacher', 'entry_type'],
+                condition=models.Q(clock_out__isnull=True, is_deleted=False),
+                name='worksession_live_open_clock'
+            ),
+            # The trash view and the purge sweep
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(is_deleted=True),
+                name='worksession_trash'
+            ),
+            # Latest change to a teacher's sessions, deleted ones included (conditional GETs)
+            models.Index(fields=['teacher', 'updated_at'], name='worksession_teacher_updated'),
+        ]
 
     def save(self, *args, **kwargs):
         # Store the hourly rate at creation time if it's a new record
         if not self.pk:  # Only set on creation
             self.hourly_rate = self.task.hourly_rate
 
+        self.compute_derived_fields()
+
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = WorkSession.all_objects.filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            # Keep the monthly ledger in step with this row
+            entry = self.ledger_entry()
+            if previous:
+                previous_entry = previous.ledger_entry()
+                TeacherMonthSummary.apply(previous_entry, sign=-1)
+                salary_month_changed(previous_entry)
+            TeacherMonthSummary.apply(entry)
+            salary_month_changed(entry)
+
+    def delete(self, *args, **kwargs):
+        """Soft delete the session; it stays restorable from the trash until purged"""
+        self.is_deleted = True
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+
+    def restore(self):
+        """Bring a soft-deleted session back into salaries and reports"""
+        self.is_deleted = False
+        self.deleted_at = None
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+
+    def hard_delete(self, *args, **kwargs):
+        """Remove the row for good"""
+        with transaction.atomic():
+            entry = self.ledger_entry()
+            result = super().delete(*args, **kwargs)
+            TeacherMonthSummary.apply(entry, sign=-1)
+            salary_month_changed(entry)
+        return result
+
+    def compute_derived_fields(self):
+        """Fill stored_hours, total_amount and their integer copies from the entry fields"""
         # Store hours based on entry type
         if self.entry_type == 'manual':
             if self.manual_hours:
@@ -83,25 +342,44 @@ class WorkSession(models.Model):
                 raise ValueError("Manual entry type requires manual_hours")
         elif self.entry_type == 'clock':
             if self.clock_in and self.clock_out:
-                hours = (self.clock_out - self.clock_in).total_seconds() / 3600
+                hours = duration_hours(self.clock_out - self.clock_in)
                 # Round clock-in/out hours to nearest hour
-                self.stored_hours = Decimal(str(hours)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+                self.stored_hours = hours.quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+            elif self.clock_in:
+                # Still clocked in: no hours or amount until clock-out
+                self.stored_hours = None
             else:
-                raise ValueError("Clock entry type requires clock_in and clock_out")
+                raise ValueError("Clock entry type requires clock_in")
         elif self.entry_type == 'time_range':
             if self.start_time and self.end_time:
-                duration = self.end_time - self.start_time
-                hours = Decimal(str(duration.total_seconds() / 3600))
+                hours = duration_hours(self.end_time - self.start_time)
                 # Round time-range hours to nearest hour
                 self.stored_hours = hours.quantize(Decimal('1'), rounding=ROUND_HALF_UP)
             else:
                 raise ValueError("Time range entry type requires start_time and end_time")
-        
+
         # Calculate total amount using stored values
         if self.stored_hours and self.hourly_rate:
-            self.total_amount = self.stored_hours * self.hourly_rate
-        
-        super().save(*args, **kwargs)
+            self.total_amount = (self.stored_hours * self.hourly_rate).quantize(
+                Decimal('0.01'), rounding=ROUND_HALF_UP
+            )
+        self.duration_seconds = hours_to_seconds(self.stored_hours) if self.stored_hours is not None else None
+        self.amount_cents = amount_to_cents(self.total_amount) if self.total_amount is not None else None
+
+    def ledger_entry(self):
+        """Return this session's contribution to TeacherMonthSummary, or None"""
+        if self.is_deleted or self.duration_seconds is None or self.created_at is None:
+            return None
+        created = timezone.localtime(self.created_at)
+        return {
+            'teacher_id': self.teacher_id,
+            'task_id': self.task_id,
+            'year': created.year,
+            'month': created.month,
+            'seconds': self.duration_seconds,
+            'amount_cents': self.amount_cents or 0,
+            'rounded': self.entry_type in ('clock', 'time_range'),
+        }
 
     def clean(self):
         """Validate the entry type requirements"""
@@ -167,6 +445,131 @@ class WorkSession(models.Model):
         return f"{self.teacher} - {self.task} - {self.clock_in} to {self.clock_out}"
 
 
+# Monthly earnings ledger, one row per teacher/task/month
+class TeacherMonthSummary(models.Model):
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    seconds = models.BigIntegerField(default=0)
+    amount_cents = models.BigIntegerField(default=0)
+    session_count = models.IntegerField(default=0)
+    rounded_session_count = models.IntegerField(default=0)  # clock/time_range sessions
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Teacher Month Summary'
+        verbose_name_plural = 'Teacher Month Summaries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['teacher', 'year', 'month', 'task'],
+                name='unique_teacher_month_task_summary'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.teacher} - {self.task.name} ({self.year}-{self.month:02d})"
+
+    @property
+    def hours(self):
+        return seconds_to_hours(self.seconds)
+
+    @property
+    def amount(self):
+        return cents_to_amount(self.amount_cents)
+
+    @classmethod
+    def apply(cls, entry, sign=1):
+        """Add (sign=1) or subtract (sign=-1) a WorkSession.ledger_entry()"""
+        if entry is None:
+            return
+        key = {
+            'teacher_id': entry['teacher_id'],
+            'task_id': entry['task_id'],
+            'year': entry['year'],
+            'month': entry['month'],
+        }
+        rounded = sign if entry['rounded'] else 0
+        updated = cls.objects.filter(**key).update(
+            seconds=F('seconds') + sign * entry['seconds'],
+            amount_cents=F('amount_cents') + sign * entry['amount_cents'],
+            session_count=F('session_count') + sign,
+            rounded_session_count=F('rounded_session_count') + rounded,
+            updated_at=timezone.now(),
+        )
+        if sign < 0:
+            cls.objects.filter(session_count__lte=0, **key).delete()
+        elif not updated:
+            cls.create_or_add(cls(
+                seconds=entry['seconds'],
+                amount_cents=entry['amount_cents'],
+                session_count=1,
+                rounded_session_count=rounded,
+                **key
+            ))
+
+    @classmethod
+    def create_or_add(cls, row):
+        """
+        Insert a new ledger row. If a concurrent first write to the same
+        month inserted it in the meantime, add this row's totals to theirs.
+        """
+        try:
+            with transaction.atomic():
+                row.save(force_insert=True)
+        except IntegrityError:
+            cls.objects.filter(
+                teacher_id=row.teacher_id, task_id=row.task_id, year=row.year, month=row.month
+            ).update(
+                seconds=F('seconds') + row.seconds,
+                amount_cents=F('amount_cents') + row.amount_cents,
+                session_count=F('session_count') + row.session_count,
+                rounded_session_count=F('rounded_session_count') + row.rounded_session_count,
+                updated_at=timezone.now(),
+            )
+
+    @classmethod
+    def apply_many(cls, entries):
+        """Add many new sessions' ledger entries with one update per month and task"""
+        totals = {}
+        for entry in entries:
+            if entry is None:
+                continue
+            key = (entry['teacher_id'], entry['task_id'], entry['year'], entry['month'])
+            total = totals.setdefault(key, {'seconds': 0, 'amount_cents': 0, 'session_count': 0, 'rounded': 0})
+            total['seconds'] += entry['seconds']
+            total['amount_cents'] += entry['amount_cents']
+            total['session_count'] += 1
+            total['rounded'] += 1 if entry['rounded'] else 0
+
+        now = timezone.now()
+        missing = []
+        for (teacher_id, task_id, year, month), total in totals.items():
+            key = {'teacher_id': teacher_id, 'task_id': task_id, 'year': year, 'month': month}
+            updated = cls.objects.filter(**key).update(
+                seconds=F('seconds') + total['seconds'],
+                amount_cents=F('amount_cents') + total['amount_cents'],
+                session_count=F('session_count') + total['session_count'],
+                rounded_session_count=F('rounded_session_count') + total['rounded'],
+                updated_at=now,
+            )
+            if not updated:
+                missing.append(cls(
+                    seconds=total['seconds'],
+                    amount_cents=total['amount_cents'],
+                    session_count=total['session_count'],
+                    rounded_session_count=total['rounded'],
+                    **key
+                ))
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(missing)
+        except IntegrityError:
+            # Another writer created some of these months first
+            for row in missing:
+                cls.create_or_add(row)
+
+
 # Student model using current AUTH_USER_MODEL (profile)
 class Student(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -192,12 +595,12 @@ class Inspector(models.Model):
             self.user.save()
 
     def view_teachers(self):
-        """View all teachers"""
-        return Teacher.objects.all()
+        """View all teachers, read from the replica when there is one"""
+        return Teacher.objects.using(read_database()).all()
 
     def view_students(self):
-        """View all students"""
-        return Student.objects.all()
+        """View all students, read from the replica when there is one"""
+        return Student.objects.using(read_database()).all()
 
 
 # SuperUser Model (Extends Inspector with full privileges)
@@ -278,61 +681,135 @@ class SalaryReport(models.Model):
     total_hours = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True)
     notes = models.TextField(blank=True)
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    # Frozen copy of the calculated report so viewing it never recomputes
+    snapshot = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    snapshot_at = models.DateTimeField(null=True, blank=True)
+    is_stale = models.BooleanField(default=False)  # Sessions changed since the snapshot
+
+    class Meta:
+        indexes = [
+            # A teacher's reports by period, with or without the deleted ones
+            models.Index(fields=['teacher', 'start_date', 'end_date', 'is_deleted'], name='salaryreport_teacher_period'),
+            # Live reports of every teacher, newest period first
+            models.Index(
+                fields=['-start_date'],
+                condition=models.Q(is_deleted=False),
+                name='salaryreport_live_start'
+            ),
+        ]
 
     def __str__(self):
         return f"Salary Report - {self.teacher} ({self.start_date.strftime('%B %Y')})"
 
+    @classmethod
+    def mark_stale(cls, teacher_id, year, month):
+        """Flag the teacher's reports for a month as out of date"""
+        month_start, next_month = cls.month_period(year, month)
+        cls.objects.filter(
+            teacher_id=teacher_id,
+            start_date__gte=month_start,
+            start_date__lt=next_month,
+            snapshot__isnull=False,
+            is_stale=False
+        ).update(is_stale=True, updated_at=timezone.now())
+
+    def snapshot_data(self):
+        """Return the snapshot in the shape of SalaryCalculationService.calculate_salary"""
+        if self.snapshot is None:
+            return None
+        data = dict(self.snapshot)
+        data['total_salary'] = Decimal(data['total_salary'])
+        data['total_hours'] = Decimal(data['total_hours'])
+        data['task_summaries'] = [
+            dict(task, rate=Decimal(task['rate']), total=Decimal(task['total']))
+            for task in data['task_summaries']
+        ]
+        data['session_details'] = [
+            dict(
+                session,
+                date=date.fromisoformat(session['date']),
+                rate=Decimal(session['rate']),
+                total=Decimal(session['total'])
+            )
+            for session in data['session_details']
+        ]
+        return data
+
     @classmethod
     def create_for_month(cls, teacher, year, month, created_by, notes=""):
         """Create a salary report for a specific month with historical data"""
-        start_date = timezone.make_aware(datetime(year, month, 1))
-        end_date = timezone.make_aware(datetime(year, month + 1, 1)) if month < 12 else \
-                   timezone.make_aware(datetime(year + 1, 1, 1))
-
-        # Get all work sessions for this month
-        work_sessions = WorkSession.objects.filter(
-            teacher=teacher,
-            created_at__gte=start_date,
-            created_at__lt=end_date,
-            is_deleted=False
-        )
-
-        # Calculate total hours and amount using stored values
-        total_hours = Decimal(0)
-        total_amount = Decimal(0)
-        
-        for session in work_sessions:
-            if session.stored_hours and session.hourly_rate:
-                total_hours += session.stored_hours
-                total_amount += session.stored_hours * session.hourly_rate
+        start_date, end_date = cls.month_period(year, month)
 
         # Create the report with historical data
-        report = cls.objects.create(
+        report = cls(
             teacher=teacher,
             start_date=start_date,
             end_date=end_date,
-            total_hours=total_hours,
-            total_amount=total_amount,
             created_by=created_by,
             notes=notes
         )
+        report.refresh_snapshot()
         return report
 
+    @staticmethod
+    def month_period(year, month):
+        """Return the aware (start, end) datetimes of a month, end exclusive"""
+        start_date = timezone.make_aware(datetime(year, month, 1))
+        end_date = timezone.make_aware(datetime(year, month + 1, 1)) if month < 12 else \
+                   timezone.make_aware(datetime(year + 1, 1, 1))
+        return start_date, end_date
+
+    @staticmethod
+    def compute_snapshot(teacher, year, month):
+        """Return (total_hours, total_amount, snapshot, report_data) for a teacher's month"""
+        from .services import SalaryCalculationService
+
+        # Read the month's totals from the ledger instead of every session
+        totals = TeacherMonthSummary.objects.filter(
+            teacher=teacher,
+            year=year,
+            month=month
+        ).aggregate(seconds=Sum('seconds'), amount_cents=Sum('amount_cents'))
+
+        report_data = dict(SalaryCalculationService.calculate_salary_cached(teacher, year, month))
+        report_data['total_hours'] = sum(
+            (Decimal(str(task['hours'])) for task in report_data['task_summaries']), Decimal(0)
+        )
+        # Store the JSON form so the in-memory value matches what is saved
+        snapshot = json.loads(json.dumps(report_data, cls=DjangoJSONEncoder))
+        return (
+            seconds_to_hours(totals['seconds']),
+            cents_to_amount(totals['amount_cents']),
+            snapshot,
+            report_data,
+        )
+
+    def refresh_snapshot(self):
+        """Recompute the totals and the frozen report data, then save the report"""
+        start = timezone.localtime(self.start_date) if timezone.is_aware(self.start_date) else self.start_date
+        self.total_hours, self.total_amount, self.snapshot, report_data = self.compute_snapshot(
+            self.teacher, start.year, start.month
+        )
+        self.snapshot_at = timezone.now()
+        self.is_stale = False
+        self.save()
+        return report_data
+
     def delete(self, *args, **kwargs):
         """Soft delete the report"""
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save(update_fields=['is_deleted', 'deleted_at'])
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
 
     def get_work_sessions(self):
         """Get all work sessions for this report"""
         return WorkSession.objects.filter(
             teacher=self.teacher,
             created_at__gte=self.start_date,
-            created_at__lt=self.end_date,
-            is_deleted=False
+            created_at__lt=self.end_date
         )
\ No newline at end of file
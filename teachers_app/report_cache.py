@@ -0,0 +1,86 @@
+"""
+Versioned cache for computed salary reports.
+
+Entries are keyed by (teacher_id, year, month, version). The version is a
+counter stored in the same cache and bumped whenever a WorkSession or Task
+that feeds the month changes, so stale entries are never read again. The
+bump waits for the writing transaction to commit: bumping earlier would let
+a concurrent reader compute from the old rows and store that under the new
+version. Works with any Django cache backend: locmem for a single process,
+or a file/database cache shared by several workers. Size is bounded by the
+backend itself, through the cache's MAX_ENTRIES and TIMEOUT.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class SalaryReportCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'SALARY_REPORT_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def version_key(teacher_id, year, month):
+        return f"salary-report-version:{teacher_id}:{year}:{month}"
+
+    def get_version(self, teacher_id, year, month):
+        key = self.version_key(teacher_id, year, month)
+        # Seed with the clock so a lost or culled counter never reuses an old version
+        self.cache.add(key, time.time_ns(), timeout=None)
+        return self.cache.get(key)
+
+    def bump_version(self, teacher_id, year, month):
+        """Invalidate every cached report for a teacher's month once the current transaction commits"""
+        transaction.on_commit(lambda: self._bump(teacher_id, year, month))
+
+    def _bump(self, teacher_id, year, month):
+        key = self.version_key(teacher_id, year, month)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, time.time_ns(), timeout=None)
+
+    def get_or_compute(self, teacher_id, year, month, compute):
+        """Return the cached report for the month, calling compute() on a miss"""
+        version = self.get_version(teacher_id, year, month)
+        key = f"salary-report:{teacher_id}:{year}:{month}:{version}"
+        missing = object()
+        data = self.cache.get(key, missing)
+        with self._lock:
+            if data is not missing:
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = compute()
+        # The cache's own TIMEOUT and MAX_ENTRIES age entries out
+        self.cache.set(key, data)
+        return data
+
+    def stats(self):
+        """Hit and miss counts of this process"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Empty the salary report cache and reset the counters"""
+        with self._lock:
+            self.hits = self.misses = 0
+        self.cache.clear()
+
+
+salary_report_cache = SalaryReportCache()
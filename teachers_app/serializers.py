@@ -0,0 +1,119 @@
+"""
+JSON shapes of the API resources.
+
+Each serializer maps the JSON field names to values() lookups. Rows come
+straight from values_list() as tuples, never as model instances, and only
+the relations the requested fields span are joined: ?fields=id,hours reads
+one table, adding task_name joins the task.
+"""
+from .models import SalaryReport, Task, Teacher, WorkSession
+
+
+class Serializer:
+    model = None
+    fields = {}  # JSON name -> values() lookup
+    default_fields = None  # Returned without ?fields=; every field when None
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Return the field names a ?fields= value asks for, or raise ValueError naming unknown ones"""
+        if not value:
+            return list(cls.default_fields or cls.fields)
+        names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in names if name not in cls.fields]
+        if unknown or not names:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}" if unknown else 'No fields given')
+        return names
+
+    @classmethod
+    def rows(cls, queryset, names):
+        """Dicts of the named fields for every row of queryset"""
+        lookups = [cls.fields[name] for name in names]
+        return [dict(zip(names, row)) for row in queryset.values_list(*lookups)]
+
+    @classmethod
+    def page(cls, queryset, names, after=None, limit=100):
+        """
+        Return (rows, next_cursor) for up to `limit` rows with a primary key
+        above `after`, in primary key order. The cursor is the last row's
+        key, so every page is one range read on the primary key however
+        deep the client pages.
+        """
+        queryset = queryset.order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        lookups = ['pk'] + [cls.fields[name] for name in names]
+        rows = list(queryset.values_list(*lookups)[:limit + 1])
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [dict(zip(names, row[1:])) for row in rows[:limit]], next_cursor
+
+
+class WorkSessionSerializer(Serializer):
+    model = WorkSession
+    fields = {
+        'id': 'id',
+        'teacher': 'teacher_id',
+        'teacher_username': 'teacher__user__username',
+        'task': 'task_id',
+        'task_name': 'task__name',
+        'entry_type': 'entry_type',
+        'manual_hours': 'manual_hours',
+        'clock_in': 'clock_in',
+        'clock_out': 'clock_out',
+        'start_time': 'start_time',
+        'end_time': 'end_time',
+        'hours': 'stored_hours',
+        'hourly_rate': 'hourly_rate',
+        'total_amount': 'total_amount',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    default_fields = [name for name in fields if name not in ('teacher_username', 'task_name')]
+
+
+class TaskSerializer(Serializer):
+    model = Task
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'hourly_rate': 'hourly_rate',
+        'price': 'price',
+        'is_active': 'is_active',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+
+class TeacherSerializer(Serializer):
+    model = Teacher
+    fields = {
+        'id': 'id',
+        'username': 'user__username',
+        'first_name': 'user__first_name',
+        'last_name': 'user__last_name',
+        'email': 'user__email',
+        'subjects': 'subjects',
+        'is_active': 'user__is_active',
+    }
+
+
+class SalaryReportSerializer(Serializer):
+    model = SalaryReport
+    fields = {
+        'id': 'id',
+        'teacher': 'teacher_id',
+        'teacher_username': 'teacher__user__username',
+        'start_date': 'start_date',
+        'end_date': 'end_date',
+        'total_hours': 'total_hours',
+        'total_amount': 'total_amount',
+        'notes': 'notes',
+        'is_stale': 'is_stale',
+        'snapshot_at': 'snapshot_at',
+        'snapshot': 'snapshot',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    # The snapshot holds every session of the month; ask for it by name
+    default_fields = [name for name in fields if name not in ('teacher_username', 'snapshot')]
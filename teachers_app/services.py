@@ -1,89 +1,843 @@
-from decimal import Decimal, ROUND_HALF_UP
+import csv
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import reduce
+import operator
 import django.utils.timezone as timezone
-from .models import Teacher, Task, WorkSession
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import connections, transaction
+from django.db.models import Count, DateField, F, Func, IntegerField, Q, Subquery, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncMonth
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import (
+    Teacher, Task, WorkSession, TeacherMonthSummary, SalaryReport, KioskEvent, KioskToken,
+    seconds_to_hours, cents_to_amount, salary_month_changed
+)
+from .report_cache import salary_report_cache
+
+
+# Entry types whose hours are rounded to the nearest whole hour
+ROUNDED_ENTRY_TYPES = ['clock', 'time_range']
 
 
 class SalaryCalculationService:
     @staticmethod
-    def calculate_salary(teacher, year, month):
-        """Calculate salary details for a teacher in a specific month"""
-        # Calculate start and end dates for the month with timezone awareness
+    def month_bounds(year, month):
+        """Return the (start, end) datetimes covering a month, end inclusive"""
         start_date = timezone.make_aware(timezone.datetime(year, month, 1))
         if month == 12:
             end_date = timezone.make_aware(timezone.datetime(year + 1, 1, 1))
         else:
             end_date = timezone.make_aware(timezone.datetime(year, month + 1, 1))
         end_date = end_date - timezone.timedelta(microseconds=1)
+        return start_date, end_date
+
+    @staticmethod
+    def round_task_hours(total_hours, rounded_sessions):
+        """Round a task's total to the nearest hour if it has clock/time_range entries"""
+        if total_hours is None:
+            total_hours = Decimal('0.00')
+        if rounded_sessions:
+            return total_hours.quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+        return total_hours
+
+    @staticmethod
+    def session_notes(session):
+        """Build the same text as WorkSession.__str__ from a values() row"""
+        username = session['teacher__user__username']
+        subjects = session['teacher__subjects']
+        teacher = f"{username} - {subjects}" if subjects else username
+        task = f"{session['task__name']} (${session['task__hourly_rate']}/hour)"
+        if session['entry_type'] == 'manual':
+            return f"{teacher} - {task} - {session['manual_hours']} hours"
+        elif session['entry_type'] == 'time_range':
+            return f"{teacher} - {task} - {session['start_time']} to {session['end_time']}"
+        return f"{teacher} - {task} - {session['clock_in']} to {session['clock_out']}"
+
+    @staticmethod
+    def session_time(session):
+        """Format the clock or time range of a values() row as HH:MM - HH:MM"""
+        if session['entry_type'] == 'clock' and session['clock_in'] and session['clock_out']:
+            return f"{session['clock_in'].strftime('%H:%M')} - {session['clock_out'].strftime('%H:%M')}"
+        if session['entry_type'] == 'time_range' and session['start_time'] and session['end_time']:
+            return f"{session['start_time'].strftime('%H:%M')} - {session['end_time'].strftime('%H:%M')}"
+        return ''
+
+    @staticmethod
+    def calculate_salary(teacher, year, month):
+        """
+        Calculate salary details for a teacher in a specific month.
+
+        Runs exactly two queries regardless of the number of sessions: one
+        read of the TeacherMonthSummary ledger rows for the task summaries and
+        one joined values() query for the session details.
+        """
+        start_date, end_date = SalaryCalculationService.month_bounds(year, month)
 
         # Get work sessions for the period
         work_sessions = WorkSession.objects.filter(
             teacher=teacher,
             created_at__range=(start_date, end_date)
-        ).order_by('created_at')
+        )
+
+        # Per-task totals come from the ledger, one row per task
+        task_rows = TeacherMonthSummary.objects.filter(
+            teacher=teacher,
+            year=year,
+            month=month
+        ).values(
+            'task_id', 'task__name', 'task__hourly_rate', 'seconds', 'rounded_session_count'
+        ).order_by('task_id')
 
         task_summaries = []
-        session_details = []
         total = Decimal('0.00')
-
-        # Group work sessions by task
-        for task in Task.objects.filter(worksession__in=work_sessions).distinct():
-            task_sessions = work_sessions.filter(task=task)
-            total_hours = Decimal('0.00')
-
-            for session in task_sessions:
-                hours = session.calculated_hours()
-                
-                print(f"Session ID: {getattr(session, 'id', 'N/A')}, entry_type: {getattr(session, 'entry_type', 'N/A')}, calculated_hours: {hours}")
-                if hours is not None:
-                    try:
-                        # Round hours to nearest hour for clock and time_range entries
-                        if session.entry_type in ['clock', 'time_range']:
-                            hours_decimal = Decimal(str(hours)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
-                        else:
-                            hours_decimal = Decimal(str(hours))
-                    except Exception as e:
-                        print(f"Invalid value for hours: {hours} (Session ID: {getattr(session, 'id', 'N/A')}) - Error: {e}")
-                        continue  # Skip this session if conversion fails
-
-                    total_hours += hours_decimal
-                    session_total = hours_decimal * (session.hourly_rate if session.hourly_rate is not None else task.hourly_rate)
-
-                    session_details.append({
-                        'date': session.created_at.date(),
-                        'time': (
-                            f"{session.clock_in.strftime('%H:%M')} - {session.clock_out.strftime('%H:%M')}"
-                            if session.entry_type == 'clock' and session.clock_in and session.clock_out
-                            else (
-                                f"{session.start_time.strftime('%H:%M')} - {session.end_time.strftime('%H:%M')}"
-                                if session.entry_type == 'time_range' and session.start_time and session.end_time
-                                else ''
-                            )
-                        ),
-                        'task_name': task.name,
-                        'hours': float(hours_decimal),
-                        'rate': session.hourly_rate if session.hourly_rate is not None else task.hourly_rate,
-                        'total': session_total,
-                        'entry_type': session.entry_type,
-                        'notes': f"{session}"
-                    })
-
-            # Round total_hours to nearest hour for clock/time_range entries
-            rounded_hours = total_hours
-            if any(s.entry_type in ['clock', 'time_range'] for s in task_sessions):
-                rounded_hours = total_hours.quantize(Decimal('1'), rounding=ROUND_HALF_UP)
-            task_total = task.hourly_rate * rounded_hours
+        for row in task_rows:
+            rounded_hours = SalaryCalculationService.round_task_hours(
+                seconds_to_hours(row['seconds']), row['rounded_session_count']
+            )
+            task_total = row['task__hourly_rate'] * rounded_hours
             total += task_total
 
             task_summaries.append({
-                'task_name': task.name,
+                'task_name': row['task__name'],
                 'hours': float(rounded_hours),
-                'rate': task.hourly_rate,
+                'rate': row['task__hourly_rate'],
                 'total': task_total
             })
 
+        session_rows = work_sessions.filter(
+            duration_seconds__isnull=False
+        ).values(
+            'created_at', 'entry_type', 'duration_seconds', 'hourly_rate', 'manual_hours',
+            'clock_in', 'clock_out', 'start_time', 'end_time',
+            'task__name', 'task__hourly_rate',
+            'teacher__user__username', 'teacher__subjects',
+        ).order_by('task_id', 'created_at')
+
+        session_details = []
+        for session in session_rows:
+            hours_decimal = seconds_to_hours(session['duration_seconds'])
+            rate = session['hourly_rate'] if session['hourly_rate'] is not None else session['task__hourly_rate']
+            session_details.append({
+                'date': session['created_at'].date(),
+                'time': SalaryCalculationService.session_time(session),
+                'task_name': session['task__name'],
+                'hours': float(hours_decimal),
+                'rate': rate,
+                'total': hours_decimal * rate,
+                'entry_type': session['entry_type'],
+                'notes': SalaryCalculationService.session_notes(session)
+            })
+
         return {
             'task_summaries': task_summaries,
             'session_details': sorted(session_details, key=lambda x: x['date']),
             'total_salary': total,
             'period': f"{start_date.strftime('%B %Y')}"
         }
+
+    @staticmethod
+    def calculate_salary_cached(teacher, year, month):
+        """calculate_salary through the versioned salary report cache"""
+        teacher_id = teacher.pk if isinstance(teacher, Teacher) else teacher
+        return salary_report_cache.get_or_compute(
+            teacher_id, year, month,
+            lambda: SalaryCalculationService.calculate_salary(teacher, year, month)
+        )
+
+    @staticmethod
+    def calculate_salaries_bulk(pairs):
+        """
+        Calculate salary totals for many (teacher, year, month) tuples at once.
+
+        `teacher` may be a Teacher instance or a teacher id. All totals come
+        from a single read of the TeacherMonthSummary ledger, so the query
+        count does not depend on the number of pairs. Returns a dict keyed by
+        (teacher_id, year, month) with 'total_hours' and 'total_salary', using
+        the same rounding as calculate_salary.
+        """
+        keys = set()
+        for teacher, year, month in pairs:
+            teacher_id = teacher.pk if isinstance(teacher, Teacher) else teacher
+            keys.add((teacher_id, year, month))
+
+        results = {
+            key: {'total_hours': Decimal('0.00'), 'total_salary': Decimal('0.00')}
+            for key in keys
+        }
+        if not keys:
+            return results
+
+        rows = TeacherMonthSummary.objects.filter(
+            teacher_id__in={teacher_id for teacher_id, _, _ in keys},
+            year__in={year for _, year, _ in keys},
+            month__in={month for _, _, month in keys}
+        ).values(
+            'teacher_id', 'year', 'month', 'seconds', 'rounded_session_count', 'task__hourly_rate'
+        )
+
+        for row in rows:
+            key = (row['teacher_id'], row['year'], row['month'])
+            if key not in results:
+                # Same teacher, but a month nobody asked for
+                continue
+            rounded_hours = SalaryCalculationService.round_task_hours(
+                seconds_to_hours(row['seconds']), row['rounded_session_count']
+            )
+            results[key]['total_hours'] += rounded_hours
+            results[key]['total_salary'] += row['task__hourly_rate'] * rounded_hours
+
+        return results
+
+
+class TeacherMonthSummaryService:
+    """
+    Maintains the TeacherMonthSummary ledger for writes that bypass
+    WorkSession.save()/delete(), such as queryset updates and deletes.
+    """
+
+    @staticmethod
+    def aggregate_sessions(work_sessions):
+        """
+        Group live sessions into ledger rows keyed by teacher, task, year and
+        month. PostgreSQL groups on a single date_trunc('month') key, truncated
+        to a date so year and month read off it without a second time zone
+        shift; other backends group on the extracted parts.
+        """
+        work_sessions = work_sessions.filter(
+            is_deleted=False,
+            duration_seconds__isnull=False
+        )
+        totals = {
+            'seconds': Sum('duration_seconds'),
+            'amount_cents': Sum('amount_cents'),
+            'session_count': Count('id'),
+            'rounded_session_count': Count('id', filter=Q(entry_type__in=ROUNDED_ENTRY_TYPES)),
+        }
+        if connections[work_sessions.db].vendor == 'postgresql':
+            return work_sessions.annotate(
+                period=TruncMonth('created_at', output_field=DateField()),
+            ).values(
+                'teacher_id', 'task_id', 'period'
+            ).annotate(
+                **totals,
+                year=ExtractYear('period'),
+                month=ExtractMonth('period'),
+            ).order_by()
+        return work_sessions.annotate(
+            year=ExtractYear('created_at'),
+            month=ExtractMonth('created_at'),
+        ).values(
+            'teacher_id', 'task_id', 'year', 'month'
+        ).annotate(**totals).order_by()
+
+    @staticmethod
+    def session_buckets(work_sessions):
+        """Return the set of (teacher_id, task_id, year, month) keys the sessions fall in"""
+        return set(work_sessions.annotate(
+            year=ExtractYear('created_at'),
+            month=ExtractMonth('created_at'),
+        ).values_list('teacher_id', 'task_id', 'year', 'month').distinct().order_by())
+
+    @staticmethod
+    def build_rows(aggregated):
+        return [
+            TeacherMonthSummary(
+                teacher_id=row['teacher_id'],
+                task_id=row['task_id'],
+                year=row['year'],
+                month=row['month'],
+                seconds=row['seconds'] or 0,
+                amount_cents=row['amount_cents'] or 0,
+                session_count=row['session_count'],
+                rounded_session_count=row['rounded_session_count'],
+            )
+            for row in aggregated
+        ]
+
+    @staticmethod
+    def rebuild_buckets(buckets):
+        """Recompute the given (teacher_id, task_id, year, month) ledger rows from the sessions"""
+        if not buckets:
+            return 0
+        bucket_filter = reduce(operator.or_, (
+            Q(teacher_id=teacher_id, task_id=task_id, year=year, month=month)
+            for teacher_id, task_id, year, month in buckets
+        ))
+        aggregated = TeacherMonthSummaryService.aggregate_sessions(
+            WorkSession.objects.filter(
+                teacher_id__in={key[0] for key in buckets},
+                task_id__in={key[1] for key in buckets},
+            )
+        ).filter(
+            year__in={key[2] for key in buckets},
+            month__in={key[3] for key in buckets},
+        )
+        rows = [
+            row for row in TeacherMonthSummaryService.build_rows(aggregated)
+            if (row.teacher_id, row.task_id, row.year, row.month) in buckets
+        ]
+        with transaction.atomic():
+            TeacherMonthSummary.objects.filter(bucket_filter).delete()
+            TeacherMonthSummary.objects.bulk_create(rows)
+            for teacher_id, year, month in {(key[0], key[2], key[3]) for key in buckets}:
+                SalaryReport.mark_stale(teacher_id, year, month)
+                salary_report_cache.bump_version(teacher_id, year, month)
+        return len(rows)
+
+    @staticmethod
+    def update_sessions(work_sessions, **values):
+        """Run work_sessions.update(**values) and resync the affected ledger rows"""
+        with transaction.atomic():
+            ids = list(work_sessions.values_list('pk', flat=True))
+            # Updates may soft-delete or restore rows, so look past the live manager
+            sessions = WorkSession.all_objects.filter(pk__in=ids)
+            buckets = TeacherMonthSummaryService.session_buckets(sessions)
+            values.setdefault('updated_at', timezone.now())
+            updated = sessions.update(**values)
+            buckets |= TeacherMonthSummaryService.session_buckets(sessions)
+            TeacherMonthSummaryService.rebuild_buckets(buckets)
+        return updated
+
+    @staticmethod
+    def delete_sessions(work_sessions):
+        """Hard-delete work_sessions and resync the affected ledger rows"""
+        with transaction.atomic():
+            buckets = TeacherMonthSummaryService.session_buckets(work_sessions)
+            deleted, _ = work_sessions.delete()
+            TeacherMonthSummaryService.rebuild_buckets(buckets)
+        return deleted
+
+    @staticmethod
+    def rebuild(teacher=None, year=None, month=None):
+        """
+        Drop and recompute ledger rows, optionally limited to a teacher and/or
+        month. Months whose totals change get their reports marked stale and
+        their cached salaries invalidated, as rebuild_buckets() does.
+        """
+        summaries = TeacherMonthSummary.objects.all()
+        # Filter the sessions before grouping so a year becomes a created_at range
+        sessions = WorkSession.objects.all()
+        if teacher is not None:
+            summaries = summaries.filter(teacher=teacher)
+            sessions = sessions.filter(teacher=teacher)
+        if year is not None:
+            summaries = summaries.filter(year=year)
+            sessions = sessions.filter(created_at__year=year)
+        if month is not None:
+            summaries = summaries.filter(month=month)
+            sessions = sessions.filter(created_at__month=month)
+
+        aggregated = TeacherMonthSummaryService.aggregate_sessions(sessions)
+        rows = TeacherMonthSummaryService.build_rows(aggregated)
+        fields = ('seconds', 'amount_cents', 'session_count', 'rounded_session_count')
+        after = {
+            (row.teacher_id, row.task_id, row.year, row.month): tuple(getattr(row, field) for field in fields)
+            for row in rows
+        }
+        with transaction.atomic():
+            before = {
+                values[:4]: values[4:]
+                for values in summaries.values_list('teacher_id', 'task_id', 'year', 'month', *fields)
+            }
+            summaries.delete()
+            TeacherMonthSummary.objects.bulk_create(rows, batch_size=500)
+            changed = {
+                (key[0], key[2], key[3]) for key in before.keys() | after.keys() if before.get(key) != after.get(key)
+            }
+            for teacher_id, changed_year, changed_month in changed:
+                salary_month_changed({'teacher_id': teacher_id, 'year': changed_year, 'month': changed_month})
+        return len(rows)
+
+
+class Echo:
+    """File-like object whose write() hands the value back, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+class PayrollExportService:
+    """
+    Streams payroll rows for every teacher over a month range, either one
+    row per teacher/task/month or one row per work session. Rows are read
+    with .iterator(chunk_size=...) so memory stays flat on large tables.
+    """
+    TASK_HEADER = ['teacher', 'month', 'task', 'sessions', 'hours', 'rate', 'total']
+    SESSION_HEADER = [
+        'session_id', 'teacher', 'date', 'task', 'entry_type', 'hours', 'rate', 'total'
+    ]
+    CHUNK_SIZE = 2000
+
+    @staticmethod
+    def task_rows(start_year, start_month, end_year, end_month):
+        """One row per teacher/task/month, using calculate_salary's per-task rounding"""
+        summaries = TeacherMonthSummary.objects.annotate(
+            period=F('year') * 100 + F('month')
+        ).filter(
+            period__gte=start_year * 100 + start_month,
+            period__lte=end_year * 100 + end_month
+        ).values(
+            'teacher__user__username', 'year', 'month', 'task__name', 'task__hourly_rate',
+            'session_count', 'seconds', 'rounded_session_count'
+        ).order_by('teacher__user__username', 'year', 'month', 'task_id')
+
+        for row in summaries.iterator(chunk_size=PayrollExportService.CHUNK_SIZE):
+            hours = SalaryCalculationService.round_task_hours(
+                seconds_to_hours(row['seconds']), row['rounded_session_count']
+            )
+            yield [
+                row['teacher__user__username'],
+                f"{row['year']}-{row['month']:02d}",
+                row['task__name'],
+                row['session_count'],
+                hours,
+                row['task__hourly_rate'],
+                (row['task__hourly_rate'] * hours).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            ]
+
+    @staticmethod
+    def session_rows(start_year, start_month, end_year, end_month):
+        """One row per live session, priced at its stored rate with the task rate as fallback"""
+        start_date, _ = SalaryCalculationService.month_bounds(start_year, start_month)
+        _, end_date = SalaryCalculationService.month_bounds(end_year, end_month)
+        sessions = WorkSession.objects.filter(
+            created_at__range=(start_date, end_date),
+            duration_seconds__isnull=False
+        ).values(
+            'id', 'teacher__user__username', 'created_at', 'task__name', 'entry_type',
+            'duration_seconds', 'hourly_rate', 'task__hourly_rate'
+        ).order_by('teacher_id', 'created_at', 'id')
+
+        for row in sessions.iterator(chunk_size=PayrollExportService.CHUNK_SIZE):
+            rate = row['hourly_rate'] if row['hourly_rate'] is not None else row['task__hourly_rate']
+            hours = seconds_to_hours(row['duration_seconds'])
+            yield [
+                row['id'],
+                row['teacher__user__username'],
+                timezone.localtime(row['created_at']).date().isoformat(),
+                row['task__name'],
+                row['entry_type'],
+                hours,
+                rate,
+                (hours * rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            ]
+
+    @staticmethod
+    def rows(detail, start_year, start_month, end_year, end_month):
+        """Header followed by the data rows for detail='task' or detail='session'"""
+        if detail == 'session':
+            yield PayrollExportService.SESSION_HEADER
+            yield from PayrollExportService.session_rows(start_year, start_month, end_year, end_month)
+        else:
+            yield PayrollExportService.TASK_HEADER
+            yield from PayrollExportService.task_rows(start_year, start_month, end_year, end_month)
+
+    @staticmethod
+    def csv_lines(rows):
+        """Encode rows as CSV text one line at a time"""
+        writer = csv.writer(Echo())
+        for row in rows:
+            yield writer.writerow(row)
+
+
+class WorkSessionListService:
+    """
+    Keyset pagination over live work sessions, newest first. A page is
+    addressed by the (created_at, id) of its edge row instead of an OFFSET,
+    so every page is one short index range read however deep it is.
+    """
+    PAGE_SIZE = 50
+    EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+    @staticmethod
+    def filter_sessions(teacher=None, task=None, entry_type=None, start_date=None, end_date=None):
+        """Live sessions matching the WorkSessionFilterForm fields; dates are inclusive local days"""
+        sessions = WorkSession.objects.all()
+        if teacher:
+            sessions = sessions.filter(teacher=teacher)
+        if task:
+            sessions = sessions.filter(task=task)
+        if entry_type:
+            sessions = sessions.filter(entry_type=entry_type)
+        if start_date:
+            sessions = sessions.filter(created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min)))
+        if end_date:
+            next_day = datetime.combine(end_date + timedelta(days=1), time.min)
+            sessions = sessions.filter(created_at__lt=timezone.make_aware(next_day))
+        return sessions
+
+    @staticmethod
+    def encode_cursor(session):
+        microseconds = (session.created_at - WorkSessionListService.EPOCH) // timedelta(microseconds=1)
+        return f"{microseconds}-{session.pk}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Return (created_at, id) for a cursor, or None if it is missing or malformed"""
+        try:
+            microseconds, pk = (int(part) for part in cursor.split('-'))
+            return WorkSessionListService.EPOCH + timedelta(microseconds=microseconds), pk
+        except (AttributeError, ValueError, OverflowError):
+            return None
+
+    @staticmethod
+    def page(sessions, after=None, before=None, size=None):
+        """
+        Return (rows, newer_cursor, older_cursor) for the page of sessions
+        just older than the `after` cursor, just newer than the `before`
+        cursor, or the newest page when neither is given.
+        """
+        size = size or WorkSessionListService.PAGE_SIZE
+        sessions = sessions.select_related('task', 'teacher__user')
+        if before:
+            created_at, pk = before
+            # The created_at bound alone lets the database use the index range
+            rows = list(sessions.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk),
+                created_at__gte=created_at
+            ).order_by('created_at', 'id')[:size + 1])
+            has_newer, has_older = len(rows) > size, True
+            rows = rows[:size][::-1]
+        else:
+            if after:
+                created_at, pk = after
+                sessions = sessions.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk),
+                    created_at__lte=created_at
+                )
+            rows = list(sessions.order_by('-created_at', '-id')[:size + 1])
+            has_newer, has_older = after is not None, len(rows) > size
+            rows = rows[:size]
+
+        newer = WorkSessionListService.encode_cursor(rows[0]) if rows and has_newer else None
+        older = WorkSessionListService.encode_cursor(rows[-1]) if rows and has_older else None
+        return rows, newer, older
+
+    @staticmethod
+    def totals(sessions):
+        """Session count, hours and amount of every matching session, in one aggregate query"""
+        totals = sessions.aggregate(
+            count=Count('id'),
+            seconds=Sum('duration_seconds'),
+            amount_cents=Sum('amount_cents')
+        )
+        return {
+            'count': totals['count'],
+            'hours': seconds_to_hours(totals['seconds']),
+            'amount': cents_to_amount(totals['amount_cents']),
+        }
+
+
+class WorkSessionImportService:
+    """
+    Imports work sessions from CSV rows (dicts, as csv.DictReader yields
+    them). Teachers and tasks are resolved through lookup maps built with one
+    query each and every batch goes through WorkSession.objects.create_many,
+    one transaction per batch. Invalid rows are
+    collected with their errors instead of aborting the import.
+
+    Columns: teacher (username or id), task (name or id), entry_type,
+    manual_hours, clock_in, clock_out, start_time, end_time and an optional
+    date. Sessions are dated by `date`, else by their clock-in or start time.
+    """
+    REQUIRED_COLUMNS = ['teacher', 'task', 'entry_type']
+    COLUMNS = REQUIRED_COLUMNS + ['manual_hours', 'clock_in', 'clock_out', 'start_time', 'end_time', 'date']
+    DATETIME_COLUMNS = ['clock_in', 'clock_out', 'start_time', 'end_time', 'date']
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def missing_columns(fieldnames):
+        return [column for column in WorkSessionImportService.REQUIRED_COLUMNS if column not in (fieldnames or [])]
+
+    @staticmethod
+    def lookup_maps():
+        """Return ({username or id: teacher_id}, {name or id: Task})"""
+        teachers = {}
+        for teacher_id, username in Teacher.objects.values_list('id', 'user__username'):
+            teachers[username] = teacher_id
+            teachers[str(teacher_id)] = teacher_id
+        tasks = {}
+        for task in Task.objects.only('id', 'name', 'hourly_rate'):
+            tasks[task.name] = task
+            tasks[str(task.id)] = task
+        return teachers, tasks
+
+    @staticmethod
+    def parse_timestamp(value):
+        """Parse an ISO date or datetime, reading naive values in the current time zone"""
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(value)
+            parsed = datetime.combine(day, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    @staticmethod
+    def build_session(row, teachers, tasks):
+        """Return an unsaved WorkSession with derived fields for a row, or raise ValidationError"""
+        def value(column):
+            return (row.get(column) or '').strip()
+
+        errors = {}
+        teacher_id = teachers.get(value('teacher'))
+        if teacher_id is None:
+            errors['teacher'] = f"Unknown teacher '{value('teacher')}'"
+        task = tasks.get(value('task'))
+        if task is None:
+            errors['task'] = f"Unknown task '{value('task')}'"
+        if value('entry_type') not in dict(WorkSession.ENTRY_TYPE_CHOICES):
+            errors['entry_type'] = f"Unknown entry type '{value('entry_type')}'"
+
+        parsed = {}
+        for column in WorkSessionImportService.DATETIME_COLUMNS:
+            if value(column):
+                try:
+                    parsed[column] = WorkSessionImportService.parse_timestamp(value(column))
+                except ValueError:
+                    errors[column] = f"Invalid date/time '{value(column)}'"
+        manual_hours = None
+        if value('manual_hours'):
+            try:
+                manual_hours = Decimal(value('manual_hours'))
+            except InvalidOperation:
+                errors['manual_hours'] = f"Invalid number '{value('manual_hours')}'"
+        if errors:
+            raise ValidationError(errors)
+
+        session = WorkSession(
+            teacher_id=teacher_id,
+            task=task,
+            entry_type=value('entry_type'),
+            hourly_rate=task.hourly_rate,
+            manual_hours=manual_hours,
+            clock_in=parsed.get('clock_in'),
+            clock_out=parsed.get('clock_out'),
+            start_time=parsed.get('start_time'),
+            end_time=parsed.get('end_time'),
+        )
+        session.clean()
+        session.compute_derived_fields()
+        session.clean_fields(exclude=['teacher', 'task'])
+        session.created_at = parsed.get('date') or session.clock_in or session.start_time or timezone.now()
+        return session
+
+    @staticmethod
+    def error_text(error):
+        if not hasattr(error, 'error_dict'):
+            return '; '.join(error.messages)
+        return '; '.join(
+            ' '.join(messages) if field == NON_FIELD_ERRORS else f"{field}: {' '.join(messages)}"
+            for field, messages in error.message_dict.items()
+        )
+
+    @staticmethod
+    def import_rows(rows, batch_size=None, dry_run=False):
+        """
+        Validate and insert rows. Returns (created, rejected) where rejected
+        is a list of (row_number, row, errors); row 1 is the CSV header.
+        """
+        batch_size = batch_size or WorkSessionImportService.BATCH_SIZE
+        teachers, tasks = WorkSessionImportService.lookup_maps()
+        created, rejected, batch = 0, [], []
+        for number, row in enumerate(rows, start=2):
+            try:
+                batch.append(WorkSessionImportService.build_session(row, teachers, tasks))
+            except ValidationError as error:
+                rejected.append((number, row, WorkSessionImportService.error_text(error)))
+            if len(batch) >= batch_size:
+                created += len(batch) if dry_run else len(WorkSession.objects.create_many(batch))
+                batch = []
+        if batch:
+            created += len(batch) if dry_run else len(WorkSession.objects.create_many(batch))
+        return created, rejected
+
+    @staticmethod
+    def rejected_rows(rejected):
+        """Header and rows of the rejected-rows report"""
+        yield ['row', 'errors'] + WorkSessionImportService.COLUMNS
+        for number, row, errors in rejected:
+            yield [number, errors] + [row.get(column) or '' for column in WorkSessionImportService.COLUMNS]
+
+
+class KioskSyncService:
+    """
+    Applies the clock events a kiosk queued while offline. Each event is
+    {"id", "token", "action", "at", "task"}: a kiosk-assigned event id, the
+    teacher's kiosk token, "in" or "out", an ISO timestamp and, to clock in,
+    a task id. Events are applied in the order given.
+
+    Tokens, already applied event ids, open clock sessions and task rates
+    are each looked up with one query for the whole batch; new sessions go
+    through WorkSession.objects.create_many and clock-outs of sessions that
+    were already open through close_many. Rejected events are not recorded,
+    so a kiosk may resend them once the teacher's state allows it.
+    """
+    MAX_EVENTS = 500
+    # How far ahead of the server's clock a kiosk's timestamps may be
+    CLOCK_SKEW = timedelta(minutes=5)
+
+    @staticmethod
+    def parse_event(event, now):
+        """Return a validated event dict, or raise ValueError with the reason"""
+        if not isinstance(event, dict):
+            raise ValueError('Expected an object')
+        event_id, token, action, at = (event.get(key) for key in ('id', 'token', 'action', 'at'))
+        if not isinstance(event_id, str) or not 0 < len(event_id) <= 64:
+            raise ValueError('Expected an id of 1 to 64 characters')
+        if not isinstance(token, str) or not token:
+            raise ValueError('Invalid or missing kiosk token')
+        if action not in ('in', 'out'):
+            raise ValueError('Action must be "in" or "out"')
+        occurred_at = parse_datetime(at) if isinstance(at, str) else None
+        if occurred_at is None:
+            raise ValueError('Expected an ISO 8601 timestamp')
+        if timezone.is_naive(occurred_at):
+            occurred_at = timezone.make_aware(occurred_at)
+        if occurred_at > now + KioskSyncService.CLOCK_SKEW:
+            raise ValueError('Timestamp is in the future')
+        task_id = event.get('task')
+        if action == 'in' and (not isinstance(task_id, int) or isinstance(task_id, bool)):
+            raise ValueError('Clocking in requires a task id')
+        return {
+            'id': event_id,
+            'digest': KioskToken.digest_for(token),
+            'action': action,
+            'at': occurred_at,
+            'task': task_id if action == 'in' else None,
+        }
+
+    @staticmethod
+    def sync(events):
+        """
+        Apply a batch of events and return one result per event, in order:
+        {"id", "status": "applied" | "duplicate" | "rejected", "session"}
+        plus an "error" for rejected events.
+        """
+        now = timezone.now()
+        results = [None] * len(events)
+        parsed = []
+        for index, event in enumerate(events):
+            try:
+                parsed.append((index, KioskSyncService.parse_event(event, now)))
+            except ValueError as error:
+                event_id = event.get('id') if isinstance(event, dict) else None
+                results[index] = {'id': event_id, 'status': 'rejected', 'session': None, 'error': str(error)}
+
+        with transaction.atomic():
+            teachers = dict(KioskToken.objects.filter(
+                digest__in={event['digest'] for _, event in parsed},
+                teacher__user__is_active=True
+            ).values_list('digest', 'teacher_id'))
+            # Event id -> session id, or the session itself for events applied by this batch
+            applied = dict(KioskEvent.objects.filter(
+                event_id__in={event['id'] for _, event in parsed}
+            ).values_list('event_id', 'session_id'))
+            # Served by the worksession_live_open_clock partial index; the
+            # latest clock-in wins should a teacher have several open
+            open_sessions = {
+                session.teacher_id: session for session in WorkSession.objects.select_for_update().filter(
+                    teacher_id__in=set(teachers.values()),
+                    entry_type='clock',
+                    clock_out__isnull=True
+                ).order_by('clock_in')
+            }
+            rates = dict(Task.objects.filter(
+                pk__in={event['task'] for _, event in parsed if event['task'] is not None},
+                is_active=True
+            ).values_list('pk', 'hourly_rate'))
+
+            created, closed, records, duplicates = [], [], [], []
+            for index, event in parsed:
+                def reject(error):
+                    results[index] = {'id': event['id'], 'status': 'rejected', 'session': None, 'error': error}
+
+                if event['id'] in applied:
+                    duplicates.append((index, event['id']))
+                    continue
+                teacher_id = teachers.get(event['digest'])
+                if teacher_id is None:
+                    reject('Invalid or missing kiosk token')
+                    continue
+                session = open_sessions.get(teacher_id)
+                if event['action'] == 'in':
+                    if session is not None:
+                        reject('Already clocked in')
+                        continue
+                    if event['task'] not in rates:
+                        reject('Unknown or inactive task')
+                        continue
+                    # Dated by the clock-in, not by when the kiosk got back online
+                    session = WorkSession(
+                        teacher_id=teacher_id, task_id=event['task'], entry_type='clock',
+                        hourly_rate=rates[event['task']], clock_in=event['at'], created_at=event['at']
+                    )
+                    open_sessions[teacher_id] = session
+                    created.append(session)
+                else:
+                    if session is None:
+                        reject('Not clocked in')
+                        continue
+                    if event['at'] <= session.clock_in:
+                        reject('Clock-out must be after clock-in')
+                        continue
+                    session.clock_out = event['at']
+                    del open_sessions[teacher_id]
+                    if session.pk:
+                        closed.append(session)
+                applied[event['id']] = session
+                records.append((index, session, KioskEvent(
+                    event_id=event['id'], teacher_id=teacher_id, action=event['action'], occurred_at=event['at']
+                )))
+
+            # Sessions opened and closed within the batch are created closed
+            WorkSession.objects.create_many(created)
+            WorkSession.objects.close_many(closed)
+            for index, session, record in records:
+                record.session = session
+                results[index] = {'id': record.event_id, 'status': 'applied', 'session': session.pk}
+            KioskEvent.objects.bulk_create([record for _, _, record in records])
+
+        for index, event_id in duplicates:
+            session = applied[event_id]
+            results[index] = {
+                'id': event_id, 'status': 'duplicate',
+                'session': session.pk if isinstance(session, WorkSession) else session,
+            }
+        return results
+
+
+class PageValidatorService:
+    """
+    Validators for conditional GETs of a teacher's pages: the latest
+    updated_at and the row count of each source the page shows, so edits,
+    soft deletes and hard deletes all change them.
+    """
+
+    @staticmethod
+    def fingerprint(**sources):
+        """
+        Return (last_modified, state) for the querysets in sources, or None
+        when the first of them, the page's main one, is empty.
+
+        Everything comes from one query: a MAX() and a COUNT() subquery per
+        source, selected from the main source's first row. They are plain
+        functions rather than aggregates so no GROUP BY is added, which keeps
+        MAX() on the (teacher, updated_at) index a single lookup.
+        """
+        columns = {}
+        for name, queryset in sources.items():
+            rows = queryset.order_by()
+            columns[f'{name}_latest'] = Subquery(rows.values(latest=Func('updated_at', function='MAX')))
+            columns[f'{name}_count'] = Subquery(
+                rows.values(count=Func('pk', function='COUNT', output_field=IntegerField()))
+            )
+        main = next(iter(sources.values()))
+        row = next(iter(main.order_by().values(**columns)[:1]), None)
+        if row is None:
+            return None
+        latest = max(row[f'{name}_latest'] for name in sources if row[f'{name}_latest'] is not None)
+        return latest, tuple(row[column] for column in columns)
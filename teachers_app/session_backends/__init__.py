@@ -0,0 +1,38 @@
+class SkipUnchangedSaveMixin:
+    """
+    Skip the write when a session is saved with exactly the data it was
+    loaded with. SessionMiddleware saves whenever a key was assigned, even
+    to the value it already had, and every database save takes SQLite's
+    write lock. Saving a new or cycled session always writes.
+    """
+    _saved_state = None
+
+    def _state(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._saved_state = self._state(data)
+        return data
+
+    async def aload(self):
+        # ProfileMiddleware reads async requests' sessions through aget()
+        data = await super().aload()
+        self._saved_state = self._state(data)
+        return data
+
+    def _unchanged(self, data, must_create):
+        return (not must_create and self.session_key is not None and self._saved_state is not None
+                and self._state(data) == self._saved_state)
+
+    def save(self, must_create=False):
+        if self._unchanged(self._get_session(), must_create):
+            return
+        super().save(must_create)
+        self._saved_state = self._state(self._get_session(no_load=must_create))
+
+    async def asave(self, must_create=False):
+        if self._unchanged(await self._aget_session(), must_create):
+            return
+        await super().asave(must_create)
+        self._saved_state = self._state(await self._aget_session(no_load=must_create))
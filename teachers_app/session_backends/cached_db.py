@@ -0,0 +1,8 @@
+"""django_session rows, read through the 'sessions' cache"""
+from django.contrib.sessions.backends import cached_db
+
+from . import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, cached_db.SessionStore):
+    pass
@@ -0,0 +1,8 @@
+"""The default: one row per session in django_session"""
+from django.contrib.sessions.backends import db
+
+from . import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, db.SessionStore):
+    pass
@@ -0,0 +1,8 @@
+"""One file per session under SESSION_FILE_PATH"""
+from django.contrib.sessions.backends import file
+
+from . import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, file.SessionStore):
+    pass
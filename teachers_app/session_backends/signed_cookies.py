@@ -0,0 +1,8 @@
+"""Session data kept in a signed cookie, with no server-side writes"""
+from django.contrib.sessions.backends import signed_cookies
+
+from . import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, signed_cookies.SessionStore):
+    pass
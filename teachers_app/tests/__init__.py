@@ -1 +1,22 @@
 from .test_work_sessions import WorkSessionTestCase
+from .test_salary_calculation import SalaryCalculationTestCase
+from .test_month_summaries import TeacherMonthSummaryTestCase
+from .test_salary_reports import SalaryReportSnapshotTestCase
+from .test_report_cache import SalaryReportCacheTestCase
+from .test_payroll_export import PayrollExportTestCase
+from .test_generate_payroll import GeneratePayrollTestCase
+from .test_request_metrics import RequestMetricsTestCase
+from .test_benchmarks import BenchmarkCommandsTestCase
+from .test_query_plans import QueryPlanTestCase
+from .test_work_session_list import WorkSessionListTestCase
+from .test_soft_delete import WorkSessionSoftDeleteTestCase
+from .test_work_session_import import WorkSessionImportTestCase
+from .test_sqlite_profile import SQLiteProfileTestCase
+from .test_replica_routing import ReplicaRoutingTestCase
+from .test_async_views import AsyncViewsTestCase, AsgiBenchmarkTestCase
+from .test_kiosk_api import KioskApiTestCase
+from .test_kiosk_sync import KioskSyncTestCase
+from .test_profile_middleware import ProfileMiddlewareTestCase
+from .test_session_backends import SessionBackendsTestCase, SessionBenchmarkTestCase
+from .test_conditional_get import ConditionalGetTestCase
+from .test_api import ApiTestCase
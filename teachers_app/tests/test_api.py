@@ -0,0 +1,164 @@
+import json
+from decimal import Decimal
+from unittest import mock
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..models import CustomUser, Student, Teacher, Task, SalaryReport, TeacherMonthSummary, WorkSession
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='api_admin', password='adminpass')
+        self.user = CustomUser.objects.create_user(username='api_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=self.user)
+        other = CustomUser.objects.create_user(username='api_other', password='testpass', is_teacher=True)
+        self.other = Teacher.objects.create(user=other)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.retired = Task.objects.create(name="Retired", hourly_rate=Decimal('10.00'), is_active=False)
+        self.sessions = [
+            WorkSession.objects.create(teacher=teacher, task=self.task, entry_type='manual',
+                                       manual_hours=Decimal(hours))
+            for teacher, hours in [(self.teacher, '1.00'), (self.other, '2.00'), (self.teacher, '3.00'),
+                                   (self.teacher, '4.00'), (self.other, '5.00')]
+        ]
+
+    def post_json(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type='application/json')
+
+    def test_access(self):
+        """Test that anonymous users get 401 and students 403, as JSON"""
+        self.assertEqual(self.client.get(reverse('api_sessions')).status_code, 401)
+        student = CustomUser.objects.create_user(username='api_student', password='testpass', is_student=True)
+        Student.objects.create(user=student)
+        self.client.force_login(student)
+        response = self.client.get(reverse('api_tasks'))
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('error', response.json())
+
+        # A teacher account whose Teacher row is missing
+        teacher = CustomUser.objects.create_user(username='api_no_profile', password='testpass', is_teacher=True)
+        self.client.force_login(teacher)
+        for url in (reverse('api_sessions'), reverse('api_salary_reports')):
+            self.assertEqual(self.client.get(url).status_code, 403, url)
+        self.assertEqual(self.post_json(reverse('api_sessions'), {'task': self.task.id}).status_code, 403)
+
+    def test_cursor_pages_and_sparse_fields(self):
+        """Test that following next visits every session once, reading only the requested columns"""
+        self.client.force_login(self.admin)
+        url, seen = reverse('api_sessions') + '?fields=id,hours&limit=2', []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = self.client.get(url).json()
+            seen.extend(data['results'])
+            url = data['next']
+            page_query = context.captured_queries[-1]['sql']
+            self.assertNotIn('JOIN', page_query)
+        self.assertEqual([row['id'] for row in seen], [session.id for session in self.sessions])
+        self.assertEqual(set(seen[0]), {'id', 'hours'})
+        self.assertEqual(seen[0]['hours'], '1.00')
+
+        with CaptureQueriesContext(connection) as context:
+            data = self.client.get(reverse('api_sessions'), {'fields': 'task_name', 'teacher': self.other.id}).json()
+        self.assertEqual(data, {'results': [{'task_name': 'Lesson'}] * 2, 'next': None})
+        self.assertIn('JOIN "teachers_app_task"', context.captured_queries[-1]['sql'])
+        self.assertNotIn('teachers_app_customuser', context.captured_queries[-1]['sql'])
+
+        for params in ({'fields': 'id,password'}, {'limit': '0'}, {'cursor': 'x'}, {'start_date': '2024-13-01'}):
+            self.assertEqual(self.client.get(reverse('api_sessions'), params).status_code, 400, params)
+
+    def test_teachers_see_their_own_data(self):
+        """Test that a teacher's sessions, teachers and tasks are limited to what they may see"""
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('api_sessions'), {'teacher': self.other.id}).json()
+        self.assertEqual({row['teacher'] for row in data['results']}, {self.teacher.id})
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(self.client.get(reverse('api_session_detail', args=[self.sessions[1].id])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('api_session_detail', args=[self.sessions[0].id])).json()['teacher'],
+            self.teacher.id
+        )
+        self.assertEqual([row['username'] for row in self.client.get(reverse('api_teachers')).json()['results']],
+                         ['api_teacher'])
+        self.assertEqual([row['name'] for row in self.client.get(reverse('api_tasks')).json()['results']],
+                         ['Lesson'])
+        self.assertEqual(self.client.get(reverse('api_task_detail', args=[self.retired.id])).status_code, 404)
+
+    def test_bulk_create_sessions(self):
+        """Test that a bulk POST creates every session in one go, or none of them"""
+        self.client.force_login(self.admin)
+        day = timezone.now().date().isoformat()
+        rows = [
+            {'teacher': self.other.id, 'task': self.task.id, 'entry_type': 'manual', 'manual_hours': 2},
+            {'teacher': 'api_other', 'task': 'Lesson', 'entry_type': 'time_range',
+             'start_time': f'{day}T09:00', 'end_time': f'{day}T12:00'},
+        ]
+        invalid = {'teacher': self.other.id, 'task': 999, 'entry_type': 'manual', 'manual_hours': 1}
+        response = self.post_json(reverse('api_sessions'), rows + [invalid])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{'index': 2, 'errors': {'task': ["Unknown task '999'"]}}])
+        self.assertEqual(WorkSession.objects.count(), 5)
+
+        response = self.post_json(reverse('api_sessions') + '?fields=teacher,hours,total_amount', rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['results'], [
+            {'teacher': self.other.id, 'hours': '2.00', 'total_amount': '40.00'},
+            {'teacher': self.other.id, 'hours': '3.00', 'total_amount': '60.00'},
+        ])
+        summary = TeacherMonthSummary.objects.get(teacher=self.other, task=self.task)
+        self.assertEqual(summary.session_count, 4)
+
+    def test_teacher_posts_own_sessions_only(self):
+        """Test that teachers add sessions for themselves and nobody else"""
+        self.client.force_login(self.user)
+        response = self.post_json(reverse('api_sessions'),
+                                  {'task': self.task.id, 'entry_type': 'manual', 'manual_hours': '1.50'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['results'][0]['teacher'], self.teacher.id)
+
+        response = self.post_json(reverse('api_sessions'), [
+            {'teacher': self.other.id, 'task': self.task.id, 'entry_type': 'manual', 'manual_hours': 1}
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(WorkSession.objects.filter(teacher=self.other).count(), 2)
+
+        response = self.post_json(reverse('api_tasks'), {'name': 'Sneaky', 'hourly_rate': '99.00', 'price': '0'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_tasks_and_salary_reports(self):
+        """Test that superusers create tasks and reports, and that a new report replaces the month's old one"""
+        self.client.force_login(self.admin)
+        response = self.post_json(reverse('api_tasks'), {'name': 'Exam', 'hourly_rate': '30.00', 'price': '0'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['name'], 'Exam')
+        self.assertIn('hourly_rate', self.post_json(reverse('api_tasks'), {'name': 'Broken'}).json()['errors'])
+
+        now = timezone.now()
+        body = {'teacher': self.teacher.id, 'year': now.year, 'month': now.month}
+        first = self.post_json(reverse('api_salary_reports'), body).json()
+        response = self.post_json(reverse('api_salary_reports'), dict(body, notes='Final'))
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['total_hours'], report['total_amount'], report['notes']), ('8.00', '160.00', 'Final'))
+        self.assertNotIn('snapshot', report)
+        self.assertTrue(SalaryReport.objects.get(pk=first['id']).is_deleted)
+
+        data = self.client.get(reverse('api_salary_reports'), {'fields': 'id,snapshot'}).json()
+        self.assertEqual([row['id'] for row in data['results']], [report['id']])
+        self.assertEqual(Decimal(data['results'][0]['snapshot']['total_salary']), Decimal('160.00'))
+        for invalid in ({'teacher': self.teacher.id}, dict(body, year=1e400), dict(body, year=9999, month=12),
+                        dict(body, month=13)):
+            self.assertEqual(self.post_json(reverse('api_salary_reports'), invalid).status_code, 400, invalid)
+
+    def test_failed_salary_report_keeps_the_old_one(self):
+        """Test that the month's report is only soft-deleted once its replacement is saved"""
+        self.client.force_login(self.admin)
+        now = timezone.now()
+        body = {'teacher': self.teacher.id, 'year': now.year, 'month': now.month}
+        first = self.post_json(reverse('api_salary_reports'), body).json()
+        with mock.patch.object(SalaryReport, 'refresh_snapshot', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                self.post_json(reverse('api_salary_reports'), body)
+        self.assertFalse(SalaryReport.objects.get(pk=first['id']).is_deleted)
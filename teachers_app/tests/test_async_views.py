@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from decimal import Decimal
+from asgiref.sync import iscoroutinefunction
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from .. import views
+from ..middleware import request_metrics
+from ..models import CustomUser, Teacher, Task, WorkSession, SalaryReport, TeacherMonthSummary
+from ..report_cache import salary_report_cache
+from ..routers import PIN_COOKIE
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        salary_report_cache.clear()
+        request_metrics.clear()
+        self.user = CustomUser.objects.create_user(username='async_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.now = timezone.now()
+        self.async_client.force_login(self.user)
+
+    def test_busiest_views_are_async(self):
+        """Test that the high-traffic views run natively under ASGI"""
+        for view in (views.record_work, views.clock_out, views.recent_work_sessions, views.view_salary_report):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_clock_in_then_out(self):
+        """Test that an open clock session saves and is priced once clocked out"""
+        response = await self.async_client.post(reverse('record_work'), {'entry_type': 'clock', 'task': self.task.id})
+        self.assertEqual(response.status_code, 302)
+        # The write made in a worker thread still pins the teacher to the primary
+        self.assertIn(PIN_COOKIE, response.cookies)
+        session = await WorkSession.objects.aget(teacher=self.teacher)
+        self.assertIsNone(session.clock_out)
+        self.assertIsNone(session.duration_seconds)
+        self.assertFalse(await TeacherMonthSummary.objects.aexists())
+
+        response = await self.async_client.get(reverse('record_work'))
+        self.assertEqual(response.context['active_session'], session)
+
+        response = await self.async_client.post(reverse('clock_out', args=[session.id]))
+        self.assertEqual(response.status_code, 302)
+        await session.arefresh_from_db()
+        self.assertIsNotNone(session.clock_out)
+        self.assertIsNotNone(session.duration_seconds)
+        self.assertEqual(await TeacherMonthSummary.objects.acount(), 1)
+
+    async def test_invalid_entry_rerenders_forms(self):
+        """Test that a rejected entry shows its errors instead of failing"""
+        response = await self.async_client.post(reverse('record_work'), {'entry_type': 'manual'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('task', response.context['manual_form'].errors)
+        self.assertFalse(response.context['clock_form'].is_bound)
+
+    async def test_recent_sessions_counted_by_request_metrics(self):
+        """Test that queries run from async views still reach the request's counters"""
+        await WorkSession.objects.acreate(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.50')
+        )
+        response = await self.async_client.get(reverse('recent_work_sessions', args=[self.teacher.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['work_sessions']), 1)
+        metrics = {row['url_name']: row for row in request_metrics.summary()}
+        self.assertGreater(metrics['recent_work_sessions']['queries']['max'], 0)
+
+    async def test_salary_report_frozen_on_first_view(self):
+        """Test that the async report view creates the snapshot once, then reads it"""
+        await WorkSession.objects.acreate(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        url = reverse('teacher_view_salary_report', args=[self.teacher.id, self.now.year, self.now.month])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report_data']['total_salary'], Decimal('40.00'))
+        report = await SalaryReport.objects.aget(teacher=self.teacher)
+        self.assertIsNotNone(report.snapshot)
+        # The same aware, end-exclusive period create_salary_report and generate_payroll use
+        self.assertEqual((report.start_date, report.end_date),
+                         SalaryReport.month_period(self.now.year, self.now.month))
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.context['report'], report)
+        self.assertEqual(await SalaryReport.objects.acount(), 1)
+
+
+class AsgiBenchmarkTestCase(TransactionTestCase):
+    """Worker threads and the event loop need committed data, hence no TestCase"""
+
+    def test_benchmark_compares_both_interfaces(self):
+        """Test that both interfaces serve every scenario and the workers are cleaned up"""
+        user = CustomUser.objects.create_user(username='bench_teacher', password='testpass', is_teacher=True)
+        teacher = Teacher.objects.create(user=user)
+        task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        WorkSession.objects.create(teacher=teacher, task=task, entry_type='manual', manual_hours=Decimal('2.00'))
+        now = timezone.now()
+        SalaryReport.create_for_month(teacher, now.year, now.month, None)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, 'results.json')
+            call_command('benchmark_asgi', requests=4, concurrency=1, output=output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)
+
+        self.assertEqual(set(results['scenarios']), {'recent_work_sessions', 'view_salary_report', 'clock_in'})
+        for scenario in results['scenarios'].values():
+            for interface in ('wsgi', 'asgi'):
+                self.assertEqual(scenario[interface]['runs'], 4)
+                self.assertEqual(scenario[interface]['errors'], 0)
+        self.assertEqual(list(Teacher.objects.all()), [teacher])
+        self.assertEqual(WorkSession.objects.count(), 1)
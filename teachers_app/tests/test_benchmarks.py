@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from ..models import SalaryReport, Teacher, TeacherMonthSummary, WorkSession
+
+
+class BenchmarkCommandsTestCase(TestCase):
+    def setUp(self):
+        call_command(
+            'seed_benchmark_data', '--teachers', '3', '--tasks', '4', '--students', '2',
+            '--years', '1', '--sessions-per-month', '5', stdout=StringIO()
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.output = os.path.join(self.tmpdir.name, 'results.json')
+        self.baseline = os.path.join(self.tmpdir.name, 'baseline.json')
+
+    def run_benchmarks(self, *args):
+        call_command(
+            'run_benchmarks', '--iterations', '2', '--saves', '3',
+            '--output', self.output, '--baseline', self.baseline, *args, stdout=StringIO()
+        )
+        with open(self.output) as f:
+            return json.load(f)
+
+    def test_seeded_sessions_cover_every_entry_type(self):
+        """Test that seeded sessions use all entry types, historical dates and a matching ledger"""
+        self.assertEqual(Teacher.objects.count(), 3)
+        entry_types = set(WorkSession.objects.values_list('entry_type', flat=True))
+        self.assertEqual(entry_types, {'manual', 'clock', 'time_range'})
+        self.assertGreater(len({d.month for d in WorkSession.objects.dates('created_at', 'month')}), 1)
+        self.assertFalse(WorkSession.objects.filter(duration_seconds__isnull=True).exists())
+
+        out = StringIO()
+        call_command('rebuild_summaries', '--check', stdout=out)
+        self.assertIn('Ledger is in sync', out.getvalue())
+        self.assertTrue(TeacherMonthSummary.objects.exists())
+
+        with self.assertRaises(CommandError):
+            call_command('seed_benchmark_data', '--teachers', '1', stdout=StringIO())
+
+    def test_results_written_and_compared_to_baseline(self):
+        """Test that results are written, nothing persists and slowdowns against the baseline fail"""
+        sessions = WorkSession.objects.count()
+        results = self.run_benchmarks('--save-baseline')
+        self.assertEqual(set(results['benchmarks']), {
+            'calculate_salary', 'create_for_month', 'list_work_sessions_view',
+            'salary_report_view', 'list_salary_reports_view', 'kiosk_clock', 'work_session_save',
+        })
+        self.assertEqual(results['benchmarks']['calculate_salary']['runs'], 2)
+        self.assertEqual(WorkSession.objects.count(), sessions)
+        self.assertFalse(SalaryReport.objects.exists())
+
+        with open(self.baseline) as f:
+            baseline = json.load(f)
+        for stats in baseline['benchmarks'].values():
+            stats['p50_ms'] = 1e-6
+        with open(self.baseline, 'w') as f:
+            json.dump(baseline, f)
+        with self.assertRaisesMessage(CommandError, 'benchmarks regressed'):
+            self.run_benchmarks('--fail-on-regression')
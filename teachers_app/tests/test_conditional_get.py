@@ -0,0 +1,118 @@
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..models import CustomUser, Teacher, Task, SalaryReport, WorkSession
+from ..services import SalaryCalculationService, TeacherMonthSummaryService
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='etag_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        self.now = timezone.now()
+        self.report = SalaryReport.create_for_month(self.teacher, self.now.year, self.now.month, None)
+        self.client.force_login(self.user)
+
+    def revalidate(self, url):
+        """GET url, then GET it again with the validators it returned"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertIn('no-cache', response['Cache-Control'])
+        return response['ETag'], self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_are_not_rendered(self):
+        """Test that each page answers 304 from one query, without computing salaries"""
+        urls = [
+            reverse('recent_work_sessions', args=[self.teacher.id]),
+            reverse('teacher_view_salary_report', args=[self.teacher.id, self.now.year, self.now.month]),
+            reverse('teacher_salary_reports'),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            with mock.patch.object(SalaryCalculationService, 'calculate_salaries_bulk') as bulk, \
+                    mock.patch.object(SalaryCalculationService, 'calculate_salary') as calculate, \
+                    CaptureQueriesContext(connection) as context:
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(not_modified.status_code, 304, url)
+            self.assertEqual(not_modified['ETag'], response['ETag'])
+            self.assertEqual(not_modified['Last-Modified'], response['Last-Modified'])
+            self.assertFalse(not_modified.templates)
+            bulk.assert_not_called()
+            calculate.assert_not_called()
+            # The session, the user with their profile, then the fingerprint
+            self.assertEqual(len(context.captured_queries), 3, url)
+            self.assertIn('MAX(', context.captured_queries[-1]['sql'])
+
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_session_changes_invalidate(self):
+        """Test that edits, soft deletes and hard deletes of sessions change the ETag"""
+        url = reverse('recent_work_sessions', args=[self.teacher.id])
+        for change in (
+            lambda: WorkSession.objects.create(teacher=self.teacher, task=self.task, entry_type='manual',
+                                               manual_hours=Decimal('1.00')),
+            lambda: TeacherMonthSummaryService.update_sessions(
+                WorkSession.objects.filter(pk=self.session.pk), manual_hours=Decimal('3.00')
+            ),
+            lambda: self.session.delete(),
+            lambda: self.session.restore(),
+            lambda: self.session.hard_delete(),
+            lambda: Task.objects.filter(pk=self.task.pk).update(name="Tutoring", updated_at=timezone.now()),
+        ):
+            etag, response = self.revalidate(url)
+            self.assertEqual(response.status_code, 304)
+            change()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_report_changes_invalidate(self):
+        """Test that a report going stale or being refreshed changes its ETags"""
+        for url in (reverse('teacher_view_salary_report', args=[self.teacher.id, self.now.year, self.now.month]),
+                    reverse('teacher_salary_reports')):
+            for change in (
+                lambda: SalaryReport.mark_stale(self.teacher.id, self.now.year, self.now.month),
+                lambda: self.report.refresh_snapshot(),
+            ):
+                etag, response = self.revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                change()
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200, url)
+
+    def test_task_rate_changes_invalidate_report_totals(self):
+        """Test that the report list, whose totals use current task rates, changes ETag with a rate"""
+        url = reverse('teacher_salary_reports')
+        etag, response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        self.task.hourly_rate = Decimal('30.00')
+        self.task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['reports'][0]['total_salary'], Decimal('60.00'))
+
+    def test_etag_is_per_user(self):
+        """Test that another user's ETag never yields a 304, nor hides a 403"""
+        url = reverse('teacher_view_salary_report', args=[self.teacher.id, self.now.year, self.now.month])
+        etag = self.client.get(url)['ETag']
+
+        admin = CustomUser.objects.create_superuser(username='etag_admin', password='adminpass')
+        self.client.force_login(admin)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        other = CustomUser.objects.create_user(username='etag_other', password='testpass', is_teacher=True)
+        Teacher.objects.create(user=other)
+        self.client.force_login(other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,69 @@
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession, SalaryReport
+
+
+class GeneratePayrollTestCase(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.now = timezone.now()
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f'payroll_{i}', password='testpass', is_teacher=True)
+            teacher = Teacher.objects.create(user=user)
+            WorkSession.objects.create(
+                teacher=teacher, task=self.task, entry_type='manual', manual_hours=Decimal(i + 1)
+            )
+
+    def run_command(self, *args, workers=1):
+        out = StringIO()
+        call_command(
+            'generate_payroll', '--year', str(self.now.year), '--month', str(self.now.month),
+            '--workers', str(workers), '--chunk-size', '2', *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_dry_run_writes_nothing(self):
+        """Test that --dry-run computes the reports without saving them"""
+        output = self.run_command('--dry-run')
+        self.assertIn('would write 3 salary reports', output)
+        self.assertIn('compute:', output)
+        self.assertFalse(SalaryReport.objects.exists())
+
+    def test_reports_written_with_totals_and_snapshots(self):
+        """Test that one report per teacher is written and existing ones are skipped"""
+        self.run_command()
+        reports = SalaryReport.objects.order_by('teacher__user__username')
+        self.assertEqual([r.total_amount for r in reports], [Decimal('20.00'), Decimal('40.00'), Decimal('60.00')])
+        self.assertEqual(reports[2].snapshot_data()['total_salary'], Decimal('60.00'))
+
+        self.assertIn('0 teachers', self.run_command())
+        self.run_command('--replace')
+        self.assertEqual(SalaryReport.objects.filter(is_deleted=False).count(), 3)
+        self.assertEqual(SalaryReport.objects.filter(is_deleted=True).count(), 3)
+
+    def test_workers_match_the_serial_run(self):
+        """Test that --workers 2 writes the serial run's reports, computing in-process where workers cannot read"""
+        def written():
+            return sorted(
+                (report.teacher_id, report.total_hours, report.total_amount, report.snapshot_data())
+                for report in SalaryReport.objects.filter(is_deleted=False)
+            )
+
+        def progress(output):
+            return [line for line in output.splitlines() if not line.startswith(('  ', 'Workers cannot'))]
+
+        serial_output = self.run_command()
+        serial = written()
+        SalaryReport.objects.all().delete()
+
+        output = self.run_command(workers=2)
+        # The test database is in memory and inside this test's transaction
+        self.assertIn('Workers cannot read this database', output)
+        self.assertEqual(progress(output), progress(serial_output))
+        self.assertEqual(written(), serial)
+
+        with self.assertRaises(CommandError):
+            self.run_command(workers=0)
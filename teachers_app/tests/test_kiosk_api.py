@@ -0,0 +1,101 @@
+import json
+from io import StringIO
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from ..models import CustomUser, KioskToken, Teacher, Task, WorkSession, TeacherMonthSummary
+
+
+class KioskApiTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='kiosk_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.token = KioskToken.issue(self.teacher)
+        self.url = reverse('kiosk_clock')
+
+    def clock(self, action, task=None, token=None):
+        data = {'action': action}
+        if task is not None:
+            data['task'] = task
+        return self.client.post(
+            self.url, json.dumps(data), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {token or self.token}'
+        )
+
+    def test_clock_in(self):
+        """Test that clocking in writes one open session without rendering anything"""
+        # Token, open session and task lookups, then save()'s INSERT, which
+        # runs inside a SAVEPOINT/RELEASE pair under TestCase
+        with self.assertNumQueries(6):
+            response = self.clock('in', self.task.id)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.templates, [])
+        session = WorkSession.objects.get()
+        self.assertEqual(response.json(), {
+            'session': session.id, 'state': 'clocked_in', 'task': self.task.id,
+            'clock_in': response.json()['clock_in'], 'clock_out': None, 'hours': None, 'amount': None,
+        })
+        self.assertEqual(session.hourly_rate, Decimal('20.00'))
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_clock_out(self):
+        """Test that clocking out closes the open session and updates the ledger"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='clock',
+            clock_in=timezone.now() - timezone.timedelta(hours=2)
+        )
+        response = self.clock('out')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['state'], 'clocked_out')
+        self.assertEqual(response.json()['hours'], '2.00')
+        self.assertEqual(response.json()['amount'], '40.00')
+        self.assertEqual(TeacherMonthSummary.objects.get().seconds, 7200)
+
+    def test_state_conflicts(self):
+        """Test that clocking in twice or out while not clocked in is refused"""
+        self.assertEqual(self.clock('out').status_code, 409)
+        self.clock('in', self.task.id)
+        response = self.clock('in', self.task.id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['state'], 'clocked_in')
+        self.assertEqual(WorkSession.objects.count(), 1)
+
+    def test_authentication(self):
+        """Test that a missing, wrong or deactivated teacher's token is rejected"""
+        response = self.client.post(self.url, json.dumps({'action': 'in', 'task': self.task.id}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        self.assertEqual(self.clock('in', self.task.id, token='not-a-token').status_code, 401)
+
+        # Issuing a new token revokes the old one
+        old_token, self.token = self.token, KioskToken.issue(self.teacher)
+        self.assertEqual(self.clock('in', self.task.id, token=old_token).status_code, 401)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.clock('in', self.task.id).status_code, 401)
+        self.assertFalse(WorkSession.objects.exists())
+
+    def test_bad_requests(self):
+        """Test that malformed bodies, unknown actions and inactive tasks are 400s"""
+        response = self.client.post(self.url, 'not json', content_type='application/json',
+                                    HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.clock('pause').status_code, 400)
+        self.assertEqual(self.clock('in').status_code, 400)
+        self.assertEqual(self.clock('in', str(self.task.id)).status_code, 400)
+        self.task.is_active = False
+        self.task.save()
+        self.assertEqual(self.clock('in', self.task.id).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_issue_command(self):
+        """Test that the command prints a token the API accepts"""
+        out = StringIO()
+        call_command('issue_kiosk_token', 'kiosk_teacher', stdout=out)
+        self.token = out.getvalue().splitlines()[-1]
+        self.assertEqual(self.clock('in', self.task.id).status_code, 201)
@@ -0,0 +1,155 @@
+import json
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..models import CustomUser, KioskEvent, KioskToken, Teacher, Task, WorkSession, TeacherMonthSummary
+
+
+class KioskSyncTestCase(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.teachers, self.tokens = [], []
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f'sync_teacher_{i}', password='testpass', is_teacher=True)
+            teacher = Teacher.objects.create(user=user)
+            self.teachers.append(teacher)
+            self.tokens.append(KioskToken.issue(teacher))
+        self.start = timezone.now().replace(microsecond=0) - timezone.timedelta(hours=4)
+        self.url = reverse('kiosk_sync')
+
+    def event(self, event_id, teacher, action, hours, task=None):
+        event = {
+            'id': event_id,
+            'token': self.tokens[teacher],
+            'action': action,
+            'at': (self.start + timezone.timedelta(hours=hours)).isoformat(),
+        }
+        if action == 'in':
+            event['task'] = task or self.task.id
+        return event
+
+    def sync(self, events):
+        return self.client.post(self.url, json.dumps({'events': events}), content_type='application/json')
+
+    def statuses(self, response):
+        return [result['status'] for result in response.json()['results']]
+
+    def test_batch_for_many_teachers(self):
+        """Test that a queue of events opens, closes and prices sessions in one upload"""
+        open_session = WorkSession.objects.create(
+            teacher=self.teachers[0], task=self.task, entry_type='clock', clock_in=self.start
+        )
+        events = [
+            self.event('e1', 1, 'in', 0),
+            self.event('e2', 0, 'out', 2.4),
+            self.event('e3', 2, 'in', 1),
+            self.event('e4', 1, 'out', 1.6),
+            self.event('e5', 1, 'in', 2),
+        ]
+        response = self.sync(events)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response), ['applied'] * 5)
+
+        open_session.refresh_from_db()
+        self.assertEqual(open_session.clock_out, self.start + timezone.timedelta(hours=2.4))
+        # save()'s rounding: clock hours to the nearest whole hour
+        self.assertEqual(open_session.stored_hours, Decimal('2'))
+        self.assertEqual(open_session.total_amount, Decimal('40.00'))
+
+        sessions = WorkSession.objects.filter(teacher=self.teachers[1]).order_by('clock_in')
+        self.assertEqual([s.stored_hours for s in sessions], [Decimal('2'), None])
+        self.assertEqual(sessions[0].created_at, self.start)
+        self.assertEqual(sessions[0].hourly_rate, Decimal('20.00'))
+        results = response.json()['results']
+        self.assertEqual([results[0]['session'], results[4]['session']], [s.id for s in sessions])
+        self.assertTrue(WorkSession.objects.filter(teacher=self.teachers[2], clock_out__isnull=True).exists())
+
+        self.assertEqual(
+            sorted(TeacherMonthSummary.objects.values_list('teacher_id', 'seconds')),
+            sorted([(self.teachers[0].id, 7200), (self.teachers[1].id, 7200)])
+        )
+
+    def test_replays_are_idempotent(self):
+        """Test that resending an upload changes nothing and reports duplicates"""
+        events = [self.event('e1', 0, 'in', 0), self.event('e2', 0, 'out', 3)]
+        first = self.sync(events).json()['results']
+        replay = self.sync(events + [self.event('e3', 0, 'in', 4)]).json()['results']
+        self.assertEqual([r['status'] for r in replay], ['duplicate', 'duplicate', 'applied'])
+        self.assertEqual([r['session'] for r in replay[:2]], [r['session'] for r in first])
+        self.assertEqual(WorkSession.objects.count(), 2)
+        self.assertEqual(KioskEvent.objects.count(), 3)
+        self.assertEqual(TeacherMonthSummary.objects.get().seconds, 3 * 3600)
+
+        # The same event twice in one upload is applied once
+        response = self.sync([self.event('e4', 1, 'in', 0), self.event('e4', 1, 'in', 0)])
+        self.assertEqual(self.statuses(response), ['applied', 'duplicate'])
+        self.assertEqual(WorkSession.objects.filter(teacher=self.teachers[1]).count(), 1)
+
+    def test_rejected_events(self):
+        """Test that invalid events are reported without stopping the rest"""
+        self.task.is_active = False
+        self.task.save()
+        inactive_task = self.task.id
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('30.00'))
+        future = self.event('e7', 1, 'in', 0)
+        future['at'] = (timezone.now() + timezone.timedelta(hours=1)).isoformat()
+        events = [
+            self.event('e1', 0, 'out', 1),
+            self.event('e2', 0, 'in', 1),
+            self.event('e3', 0, 'in', 2),
+            self.event('e4', 0, 'out', 0.5),
+            dict(self.event('e5', 1, 'in', 0), token='not-a-token'),
+            self.event('e6', 1, 'in', 0, task=inactive_task),
+            future,
+            {'id': 'e8', 'action': 'in'},
+            'not an event',
+            self.event('e9', 0, 'out', 3),
+        ]
+        results = self.sync(events).json()['results']
+        self.assertEqual([r['status'] for r in results], ['rejected', 'applied'] + ['rejected'] * 7 + ['applied'])
+        self.assertEqual([r['error'] for r in results[:1] + results[2:9]], [
+            'Not clocked in',
+            'Already clocked in',
+            'Clock-out must be after clock-in',
+            'Invalid or missing kiosk token',
+            'Unknown or inactive task',
+            'Timestamp is in the future',
+            'Invalid or missing kiosk token',
+            'Expected an object',
+        ])
+        self.assertEqual(WorkSession.objects.get().stored_hours, Decimal('2'))
+        self.assertEqual(KioskEvent.objects.count(), 2)
+
+        # Rejected events are not recorded, so a kiosk may send them again
+        results = self.sync([self.event('e1', 0, 'out', 1)]).json()['results']
+        self.assertEqual(results[0]['error'], 'Not clocked in')
+
+    def test_sessions_matched_and_written_in_bulk(self):
+        """Test that the work session queries are the same for one teacher or more"""
+        def upload(prefix, teachers):
+            for teacher in teachers:
+                WorkSession.objects.create(
+                    teacher=self.teachers[teacher], task=self.task, entry_type='clock', clock_in=self.start
+                )
+            events = [self.event(f'{prefix}{t}-out', t, 'out', 1) for t in teachers]
+            events += [self.event(f'{prefix}{t}-in', t, 'in', 2) for t in teachers]
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(set(self.statuses(self.sync(events))), {'applied'})
+            return [query['sql'].split()[0] for query in context.captured_queries
+                    if '"teachers_app_worksession"' in query['sql'] and 'teachers_app_salaryreport' not in query['sql']]
+
+        # One lookup of the open sessions, one INSERT, one UPDATE
+        self.assertEqual(upload('a', [0]), ['SELECT', 'INSERT', 'UPDATE'])
+        self.assertEqual(upload('b', [1, 2]), ['SELECT', 'INSERT', 'UPDATE'])
+
+    def test_bad_requests(self):
+        """Test that malformed uploads are 400s"""
+        self.assertEqual(self.client.post(self.url, 'not json', content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, json.dumps([]), content_type='application/json').status_code, 400)
+        self.assertEqual(self.sync({'id': 'e1'}).status_code, 400)
+        too_many = [self.event(f'e{i}', 0, 'in', 0) for i in range(501)]
+        self.assertEqual(self.sync(too_many).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
@@ -0,0 +1,208 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.db.models import QuerySet
+from ..models import CustomUser, Teacher, Task, WorkSession, TeacherMonthSummary, SalaryReport
+from ..report_cache import salary_report_cache
+from ..services import TeacherMonthSummaryService
+
+
+class TeacherMonthSummaryTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='ledger_teacher',
+            password='testpass',
+            is_teacher=True
+        )
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.now = timezone.now()
+
+    def summary(self):
+        return TeacherMonthSummary.objects.get(
+            teacher=self.teacher, task=self.task, year=self.now.year, month=self.now.month
+        )
+
+    def test_save_and_delete_keep_ledger_in_sync(self):
+        """Test that creating, editing and deleting sessions updates the ledger"""
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        clock_in = self.now - timezone.timedelta(hours=2)
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='clock',
+            clock_in=clock_in, clock_out=clock_in + timezone.timedelta(hours=1)
+        )
+        summary = self.summary()
+        self.assertEqual(summary.hours, Decimal('3.00'))
+        self.assertEqual(summary.amount, Decimal('60.00'))
+        self.assertEqual(summary.session_count, 2)
+        self.assertEqual(summary.rounded_session_count, 1)
+
+        session.manual_hours = Decimal('4.00')
+        session.save()
+        self.assertEqual(self.summary().hours, Decimal('5.00'))
+
+        session.delete()
+        summary = self.summary()
+        self.assertEqual(summary.hours, Decimal('1.00'))
+        self.assertEqual(summary.session_count, 1)
+
+        WorkSession.objects.get().delete()
+        self.assertFalse(TeacherMonthSummary.objects.exists())
+
+    def test_queryset_update_through_service(self):
+        """Test that queryset updates made through the service resync the ledger"""
+        other_task = Task.objects.create(name="Grading", hourly_rate=Decimal('10.00'))
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        TeacherMonthSummaryService.update_sessions(WorkSession.objects.all(), task=other_task)
+
+        summary = TeacherMonthSummary.objects.get()
+        self.assertEqual(summary.task, other_task)
+        self.assertEqual(summary.hours, Decimal('2.00'))
+
+        TeacherMonthSummaryService.update_sessions(WorkSession.objects.all(), is_deleted=True)
+        self.assertFalse(TeacherMonthSummary.objects.exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        """Test that rebuild_summaries restores rows changed behind the ledger's back"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        TeacherMonthSummary.objects.update(seconds=99 * 3600)
+
+        out = StringIO()
+        call_command('rebuild_summaries', '--check', stdout=out)
+        self.assertIn('1 ledger rows out of sync', out.getvalue())
+
+        call_command('rebuild_summaries', stdout=StringIO())
+        self.assertEqual(self.summary().hours, Decimal('2.00'))
+
+    def test_rebuild_flags_repaired_months(self):
+        """Test that rebuilding a drifted month marks its reports stale and invalidates cached salaries"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        report = SalaryReport.create_for_month(self.teacher, self.now.year, self.now.month, None)
+        version = salary_report_cache.get_version(self.teacher.id, self.now.year, self.now.month)
+
+        # Nothing drifted: the rebuild leaves reports and cache alone
+        with self.captureOnCommitCallbacks(execute=True):
+            TeacherMonthSummaryService.rebuild()
+        report.refresh_from_db()
+        self.assertFalse(report.is_stale)
+        self.assertEqual(salary_report_cache.get_version(self.teacher.id, self.now.year, self.now.month), version)
+
+        TeacherMonthSummary.objects.update(seconds=99 * 3600)
+        with self.captureOnCommitCallbacks(execute=True):
+            TeacherMonthSummaryService.rebuild()
+        report.refresh_from_db()
+        self.assertTrue(report.is_stale)
+        self.assertNotEqual(salary_report_cache.get_version(self.teacher.id, self.now.year, self.now.month), version)
+
+    def test_concurrent_first_write_adds_to_existing_row(self):
+        """Test that a month row created by another writer between update and insert is added to"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        real_update = QuerySet.update
+        calls = []
+
+        def update(queryset, **values):
+            # The first update misses, as if the row was not committed yet
+            calls.append(values)
+            return 0 if len(calls) == 1 else real_update(queryset, **values)
+
+        with mock.patch.object(QuerySet, 'update', update):
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('3.00')
+            )
+        self.assertEqual(self.summary().hours, Decimal('5.00'))
+        self.assertEqual(self.summary().session_count, 2)
+
+    def test_admin_cannot_edit_the_ledger(self):
+        """Test that the admin shows ledger rows but never adds, changes or deletes them"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        summary = self.summary()
+        admin = CustomUser.objects.create_superuser(username='ledger_admin', password='adminpass')
+        self.client.force_login(admin)
+        change_url = reverse('admin:teachers_app_teachermonthsummary_change', args=[summary.pk])
+        self.assertEqual(self.client.get(reverse('admin:teachers_app_teachermonthsummary_changelist')).status_code, 200)
+        self.assertEqual(self.client.get(change_url).status_code, 200)
+        self.client.post(change_url, {'hours': '99.00'})
+        self.assertEqual(self.client.get(reverse('admin:teachers_app_teachermonthsummary_add')).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse('admin:teachers_app_teachermonthsummary_delete', args=[summary.pk])).status_code,
+            403
+        )
+        self.assertEqual(self.summary().hours, Decimal('2.00'))
+
+    def test_teacher_dashboard_reads_ledger(self):
+        """Test that the teacher dashboard shows the current month from the ledger"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('teachers_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['month_amount'], Decimal('40.00'))
+        self.assertContains(response, 'Lesson')
+
+    def test_integer_columns_sum_exactly(self):
+        """Test that sessions store seconds/cents and the ledger sums them exactly"""
+        task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('33.33'))
+        for _ in range(30):
+            session = WorkSession.objects.create(
+                teacher=self.teacher, task=task, entry_type='manual', manual_hours=Decimal('0.10')
+            )
+        self.assertEqual(session.duration_seconds, 360)
+        self.assertEqual(session.amount_cents, 333)
+
+        summary = TeacherMonthSummary.objects.get(task=task)
+        self.assertEqual(summary.seconds, 30 * 360)
+        self.assertEqual(summary.hours, Decimal('3.00'))
+        self.assertEqual(summary.amount, Decimal('99.90'))
+
+    def test_create_many_matches_save(self):
+        """Test that create_many derives the same fields as save() with queries independent of row count"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+        )
+        clock_in = self.now - timezone.timedelta(hours=3)
+
+        def rows(count):
+            return [
+                {'teacher': self.teacher, 'task_id': self.task.id, 'entry_type': 'manual', 'manual_hours': Decimal('1.50')}
+                for _ in range(count)
+            ] + [
+                {'teacher': self.teacher, 'task_id': self.task.id, 'entry_type': 'clock',
+                 'clock_in': clock_in, 'clock_out': clock_in + timezone.timedelta(minutes=100)},
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            WorkSession.objects.create_many(rows(2))
+        with CaptureQueriesContext(connection) as large:
+            created = WorkSession.objects.create_many(rows(40))
+        self.assertEqual(len(small), len(large))
+
+        self.assertEqual(created[0].hourly_rate, Decimal('20.00'))
+        self.assertEqual(created[0].total_amount, Decimal('30.00'))
+        self.assertEqual(created[-1].stored_hours, Decimal('2'))
+        summary = self.summary()
+        self.assertEqual(summary.session_count, 45)
+        self.assertEqual(summary.rounded_session_count, 2)
+        self.assertEqual(summary.hours, Decimal('68.00'))
+
+        out = StringIO()
+        call_command('rebuild_summaries', '--check', stdout=out)
+        self.assertIn('Ledger is in sync', out.getvalue())
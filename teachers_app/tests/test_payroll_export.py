@@ -0,0 +1,60 @@
+import csv
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession
+
+
+class PayrollExportTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        user = CustomUser.objects.create_user(username='export_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.now = timezone.now()
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.50')
+        )
+        clock_in = self.now - timezone.timedelta(hours=2)
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='clock',
+            clock_in=clock_in, clock_out=clock_in + timezone.timedelta(minutes=70)
+        )
+        self.month = f"{self.now.year}-{self.now.month:02d}"
+
+    def test_view_streams_task_rows(self):
+        """Test that the export endpoint streams one row per teacher and task"""
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('export_payroll'), {
+            'start_year': self.now.year, 'start_month': self.now.month,
+            'end_year': self.now.year, 'end_month': self.now.month, 'detail': 'task',
+        })
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][0], 'teacher')
+        # 1.5 manual + 1 rounded clock hour, rounded per task like calculate_salary
+        self.assertEqual(rows[1], ['export_teacher', self.month, 'Lesson', '2', '3', '20.00', '60.00'])
+
+    def test_command_writes_session_rows(self):
+        """Test that export_payroll writes one row per session"""
+        out = StringIO()
+        call_command('export_payroll', '--start', self.month, '--detail', 'session', stdout=out)
+        rows = list(csv.reader(out.getvalue().splitlines()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row[5] for row in rows[1:]], ['1.50', '1.00'])
+        self.assertEqual([row[7] for row in rows[1:]], ['30.00', '20.00'])
+
+    def test_half_cents_round_up_like_the_report(self):
+        """Test that session totals round half a cent up, as stored session amounts do"""
+        task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.50'))
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=task, entry_type='manual', manual_hours=Decimal('0.01')
+        )
+        out = StringIO()
+        call_command('export_payroll', '--start', self.month, '--detail', 'session', stdout=out)
+        row = next(row for row in csv.reader(out.getvalue().splitlines()) if row[0] == str(session.id))
+        self.assertEqual(row[7], '0.11')
+        self.assertEqual(session.total_amount, Decimal('0.11'))
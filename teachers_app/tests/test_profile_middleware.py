@@ -0,0 +1,126 @@
+from decimal import Decimal
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..middleware import ROLE_SESSION_KEY
+from ..models import CustomUser, Inspector, Teacher, Task, Student, SalaryReport, WorkSession
+
+
+class ProfileMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='profile_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+
+    def profile_joins(self, url):
+        """Profile tables joined by the query that loads the signed-in user"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        user_query = next(q['sql'] for q in context.captured_queries if 'FROM "teachers_app_customuser"' in q['sql'])
+        return response, {table for table in ('teacher', 'student', 'inspector')
+                          if f'"teachers_app_{table}"' in user_query}
+
+    def test_role_and_profile_attached(self):
+        """Test that the role is cached at login and only its profile is joined"""
+        self.client.login(username='profile_teacher', password='testpass')
+        self.assertEqual(self.client.session[ROLE_SESSION_KEY], 'teacher')
+        response, joins = self.profile_joins(reverse('teachers_dashboard'))
+        self.assertEqual(joins, {'teacher'})
+        self.assertEqual(response.wsgi_request.role, 'teacher')
+        self.assertEqual(response.wsgi_request.profile, self.teacher)
+        self.assertIs(response.wsgi_request.profile.user, response.wsgi_request.user)
+
+    def test_sessions_from_before_profile_backend_stay_signed_in(self):
+        """Test that a session recorded against ModelBackend still loads its user, and new logins use ProfileBackend"""
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('teachers_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.profile, self.teacher)
+
+        self.client.logout()
+        self.client.login(username='profile_teacher', password='testpass')
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'teachers_app.backends.ProfileBackend')
+
+    def test_role_change_is_picked_up(self):
+        """Test that a session without the right role joins every profile once, then updates it"""
+        user = CustomUser.objects.create_user(username='profile_student', password='testpass', is_teacher=True)
+        student = Student.objects.create(user=user)
+        self.client.force_login(user)
+        user.is_teacher, user.is_student = False, True
+        user.save()
+
+        response, joins = self.profile_joins(reverse('dashboard'))
+        self.assertRedirects(response, reverse('student_dashboard'), fetch_redirect_response=False)
+        # The cached role no longer matched, so the student profile was loaded on its own
+        self.assertEqual(joins, {'teacher'})
+        self.assertEqual(response.wsgi_request.profile, student)
+        self.assertEqual(self.client.session[ROLE_SESSION_KEY], 'student')
+
+        session = self.client.session
+        del session[ROLE_SESSION_KEY]
+        session.save()
+        _, joins = self.profile_joins(reverse('dashboard'))
+        self.assertEqual(joins, {'teacher', 'student', 'inspector'})
+        _, joins = self.profile_joins(reverse('dashboard'))
+        self.assertEqual(joins, {'student'})
+
+    def test_superuser_and_anonymous(self):
+        """Test that superusers and anonymous requests have no profile"""
+        response = self.client.get(reverse('login'))
+        self.assertIsNone(response.wsgi_request.role)
+        self.assertIsNone(response.wsgi_request.profile)
+
+        admin = CustomUser.objects.create_superuser(username='profile_admin', password='adminpass')
+        Inspector.objects.create(user=admin)
+        self.client.force_login(admin)
+        response, joins = self.profile_joins(reverse('superuser_dashboard'))
+        self.assertEqual(joins, set())
+        self.assertEqual(response.wsgi_request.role, 'superuser')
+        self.assertIsNone(response.wsgi_request.profile)
+
+    def test_teacher_pages_skip_profile_queries(self):
+        """Test that teacher pages find their profile without querying for it"""
+        WorkSession.objects.create(teacher=self.teacher, task=self.task, entry_type='manual',
+                                   manual_hours=Decimal('2.00'))
+        now = timezone.now()
+        SalaryReport.create_for_month(self.teacher, now.year, now.month, None)
+        self.client.force_login(self.user)
+        for url in (reverse('teacher_salary_reports'), reverse('record_work'),
+                    reverse('teacher_view_salary_report', args=[self.teacher.id, now.year, now.month])):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            profile_queries = [q['sql'] for q in context.captured_queries
+                               if q['sql'].startswith('SELECT') and 'FROM "teachers_app_teacher"' in q['sql']]
+            self.assertEqual(profile_queries, [], url)
+
+    async def test_async_views_share_the_user(self):
+        """Test that async views get the same user and profile as sync code"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('recent_work_sessions', args=[self.teacher.id]))
+        self.assertEqual(response.status_code, 200)
+        request = response.asgi_request
+        self.assertIs(await request.auser(), request.user)
+        self.assertEqual(response.context['teacher'], self.teacher)
+
+    async def test_async_profile_not_joined_with_the_user(self):
+        """Test that async requests load a profile the user query did not join, instead of failing"""
+        url = reverse('recent_work_sessions', args=[self.teacher.id])
+        # Signed in before ProfileBackend, so the user comes without a profile
+        await self.async_client.aforce_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.asgi_request.profile, self.teacher)
+
+        # A stale role in the session joins the wrong profile
+        await self.async_client.aforce_login(self.user)
+        session = self.async_client.session
+        await session.aset(ROLE_SESSION_KEY, 'student')
+        await session.asave()
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.asgi_request.profile, self.teacher)
+        self.assertEqual(await self.async_client.session.aget(ROLE_SESSION_KEY), 'teacher')
@@ -0,0 +1,101 @@
+import re
+import unittest
+from django.db import connection
+from django.test import TestCase
+from ..models import KioskToken, SalaryReport, WorkSession
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class QueryPlanTestCase(TestCase):
+    """Fail when a hot query stops using an index and scans a whole table"""
+
+    def setUp(self):
+        self.start, self.end = SalaryReport.month_period(2024, 5)
+
+    def assertUsesIndex(self, queryset, index_name, search=True):
+        """
+        Assert the plan reads the table through index_name. With search=False
+        an ordered walk of the whole index is allowed, for partial indexes
+        that already hold only the wanted rows.
+        """
+        # QuerySet.explain() runs EXPLAIN QUERY PLAN on SQLite
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        self.assertIsNone(
+            re.search(rf'\bSCAN {table}$', plan, re.MULTILINE),
+            f'Full table scan of {table}:\n{plan}'
+        )
+        access = 'SEARCH' if search else '(SEARCH|SCAN)'
+        self.assertRegex(plan, rf'{access} {table} USING (COVERING )?INDEX {index_name}\b')
+
+    def test_work_sessions_for_teacher_month(self):
+        """Test that the salary calculation query reads the live-sessions index"""
+        self.assertUsesIndex(WorkSession.objects.filter(
+            teacher_id=1,
+            created_at__range=(self.start, self.end)
+        ), 'worksession_live_teacher_month')
+
+    def test_recent_work_sessions(self):
+        """Test that a teacher's newest sessions are read in index order"""
+        queryset = WorkSession.objects.filter(teacher_id=1).order_by('-created_at')[:10]
+        self.assertUsesIndex(queryset, 'worksession_live_teacher_month')
+        self.assertNotIn('TEMP B-TREE', queryset.explain())
+
+    def test_payroll_export_month(self):
+        """Test that every teacher's live sessions for a month come from an index"""
+        self.assertUsesIndex(WorkSession.objects.filter(
+            created_at__range=(self.start, self.end)
+        ), 'worksession_live_created')
+
+    def test_active_clock_session(self):
+        """Test that the open clock-in lookup in record_work uses the partial index"""
+        self.assertUsesIndex(WorkSession.objects.filter(
+            teacher_id=1,
+            entry_type='clock',
+            clock_out__isnull=True
+        ), 'worksession_live_open_clock')
+
+    def test_kiosk_lookups(self):
+        """Test that the kiosk API finds the token and the open session through indexes"""
+        plan = KioskToken.objects.filter(
+            digest='0' * 64,
+            teacher__user__is_active=True
+        ).values_list('teacher_id', flat=True).explain()
+        # The unique constraint's automatic index serves the digest lookup
+        self.assertRegex(plan, r'SEARCH teachers_app_kiosktoken USING INDEX \w+ \(digest=\?\)')
+        queryset = WorkSession.objects.filter(
+            teacher_id=1,
+            entry_type='clock',
+            clock_out__isnull=True
+        ).order_by('pk')[:1]
+        self.assertUsesIndex(queryset, 'worksession_live_open_clock')
+
+    def test_trash(self):
+        """Test that the trash listing and the purge sweep read only deleted rows"""
+        trash = WorkSession.all_objects.deleted()
+        self.assertUsesIndex(trash.order_by('-deleted_at'), 'worksession_trash', search=False)
+        self.assertUsesIndex(trash.filter(deleted_at__lt=self.start), 'worksession_trash')
+
+    def test_salary_report_lookups(self):
+        """Test that salary report lookups by teacher and period use the composite index"""
+        self.assertUsesIndex(SalaryReport.objects.filter(
+            teacher_id=1,
+            start_date=self.start,
+            end_date=self.end
+        ), 'salaryreport_teacher_period')
+        self.assertUsesIndex(SalaryReport.objects.filter(
+            teacher_id=1,
+            start_date=self.start,
+            is_deleted=False
+        ).order_by('-created_at'), 'salaryreport_teacher_period')
+        self.assertUsesIndex(SalaryReport.objects.filter(
+            teacher_id=1,
+            start_date__gte=self.start,
+            start_date__lt=self.end,
+        ), 'salaryreport_teacher_period')
+
+    def test_live_salary_reports(self):
+        """Test that the all-teachers report list is read in index order"""
+        queryset = SalaryReport.objects.filter(is_deleted=False).order_by('-start_date')
+        self.assertUsesIndex(queryset, 'salaryreport_live_start', search=False)
+        self.assertNotIn('TEMP B-TREE', queryset.explain())
@@ -0,0 +1,110 @@
+import os
+import tempfile
+from decimal import Decimal
+from django.db import connections
+from django.db.utils import load_backend
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from ..management.commands.sync_sqlite_replica import copy_sqlite_database
+from ..models import CustomUser, Inspector, Teacher, Task, WorkSession, SalaryReport
+from ..routers import PIN_COOKIE, primary_pin, replica_alias, replica_reads
+from ..report_cache import salary_report_cache
+
+ALIAS = 'replica'
+
+
+@override_settings(REPLICA_DATABASE=ALIAS)
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """
+    Route reporting reads to a second SQLite file that lags behind the
+    primary. The replica is copied from committed data, hence no TestCase.
+    """
+    # Includes the replica alias when settings configure one
+    databases = '__all__'
+
+    def setUp(self):
+        salary_report_cache.clear()
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.now = timezone.now()
+        self.first = self.create_report('replicated_teacher')
+
+        # Snapshot the primary into the replica file; later writes only reach the primary
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'replica.sqlite3')
+        copy_sqlite_database(connections['default'], path)
+        settings_dict = dict(connections['default'].settings_dict, NAME=path)
+        self.configured = connections[ALIAS] if ALIAS in connections else None
+        connections[ALIAS] = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, ALIAS)
+        self.addCleanup(self.close_replica)
+
+        self.second = self.create_report('lagging_teacher')
+        self.client.force_login(self.admin)
+        # Logging in wrote the session; start from an unpinned browser
+        self.client.cookies.pop(PIN_COOKIE, None)
+
+    def close_replica(self):
+        connections[ALIAS].close()
+        if self.configured is None:
+            del connections[ALIAS]
+        else:
+            connections[ALIAS] = self.configured
+
+    def create_report(self, username):
+        user = CustomUser.objects.create_user(username=username, password='testpass', is_teacher=True)
+        teacher = Teacher.objects.create(user=user)
+        WorkSession.objects.create(teacher=teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00'))
+        return SalaryReport.create_for_month(teacher, self.now.year, self.now.month, self.admin)
+
+    def listed_reports(self):
+        response = self.client.get(reverse('list_salary_reports'))
+        self.assertEqual(response.status_code, 200)
+        return {item['report'].id for item in response.context['reports']}
+
+    def test_report_list_reads_from_replica(self):
+        """Test that the report list only sees what has been replicated"""
+        self.assertEqual(self.listed_reports(), {self.first.id})
+
+    def test_writer_reads_own_writes(self):
+        """Test that a request that wrote pins the browser to the primary"""
+        response = self.client.post(reverse('refresh_salary_report', args=[self.first.id]))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.listed_reports(), {self.first.id, self.second.id})
+
+    def test_reads_without_writes_do_not_pin(self):
+        """Test that read-only requests leave the browser on the replica"""
+        response = self.client.get(reverse('list_salary_reports'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_router_aliases(self):
+        """Test that writes use the primary and pin the reads that follow"""
+        inspector = Inspector(user=self.admin)
+        with primary_pin(False):
+            self.assertEqual(inspector.view_teachers().db, ALIAS)
+            with replica_reads():
+                self.assertEqual(SalaryReport.objects.all().db, ALIAS)
+                self.second.save()
+                self.assertEqual(SalaryReport.objects.all().db, 'default')
+            self.assertEqual(inspector.view_students().db, 'default')
+        # Outside @read_from_replica views everything stays on the primary
+        self.assertEqual(Teacher.objects.all().db, 'default')
+
+    def test_test_mirror_setting_keeps_the_replica(self):
+        """Test that a replica configured like settings.py, with TEST.MIRROR, is still read from"""
+        settings_dict = connections[ALIAS].settings_dict
+        settings_dict['TEST'] = dict(settings_dict['TEST'], MIRROR='default')
+        self.assertEqual(replica_alias(), ALIAS)
+        self.assertEqual(self.listed_reports(), {self.first.id})
+
+        # Only once the test runner points the mirror at the primary's database
+        connections[ALIAS].close()
+        settings_dict['NAME'] = connections['default'].settings_dict['NAME']
+        self.assertEqual(replica_alias(), 'default')
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_no_replica_configured(self):
+        """Test that everything reads from the primary without a replica"""
+        self.assertEqual(self.listed_reports(), {self.first.id, self.second.id})
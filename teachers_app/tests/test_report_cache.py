@@ -0,0 +1,78 @@
+from django.test import TestCase
+from django.utils import timezone
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession
+from ..report_cache import salary_report_cache
+from ..services import SalaryCalculationService
+
+
+class SalaryReportCacheTestCase(TestCase):
+    def setUp(self):
+        salary_report_cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='cache_teacher',
+            password='testpass',
+            is_teacher=True
+        )
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.now = timezone.now()
+        self.session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+
+    def calculate(self):
+        return SalaryCalculationService.calculate_salary_cached(self.teacher, self.now.year, self.now.month)
+
+    def test_repeat_lookups_hit_the_cache(self):
+        """Test that an unchanged month is computed once"""
+        first = self.calculate()
+        with self.assertNumQueries(0):
+            second = self.calculate()
+        self.assertEqual(first, second)
+        self.assertEqual(salary_report_cache.stats()['hits'], 1)
+        self.assertEqual(salary_report_cache.stats()['misses'], 1)
+
+    def change(self, action):
+        """Run action and its on-commit version bumps, as a committed request would"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return action()
+
+    def test_session_and_task_changes_invalidate(self):
+        """Test that edits, soft deletes, hard deletes and task changes bump the version"""
+        self.assertEqual(self.calculate()['total_salary'], Decimal('40.00'))
+
+        self.session.manual_hours = Decimal('3.00')
+        self.change(self.session.save)
+        self.assertEqual(self.calculate()['total_salary'], Decimal('60.00'))
+
+        self.task.hourly_rate = Decimal('10.00')
+        self.change(self.task.save)
+        self.assertEqual(self.calculate()['total_salary'], Decimal('30.00'))
+
+        self.session.is_deleted = True
+        self.session.deleted_at = timezone.now()
+        self.change(self.session.save)
+        self.assertEqual(self.calculate()['total_salary'], Decimal('0.00'))
+
+        other = self.change(lambda: WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+        ))
+        self.assertEqual(self.calculate()['total_salary'], Decimal('10.00'))
+        self.change(other.delete)
+        self.assertEqual(self.calculate()['total_salary'], Decimal('0.00'))
+        self.assertEqual(salary_report_cache.stats()['hits'], 0)
+
+    def test_version_is_bumped_on_commit(self):
+        """Test that a reader inside the writing transaction still sees the old version"""
+        version = salary_report_cache.get_version(self.teacher.id, self.now.year, self.now.month)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.session.manual_hours = Decimal('3.00')
+            self.session.save()
+            self.assertEqual(salary_report_cache.get_version(self.teacher.id, self.now.year, self.now.month),
+                             version)
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(salary_report_cache.get_version(self.teacher.id, self.now.year, self.now.month),
+                            version)
@@ -0,0 +1,41 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..middleware import percentile, request_metrics
+from ..models import CustomUser
+
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        request_metrics.clear()
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        self.client.force_login(self.admin)
+
+    def test_requests_are_recorded_per_url_name(self):
+        """Test that each request adds a sample for its URL name"""
+        for _ in range(3):
+            self.client.get(reverse('manage_tasks'))
+        response = self.client.get(reverse('request_metrics_json'))
+        metrics = {row['url_name']: row for row in response.json()['metrics']}
+
+        self.assertEqual(metrics['manage_tasks']['requests'], 3)
+        self.assertGreater(metrics['manage_tasks']['queries']['max'], 0)
+        self.assertGreaterEqual(metrics['manage_tasks']['wall_ms']['p99'], metrics['manage_tasks']['db_ms']['p50'])
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled_middleware_records_nothing(self):
+        """Test that the setting turns recording off"""
+        self.client.get(reverse('manage_tasks'))
+        self.assertEqual(request_metrics.summary(), [])
+
+    def test_dashboard_is_superuser_only(self):
+        """Test that teachers cannot see the metrics page"""
+        teacher = CustomUser.objects.create_user(username='teacher', password='testpass', is_teacher=True)
+        self.client.force_login(teacher)
+        self.assertEqual(self.client.get(reverse('request_metrics')).status_code, 302)
+
+    def test_percentile_uses_nearest_rank(self):
+        """Test the percentile helper on known values"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
@@ -0,0 +1,116 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession, SalaryReport
+from ..services import SalaryCalculationService, TeacherMonthSummaryService
+
+
+class SalaryCalculationTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='calc_teacher',
+            password='testpass',
+            is_teacher=True
+        )
+        self.teacher = Teacher.objects.create(user=self.user, subjects='Math')
+        self.lesson = Task.objects.create(name="Lesson", hourly_rate=Decimal('15.00'))
+        self.grading = Task.objects.create(name="Grading", hourly_rate=Decimal('10.00'))
+        self.now = timezone.now()
+
+    def add_sessions(self, count):
+        for i in range(count):
+            WorkSession.objects.create(
+                teacher=self.teacher,
+                task=self.lesson,
+                entry_type='manual',
+                manual_hours=Decimal('1.50')
+            )
+            clock_in = self.now - timezone.timedelta(hours=3)
+            WorkSession.objects.create(
+                teacher=self.teacher,
+                task=self.grading,
+                entry_type='clock',
+                clock_in=clock_in,
+                clock_out=clock_in + timezone.timedelta(hours=1, minutes=40)
+            )
+
+    def test_summaries_and_details(self):
+        """Test that totals follow the stored hours and rounding rules"""
+        self.add_sessions(2)
+        data = SalaryCalculationService.calculate_salary(self.teacher, self.now.year, self.now.month)
+
+        self.assertEqual(data['task_summaries'], [
+            {'task_name': 'Lesson', 'hours': 3.0, 'rate': Decimal('15.00'), 'total': Decimal('45.00')},
+            {'task_name': 'Grading', 'hours': 4.0, 'rate': Decimal('10.00'), 'total': Decimal('40.00')},
+        ])
+        self.assertEqual(data['total_salary'], Decimal('85.00'))
+        self.assertEqual(data['period'], self.now.strftime('%B %Y'))
+        self.assertEqual(len(data['session_details']), 4)
+
+        session = WorkSession.objects.filter(entry_type='clock').first()
+        detail = next(d for d in data['session_details'] if d['entry_type'] == 'clock')
+        self.assertEqual(detail['hours'], 2.0)
+        self.assertEqual(detail['total'], Decimal('20.00'))
+        self.assertEqual(detail['notes'], str(session))
+
+    def test_query_count_is_constant(self):
+        """Test that the number of queries does not grow with the sessions"""
+        self.add_sessions(1)
+        with self.assertNumQueries(2):
+            SalaryCalculationService.calculate_salary(self.teacher, self.now.year, self.now.month)
+
+        self.add_sessions(25)
+        with self.assertNumQueries(2):
+            SalaryCalculationService.calculate_salary(self.teacher, self.now.year, self.now.month)
+
+    def test_bulk_matches_single_calculation(self):
+        """Test that bulk totals agree with calculate_salary for every pair"""
+        self.add_sessions(2)
+        last_month = (self.now.replace(day=1) - timezone.timedelta(days=1))
+        TeacherMonthSummaryService.update_sessions(
+            WorkSession.objects.filter(task=self.lesson), created_at=last_month
+        )
+
+        pairs = [
+            (self.teacher, self.now.year, self.now.month),
+            (self.teacher.id, last_month.year, last_month.month),
+            (self.teacher, 2000, 1),
+        ]
+        with self.assertNumQueries(1):
+            totals = SalaryCalculationService.calculate_salaries_bulk(pairs)
+
+        for _, year, month in pairs:
+            expected = SalaryCalculationService.calculate_salary(self.teacher, year, month)
+            self.assertEqual(len(expected['task_summaries']), 0 if year == 2000 else 1)
+            self.assertEqual(totals[(self.teacher.id, year, month)]['total_salary'], expected['total_salary'])
+        self.assertEqual(totals[(self.teacher.id, 2000, 1)]['total_salary'], Decimal('0.00'))
+
+    def test_report_list_query_count_is_constant(self):
+        """Test that the salary report list does not query once per report"""
+        admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        self.client.force_login(admin)
+        self.add_sessions(1)
+
+        def add_reports(months):
+            for month in months:
+                start = timezone.make_aware(timezone.datetime(2024, month, 1))
+                SalaryReport.objects.create(
+                    teacher=self.teacher,
+                    start_date=start,
+                    end_date=start + timezone.timedelta(days=27),
+                    created_by=admin
+                )
+
+        add_reports([1])
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('list_salary_reports'))
+        add_reports(range(2, 13))
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse('list_salary_reports'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['reports']), 12)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
@@ -0,0 +1,81 @@
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession, SalaryReport
+from ..report_cache import salary_report_cache
+from ..services import SalaryCalculationService
+
+
+class SalaryReportSnapshotTestCase(TestCase):
+    def setUp(self):
+        salary_report_cache.clear()
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        self.user = CustomUser.objects.create_user(
+            username='report_teacher',
+            password='testpass',
+            is_teacher=True
+        )
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.now = timezone.now()
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        self.report_url = reverse('view_salary_report', kwargs={
+            'teacher_id': self.teacher.id, 'year': self.now.year, 'month': self.now.month
+        })
+
+    def test_create_view_fills_totals_and_snapshot(self):
+        """Test that creating a report stores its totals and frozen details"""
+        self.client.force_login(self.admin)
+        self.client.post(reverse('create_salary_report'), {
+            'teacher': self.teacher.id, 'year': self.now.year, 'month': self.now.month, 'notes': ''
+        })
+        report = SalaryReport.objects.get()
+        self.assertEqual(report.total_hours, Decimal('2.00'))
+        self.assertEqual(report.total_amount, Decimal('40.00'))
+        self.assertFalse(report.is_stale)
+        self.assertEqual(report.snapshot_data()['total_salary'], Decimal('40.00'))
+        self.assertEqual(len(report.snapshot_data()['session_details']), 1)
+
+    def test_create_view_replaces_the_months_report(self):
+        """Test that creating a report soft-deletes the month's earlier one, whatever created it"""
+        earlier = SalaryReport.create_for_month(self.teacher, self.now.year, self.now.month, self.admin)
+        self.client.force_login(self.admin)
+        self.client.post(reverse('create_salary_report'), {
+            'teacher': self.teacher.id, 'year': self.now.year, 'month': self.now.month, 'notes': 'Final'
+        })
+        earlier.refresh_from_db()
+        self.assertTrue(earlier.is_deleted)
+        live = SalaryReport.objects.get(is_deleted=False)
+        self.assertEqual(live.notes, 'Final')
+        self.assertEqual((live.start_date, live.end_date), (earlier.start_date, earlier.end_date))
+
+    def test_viewing_a_report_does_not_recompute(self):
+        """Test that the report page renders from the snapshot"""
+        SalaryReport.create_for_month(self.teacher, self.now.year, self.now.month, self.admin)
+        self.client.force_login(self.admin)
+        with mock.patch.object(SalaryCalculationService, 'calculate_salary', side_effect=AssertionError):
+            response = self.client.get(self.report_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report_data']['total_salary'], Decimal('40.00'))
+
+    def test_session_changes_mark_report_stale_until_refreshed(self):
+        """Test that a new session flags the report and refreshing clears it"""
+        report = SalaryReport.create_for_month(self.teacher, self.now.year, self.now.month, self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+            )
+        report.refresh_from_db()
+        self.assertTrue(report.is_stale)
+
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('refresh_salary_report', args=[report.id]))
+        self.assertRedirects(response, self.report_url)
+        report.refresh_from_db()
+        self.assertFalse(report.is_stale)
+        self.assertEqual(report.total_amount, Decimal('60.00'))
+        self.assertEqual(report.snapshot_data()['total_salary'], Decimal('60.00'))
@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+from importlib import import_module
+from asgiref.sync import async_to_sync
+from io import StringIO
+from decimal import Decimal
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..models import CustomUser, Teacher, Task
+
+STRATEGIES = ['db', 'cached_db', 'signed_cookies', 'file']
+
+
+def session_writes(context):
+    return [q['sql'] for q in context.captured_queries
+            if '"django_session"' in q['sql'] and not q['sql'].startswith('SELECT')]
+
+
+class SessionBackendsTestCase(TestCase):
+    def store(self, strategy, session_key=None):
+        return import_module(f'teachers_app.session_backends.{strategy}').SessionStore(session_key)
+
+    def test_unchanged_session_not_saved(self):
+        """Test that re-assigning the stored values does not write the session"""
+        for strategy in ('db', 'cached_db'):
+            session = self.store(strategy)
+            session['role'] = 'teacher'
+            session.save()
+
+            session = self.store(strategy, session.session_key)
+            session['role'] = 'teacher'
+            self.assertTrue(session.modified)
+            with CaptureQueriesContext(connection) as context:
+                session.save()
+            self.assertEqual(session_writes(context), [], strategy)
+
+            session['role'] = 'student'
+            with CaptureQueriesContext(connection) as context:
+                session.save()
+            self.assertEqual(len(session_writes(context)), 1, strategy)
+            self.assertEqual(self.store(strategy, session.session_key)['role'], 'student')
+
+    def test_unchanged_session_loaded_async_not_saved(self):
+        """Test that a session read through aget(), as async requests do, is not rewritten unchanged"""
+        for strategy in ('db', 'cached_db'):
+            session = self.store(strategy)
+            session['role'] = 'teacher'
+            session.save()
+
+            session = self.store(strategy, session.session_key)
+            self.assertEqual(async_to_sync(session.aget)('role'), 'teacher')
+            async_to_sync(session.aset)('role', 'teacher')
+            with CaptureQueriesContext(connection) as context:
+                session.save()
+                async_to_sync(session.asave)()
+            self.assertEqual(session_writes(context), [], strategy)
+
+            async_to_sync(session.aset)('role', 'student')
+            with CaptureQueriesContext(connection) as context:
+                async_to_sync(session.asave)()
+            self.assertEqual(len(session_writes(context)), 1, strategy)
+
+    def test_unchanged_file_session_not_rewritten(self):
+        """Test that the file store leaves an unchanged session's file alone"""
+        session = self.store('file')
+        session['role'] = 'teacher'
+        session.save()
+        self.addCleanup(session.delete)
+        path = session._key_to_file()
+        # The file's age is the session's age, so only back-date it a little
+        saved_at = int(timezone.now().timestamp()) - 60
+        os.utime(path, (saved_at, saved_at))
+        session = self.store('file', session.session_key)
+        session['role'] = 'teacher'
+        session.save()
+        self.assertEqual(os.path.getmtime(path), saved_at)
+
+    def test_every_strategy_signs_in_and_out(self):
+        """Test that each session strategy keeps a teacher signed in until logout"""
+        user = CustomUser.objects.create_user(username='session_teacher', password='testpass', is_teacher=True)
+        Teacher.objects.create(user=user)
+        for strategy in STRATEGIES:
+            with self.settings(SESSION_ENGINE=f'teachers_app.session_backends.{strategy}'):
+                # A new client, so SessionMiddleware is built with this engine
+                client = Client()
+                client.force_login(user)
+                self.assertEqual(client.get(reverse('teachers_dashboard')).status_code, 200, strategy)
+                with CaptureQueriesContext(connection) as context:
+                    client.get(reverse('teachers_dashboard'))
+                # Reading pages never writes the session
+                self.assertEqual(session_writes(context), [], strategy)
+                client.post(reverse('logout'))
+                response = client.get(reverse('teachers_dashboard'))
+                self.assertEqual(response.status_code, 302, strategy)
+
+    def test_prune_sessions(self):
+        """Test that only expired sessions are pruned, in batches"""
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'expired{i}', session_data='', expire_date=now - timezone.timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timezone.timedelta(days=1))
+
+        out = StringIO()
+        call_command('prune_sessions', '--dry-run', stdout=out)
+        self.assertIn('would prune 5 expired sessions', out.getvalue())
+        self.assertEqual(Session.objects.count(), 6)
+
+        out = StringIO()
+        call_command('prune_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn('Pruned 2 sessions\nPruned 4 sessions\nPruned 5 sessions', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+        # Nothing is kept server-side for signed cookies
+        with self.settings(SESSION_ENGINE='teachers_app.session_backends.signed_cookies'):
+            call_command('prune_sessions', stdout=StringIO())
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class SessionBenchmarkTestCase(TransactionTestCase):
+    """
+    Worker threads need committed data, hence no TestCase. The in-memory
+    test database locks whole tables without waiting, so one worker only.
+    """
+
+    def test_benchmark_compares_strategies(self):
+        """Test that the benchmark counts session writes per strategy and cleans up"""
+        Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, 'results.json')
+            call_command('benchmark_sessions', '--iterations', '2', '--writers', '1', '--browsers', '0',
+                         '--strategy', 'db', '--strategy', 'signed_cookies', '--output', output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)
+
+        self.assertEqual(set(results['strategies']), {'db', 'signed_cookies'})
+        for stats in results['strategies'].values():
+            self.assertEqual(stats['errors'], 0)
+            self.assertEqual(stats['clock_writes']['runs'], 4)
+        self.assertGreater(results['strategies']['db']['session_writes'], 0)
+        self.assertEqual(results['strategies']['signed_cookies']['session_writes'], 0)
+        self.assertFalse(CustomUser.objects.exists())
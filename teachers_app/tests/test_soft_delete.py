@@ -0,0 +1,82 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession, TeacherMonthSummary
+
+
+class WorkSessionSoftDeleteTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        user = CustomUser.objects.create_user(username='trash_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        self.client.force_login(self.admin)
+
+    def test_delete_moves_to_trash_and_restore_brings_back(self):
+        """Test that deleting hides a session from the default manager and the ledger until restored"""
+        response = self.client.post(reverse('delete_work_session', args=[self.session.id]))
+        self.assertRedirects(response, reverse('superuser_list_work_sessions'))
+        self.assertFalse(WorkSession.objects.exists())
+        self.assertTrue(WorkSession.all_objects.deleted().filter(id=self.session.id).exists())
+        self.assertFalse(TeacherMonthSummary.objects.exists())
+
+        response = self.client.get(reverse('work_session_trash'))
+        self.assertContains(response, 'trash_teacher')
+
+        self.client.post(reverse('restore_work_session', args=[self.session.id]))
+        restored = WorkSession.objects.get()
+        self.assertIsNone(restored.deleted_at)
+        self.assertEqual(TeacherMonthSummary.objects.get().hours, Decimal('2.00'))
+
+    def test_purge_view_and_command(self):
+        """Test that purging only removes trashed rows, per row or in batches past the retention period"""
+        response = self.client.post(reverse('purge_work_session', args=[self.session.id]))
+        self.assertEqual(response.status_code, 404)
+
+        self.session.delete()
+        self.client.post(reverse('purge_work_session', args=[self.session.id]))
+        self.assertFalse(WorkSession.all_objects.exists())
+
+        old = [
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+            )
+            for _ in range(3)
+        ]
+        for session in old:
+            session.delete()
+        WorkSession.all_objects.update(deleted_at=timezone.now() - timezone.timedelta(days=40))
+        recent = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+        )
+        recent.delete()
+        live = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+        )
+
+        out = StringIO()
+        call_command('purge_deleted_sessions', '--older-than-days', '30', '--batch-size', '2', stdout=out)
+        self.assertIn('Purged 3 work sessions deleted before', out.getvalue())
+        self.assertEqual(set(WorkSession.all_objects.values_list('id', flat=True)), {recent.id, live.id})
+        self.assertEqual(TeacherMonthSummary.objects.get().session_count, 1)
+
+    def test_admin_bulk_delete_trashes_then_purges(self):
+        """Test that the admin's "delete selected" goes through the model's soft and hard delete"""
+        other = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+        )
+        url = reverse('admin:teachers_app_worksession_changelist')
+        selected = {'action': 'delete_selected', 'post': 'yes', '_selected_action': [self.session.id, other.id]}
+        self.assertEqual(self.client.post(url, selected).status_code, 302)
+        self.assertEqual(WorkSession.all_objects.deleted().count(), 2)
+        self.assertFalse(TeacherMonthSummary.objects.exists())
+
+        self.client.post(url, selected)
+        self.assertFalse(WorkSession.all_objects.exists())
+        self.assertFalse(TeacherMonthSummary.objects.exists())
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from django.db import connection, connections, transaction
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+from ..db import sqlite_pragmas
+
+ALIAS = 'sqlite_profile_test'
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite connection profile')
+class SQLiteProfileTestCase(SimpleTestCase):
+    """Exercise the production SQLite settings against a real database file"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        # Same engine and OPTIONS as the default database, but on a file so
+        # several threads really contend for the write lock
+        self.settings_dict = dict(
+            connections['default'].settings_dict, NAME=os.path.join(tmpdir.name, 'profile.sqlite3')
+        )
+        self.open_connection()
+        self.addCleanup(self.close_connection)
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)')
+            cursor.execute('INSERT INTO counter (id, value) VALUES (1, 0)')
+
+    def open_connection(self):
+        """Give the calling thread its own connection to the database file under ALIAS"""
+        backend = load_backend(self.settings_dict['ENGINE'])
+        connections[ALIAS] = backend.DatabaseWrapper(dict(self.settings_dict), ALIAS)
+
+    def close_connection(self):
+        connections[ALIAS].close()
+        del connections[ALIAS]
+
+    def test_pragmas_applied_on_connect(self):
+        """Test that every new connection gets WAL, busy_timeout and the other pragmas"""
+        pragmas = sqlite_pragmas(connections[ALIAS])
+        self.assertEqual(pragmas['journal_mode'], 'wal')
+        self.assertGreater(pragmas['busy_timeout'], 0)
+        self.assertEqual(pragmas['synchronous'], 1)  # NORMAL
+        self.assertEqual(pragmas['temp_store'], 2)  # MEMORY
+        self.assertEqual(connections[ALIAS].transaction_mode, 'IMMEDIATE')
+
+    def test_rollback_journal_files_stay_out_of_wal(self):
+        """Test that a file listed in SQLITE_ROLLBACK_JOURNAL_DATABASES keeps its journal mode"""
+        path = os.path.join(os.path.dirname(self.settings_dict['NAME']), 'committed.sqlite3')
+        self.settings_dict = dict(self.settings_dict, NAME=path)
+        with self.settings(SQLITE_ROLLBACK_JOURNAL_DATABASES=[path]):
+            self.close_connection()
+            self.open_connection()
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'delete')
+            self.assertNotIn('journal_mode', sqlite_pragmas(connections[ALIAS]))
+            self.assertGreater(sqlite_pragmas(connections[ALIAS])['busy_timeout'], 0)
+
+    def test_concurrent_writers_do_not_fail(self):
+        """Test that writer threads doing read-then-write transactions all succeed"""
+        threads_count, increments = 8, 25
+        errors = []
+        start = threading.Barrier(threads_count)
+
+        def writer():
+            self.open_connection()
+            try:
+                start.wait()
+                for _ in range(increments):
+                    # Read then write: under BEGIN DEFERRED two of these deadlock
+                    # on the lock upgrade and one fails with "database is locked"
+                    with transaction.atomic(using=ALIAS):
+                        with connections[ALIAS].cursor() as cursor:
+                            cursor.execute('SELECT value FROM counter WHERE id = 1')
+                            value = cursor.fetchone()[0]
+                            time.sleep(0.001)  # Let the other writers interleave
+                            cursor.execute('UPDATE counter SET value = %s WHERE id = 1', [value + 1])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                self.close_connection()
+
+        threads = [threading.Thread(target=writer) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('SELECT value FROM counter WHERE id = 1')
+            self.assertEqual(cursor.fetchone()[0], threads_count * increments)
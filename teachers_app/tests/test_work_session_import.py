@@ -0,0 +1,94 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession, TeacherMonthSummary
+from ..services import WorkSessionImportService
+
+HEADER = 'teacher,task,entry_type,manual_hours,clock_in,clock_out,start_time,end_time,date\n'
+
+
+class WorkSessionImportTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        user = CustomUser.objects.create_user(username='import_teacher', password='testpass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=user)
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_csv(self, text):
+        path = os.path.join(self.tmpdir.name, 'sessions.csv')
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_command_imports_valid_rows_and_reports_rejects(self):
+        """Test that valid rows are inserted with derived fields and bad rows are reported"""
+        path = self.write_csv(
+            HEADER
+            + 'import_teacher,Lesson,manual,1.50,,,,,2024-03-05\n'
+            + f'{self.teacher.id},{self.task.id},clock,,2024-03-06T09:00,2024-03-06T10:40,,,\n'
+            + 'import_teacher,Lesson,time_range,,,,2024-04-01 14:00,2024-04-01 16:00,\n'
+            + 'nobody,Lesson,manual,1,,,,,\n'
+            + 'import_teacher,Lesson,clock,,2024-03-06T10:00,2024-03-06T09:00,,,\n'
+            + 'import_teacher,Lesson,manual,lots,,,,,\n'
+        )
+        rejects = os.path.join(self.tmpdir.name, 'rejects.csv')
+        out = StringIO()
+        call_command('import_work_sessions', path, '--batch-size', '2', '--rejects', rejects, stdout=out)
+        self.assertIn('Imported 3 work sessions, rejected 3 rows', out.getvalue())
+
+        sessions = WorkSession.objects.order_by('created_at')
+        self.assertEqual([s.stored_hours for s in sessions], [Decimal('1.50'), Decimal('2.00'), Decimal('2.00')])
+        self.assertEqual([s.total_amount for s in sessions], [Decimal('30.00'), Decimal('40.00'), Decimal('40.00')])
+        self.assertEqual([(s.created_at.month, s.created_at.day) for s in sessions], [(3, 5), (3, 6), (4, 1)])
+        self.assertEqual(TeacherMonthSummary.objects.get(month=3).amount, Decimal('70.00'))
+
+        with open(rejects) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['row'] for row in rows], ['5', '6', '7'])
+        self.assertIn("Unknown teacher 'nobody'", rows[0]['errors'])
+        self.assertIn('Clock out must be after clock in', rows[1]['errors'])
+        self.assertIn("Invalid number 'lots'", rows[2]['errors'])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that an import runs the same number of queries for 5 and 50 rows in one batch"""
+        def run(count):
+            rows = [
+                {'teacher': 'import_teacher', 'task': 'Lesson', 'entry_type': 'manual', 'manual_hours': '1'}
+                for _ in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                created, rejected = WorkSessionImportService.import_rows(rows, batch_size=100)
+            self.assertEqual((created, rejected), (count, []))
+            return len(queries)
+
+        run(1)  # Creates the month's ledger row; later imports only update it
+        self.assertEqual(run(5), run(50))
+        self.assertEqual(TeacherMonthSummary.objects.get().session_count, 56)
+
+    def test_upload_page(self):
+        """Test that the upload page imports a file and lists rejected rows"""
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('sessions.csv', (
+            HEADER
+            + 'import_teacher,Lesson,manual,2,,,,,\n'
+            + 'import_teacher,Grading,manual,2,,,,,\n'
+        ).encode())
+        response = self.client.post(reverse('import_work_sessions'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result']['created'], 1)
+        self.assertContains(response, "Unknown task &#x27;Grading&#x27;")
+        self.assertEqual(WorkSession.objects.count(), 1)
+
+        upload = SimpleUploadedFile('bad.csv', b'name,hours\nx,1\n')
+        response = self.client.post(reverse('import_work_sessions'), {'file': upload})
+        self.assertContains(response, 'Missing columns: teacher, task, entry_type')
@@ -0,0 +1,65 @@
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from ..models import CustomUser, Teacher, Task, WorkSession
+from ..services import TeacherMonthSummaryService, WorkSessionListService
+
+
+class WorkSessionListTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='adminpass')
+        self.task = Task.objects.create(name="Lesson", hourly_rate=Decimal('20.00'))
+        self.teachers = []
+        for name in ('list_a', 'list_b'):
+            user = CustomUser.objects.create_user(username=name, password='testpass', is_teacher=True)
+            self.teachers.append(Teacher.objects.create(user=user))
+        for i in range(7):
+            WorkSession.objects.create(
+                teacher=self.teachers[i % 2], task=self.task, entry_type='manual', manual_hours=Decimal('1.50')
+            )
+        # Two sessions sharing a timestamp must still page in a stable order
+        first_two = WorkSession.objects.order_by('id').values_list('id', flat=True)[:2]
+        TeacherMonthSummaryService.update_sessions(
+            WorkSession.objects.filter(id__in=list(first_two)), created_at=timezone.now() - timezone.timedelta(days=1)
+        )
+        self.newest_first = list(WorkSession.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_keyset_pages_cover_every_session_once(self):
+        """Test that walking older and then newer pages visits each session exactly once"""
+        sessions = WorkSessionListService.filter_sessions()
+        seen, pages, after = [], [], None
+        while True:
+            rows, newer, older = WorkSessionListService.page(sessions, after=after, size=3)
+            pages.append((rows, newer))
+            seen.extend(row.id for row in rows)
+            if not older:
+                break
+            after = WorkSessionListService.decode_cursor(older)
+        self.assertEqual(seen, self.newest_first)
+        self.assertEqual(len(pages), 3)
+
+        rows, _, _ = WorkSessionListService.page(
+            sessions, before=WorkSessionListService.decode_cursor(pages[2][1]), size=3
+        )
+        self.assertEqual([row.id for row in rows], [row.id for row in pages[1][0]])
+        self.assertIsNone(WorkSessionListService.decode_cursor('not-a-cursor'))
+
+    def test_view_filters_and_totals(self):
+        """Test that the list view filters by teacher, pages and totals every matching session"""
+        self.client.force_login(self.admin)
+        with mock.patch.object(WorkSessionListService, 'PAGE_SIZE', 2):
+            response = self.client.get(reverse('superuser_list_work_sessions'), {'teacher': self.teachers[0].id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['work_sessions']), 2)
+        self.assertIsNone(response.context['newer_cursor'])
+        self.assertIsNotNone(response.context['older_cursor'])
+        self.assertEqual(response.context['totals'], {
+            'count': 4, 'hours': Decimal('6.00'), 'amount': Decimal('120.00')
+        })
+        self.assertContains(response, f"teacher={self.teachers[0].id}&after=")
+
+        response = self.client.get(reverse('superuser_list_work_sessions'), {'entry_type': 'clock'})
+        self.assertEqual(response.context['totals']['count'], 0)
+        self.assertContains(response, 'No work sessions found.')
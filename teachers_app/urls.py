@@ -1,6 +1,6 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api_views, views
 from .service_views import manage_services, add_service, edit_service, delete_service
 
 urlpatterns = [
@@ -11,12 +11,18 @@ urlpatterns = [
     path('dashboard/superuser/work-sessions/', views.list_work_sessions, name='superuser_list_work_sessions'),
     path('dashboard/superuser/work-sessions/<int:session_id>/edit/', views.edit_work_session, name='edit_work_session'),
     path('dashboard/superuser/work-sessions/<int:session_id>/delete/', views.delete_work_session, name='delete_work_session'),
+    path('dashboard/superuser/work-sessions/trash/', views.work_session_trash, name='work_session_trash'),
+    path('dashboard/superuser/work-sessions/import/', views.import_work_sessions, name='import_work_sessions'),
+    path('dashboard/superuser/work-sessions/<int:session_id>/restore/', views.restore_work_session, name='restore_work_session'),
+    path('dashboard/superuser/work-sessions/<int:session_id>/purge/', views.purge_work_session, name='purge_work_session'),
     path('dashboard/superuser/edit-student/<int:student_id>/', views.edit_student, name='edit_student'),
     path('', views.dashboard_redirect, name='dashboard'),  # Root path now uses dynamic redirect
     path('dashboard/teachers/', views.teachers_dashboard, name='teachers_dashboard'),
     path('dashboard/student/', views.student_dashboard, name='student_dashboard'),
     path('dashboard/student/edit-profile/', views.edit_own_profile, name='edit_own_profile'),
     path('dashboard/superuser/', views.superuser_dashboard, name='superuser_dashboard'),
+    path('dashboard/superuser/request-metrics/', views.request_metrics_dashboard, name='request_metrics'),
+    path('dashboard/superuser/request-metrics.json', views.request_metrics_json, name='request_metrics_json'),
     path('change-password/', views.change_password, name='change_password'),
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(
@@ -40,6 +46,16 @@ urlpatterns = [
     path('record-work/', views.record_work, name='record_work'),  # For teachers recording their own work
     path('record-work/<int:teacher_id>/', views.record_work, name='record_work_with_teacher'),
     path('clock-out/<int:session_id>/', views.clock_out, name='clock_out'),
+    path('api/kiosk/clock/', views.kiosk_clock, name='kiosk_clock'),
+    path('api/kiosk/sync/', views.kiosk_sync, name='kiosk_sync'),
+    path('api/sessions/', api_views.sessions, name='api_sessions'),
+    path('api/sessions/<int:session_id>/', api_views.session_detail, name='api_session_detail'),
+    path('api/tasks/', api_views.tasks, name='api_tasks'),
+    path('api/tasks/<int:task_id>/', api_views.task_detail, name='api_task_detail'),
+    path('api/teachers/', api_views.teachers, name='api_teachers'),
+    path('api/teachers/<int:teacher_id>/', api_views.teacher_detail, name='api_teacher_detail'),
+    path('api/salary-reports/', api_views.salary_reports, name='api_salary_reports'),
+    path('api/salary-reports/<int:report_id>/', api_views.salary_report_detail, name='api_salary_report_detail'),
     path('dashboard/recent-work-sessions/<int:teacher_id>/', views.recent_work_sessions, name='recent_work_sessions'),
 
     # Salary Report URLs
@@ -49,6 +65,8 @@ urlpatterns = [
     path('superuser/salary-reports/<int:teacher_id>/<int:year>/<int:month>/', views.view_salary_report,
          name='view_salary_report'),
     path('superuser/salary-reports/<int:report_id>/delete/', views.delete_salary_report, name='delete_salary_report'),
+    path('superuser/salary-reports/<int:report_id>/refresh/', views.refresh_salary_report, name='refresh_salary_report'),
+    path('superuser/payroll-export/', views.export_payroll, name='export_payroll'),
     path('dashboard/teacher/salary-reports/', views.teacher_salary_reports, name='teacher_salary_reports'),
     path('dashboard/teacher/salary-reports/<int:teacher_id>/<int:year>/<int:month>/', views.view_salary_report, name='teacher_view_salary_report'),
 ]
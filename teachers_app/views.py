@@ -1,20 +1,34 @@
+import csv
+import hashlib
+import io
+import json
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django import forms
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import IntegrityError, transaction
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
 from django.core.exceptions import PermissionDenied
-from django.http import Http404
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.middleware.csrf import get_token
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 def teacher_or_superuser(function=None, login_url=None, redirect_field_name=None):
     """
     Decorator that ensures the user is either a superuser or the teacher themselves.
+    ProfileBackend loaded the teacher profile with the user, so this costs no query.
     """
     actual_decorator = user_passes_test(
-        lambda u: u.is_superuser or (hasattr(u, 'teacher') and u.is_authenticated),
+        lambda u: u.is_superuser or (u.is_authenticated and hasattr(u, 'teacher')),
         login_url=login_url,
         redirect_field_name=redirect_field_name
     )
@@ -25,9 +39,13 @@ def teacher_or_superuser(function=None, login_url=None, redirect_field_name=None
 from .forms import (
     CustomPasswordChangeForm, TeacherCreationForm, TaskForm,
     WorkSessionManualForm, WorkSessionClockForm, WorkSessionTimeRangeForm, WorkSessionFilterForm, AddTeacherForm,
-    ChangeTeacherPasswordForm, SalaryReportForm, StudentCreationForm, EditStudentForm, ChangeStudentPasswordForm
+    ChangeTeacherPasswordForm, SalaryReportForm, StudentCreationForm, EditStudentForm, ChangeStudentPasswordForm,
+    PayrollExportForm, WorkSessionImportForm
+)
+from .models import (
+    Teacher, CustomUser, KioskToken, Task, WorkSession, SalaryReport, Student, TeacherMonthSummary,
+    seconds_to_hours, cents_to_amount
 )
-from .models import Teacher, CustomUser, Task, WorkSession, SalaryReport, Student
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
@@ -38,7 +56,12 @@ def view_deactivated_students(request):
     }
     return render(request, 'superuser/view_deactivated_students.html', context)
 
-from .services import SalaryCalculationService
+from .services import (
+    SalaryCalculationService, PayrollExportService, WorkSessionListService, WorkSessionImportService,
+    KioskSyncService, PageValidatorService
+)
+from .middleware import request_metrics
+from .routers import primary_reads, read_from_replica
 
 
 def is_superuser(user):
@@ -49,19 +72,86 @@ def is_teacher(user):
     return user.is_teacher
 
 
+def own_teacher(request):
+    """The signed-in user's Teacher profile, or 404"""
+    if isinstance(request.profile, Teacher):
+        return request.profile
+    # A teacher profile behind another role, e.g. a student who also teaches
+    return get_object_or_404(Teacher.objects.select_related('user'), user=request.user)
+
+
+async def aown_teacher(request):
+    """own_teacher() for async views"""
+    if isinstance(request.profile, Teacher):
+        return request.profile
+    return await aget_object_or_404(Teacher.objects.select_related('user'), user=await request.auser())
+
+
+def conditional_page(validator):
+    """
+    Answer conditional GETs with 304 Not Modified before the view runs.
+
+    validator(request, *args, **kwargs) returns PageValidatorService's
+    (last_modified, state) for what the page shows, or None to always
+    render. The ETag also covers the user and their CSRF cookie, which
+    end up in the HTML too. Works for sync and async views, unlike
+    django.views.decorators.http.condition, whose validators cannot query
+    the database from async views.
+    """
+    def check(request, *args, **kwargs):
+        """Return (304 response or None, ETag, Last-Modified timestamp)"""
+        if request.method not in ('GET', 'HEAD'):
+            return None, None, None
+        page = validator(request, *args, **kwargs)
+        if page is None:
+            return None, None, None
+        last_modified, state = page
+        get_token(request)  # Settles the CSRF secret the page's forms would get
+        key = repr((request.user.pk, request.META['CSRF_COOKIE'], state))
+        etag = quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+        timestamp = int(last_modified.timestamp())
+        return get_conditional_response(request, etag=etag, last_modified=timestamp), etag, timestamp
+
+    def finish(response, etag, timestamp):
+        if etag and response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(timestamp))
+        # Browsers revalidate every time instead of guessing freshness from Last-Modified
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                response, etag, timestamp = await sync_to_async(check)(request, *args, **kwargs)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return finish(response, etag, timestamp)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                response, etag, timestamp = check(request, *args, **kwargs)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return finish(response, etag, timestamp)
+        return wrapper
+    return decorator
+
+
+ROLE_DASHBOARDS = {
+    'superuser': 'superuser_dashboard',
+    'student': 'student_dashboard',
+    'teacher': 'teachers_dashboard',
+}
+
+
 @login_required
 def dashboard_redirect(request):
     """
     Redirects the user to the appropriate dashboard based on their role.
     """
-    if request.user.is_superuser:
-        return redirect('superuser_dashboard')
-    elif hasattr(request.user, 'is_student') and request.user.is_student:
-        return redirect('student_dashboard')
-    elif request.user.is_teacher:
-        return redirect('teachers_dashboard')
-    else:
-        return redirect('dashboard_login')
+    return redirect(ROLE_DASHBOARDS.get(request.role, 'dashboard_login'))
 
 
 @login_required
@@ -69,7 +159,19 @@ def teachers_dashboard(request):
     """
     View for the teacher's dashboard.
     """
-    return render(request, 'teachers/dashboard.html')
+    now = timezone.localtime()
+    month_summaries = TeacherMonthSummary.objects.filter(
+        teacher__user=request.user,
+        year=now.year,
+        month=now.month
+    ).select_related('task').order_by('task__name')
+    month_totals = month_summaries.aggregate(seconds=Sum('seconds'), amount_cents=Sum('amount_cents'))
+    return render(request, 'teachers/dashboard.html', {
+        'month_summaries': month_summaries,
+        'month_hours': seconds_to_hours(month_totals['seconds']),
+        'month_amount': cents_to_amount(month_totals['amount_cents']),
+        'month_period': now.strftime('%B %Y'),
+    })
 
 
 @login_required
@@ -89,6 +191,23 @@ def superuser_dashboard(request):
     return render(request, 'superuser/dashboard.html')
 
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def request_metrics_dashboard(request):
+    """
+    View for per-URL request latency and query count percentiles.
+    """
+    return render(request, 'superuser/request_metrics.html', {
+        'metrics': request_metrics.summary()
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def request_metrics_json(request):
+    return JsonResponse({'metrics': request_metrics.summary()})
+
+
 @login_required
 def change_password(request):
     if request.method == 'POST':
@@ -199,9 +318,8 @@ def edit_student(request, student_id):
 @login_required
 def edit_own_profile(request):
     """Student view to edit their own profile."""
-    try:
-        student = request.user.student
-    except Student.DoesNotExist:
+    student = request.profile if isinstance(request.profile, Student) else getattr(request.user, 'student', None)
+    if student is None:
         messages.error(request, 'You do not have a student profile.')
         return redirect('student_dashboard')
     
@@ -326,9 +444,32 @@ def change_student_password(request, student_id):
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def list_work_sessions(request):
-    work_sessions = WorkSession.objects.select_related('task', 'teacher').order_by('-start_time')
+    form = WorkSessionFilterForm(request.GET or None)
+    filters = form.cleaned_data if form.is_valid() else {}
+    sessions = WorkSessionListService.filter_sessions(
+        teacher=filters.get('teacher'),
+        task=filters.get('task'),
+        entry_type=filters.get('entry_type'),
+        start_date=filters.get('start_date'),
+        end_date=filters.get('end_date')
+    )
+    work_sessions, newer, older = WorkSessionListService.page(
+        sessions,
+        after=WorkSessionListService.decode_cursor(request.GET.get('after')),
+        before=WorkSessionListService.decode_cursor(request.GET.get('before'))
+    )
+
+    # Keep the filters in the pagination links
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
     context = {
-        'work_sessions': work_sessions
+        'form': form,
+        'work_sessions': work_sessions,
+        'totals': WorkSessionListService.totals(sessions),
+        'filter_query': query.urlencode(),
+        'newer_cursor': newer,
+        'older_cursor': older,
     }
     return render(request, 'superuser/list_work_sessions.html', context)
 
@@ -366,7 +507,7 @@ def delete_work_session(request, session_id):
     session = get_object_or_404(WorkSession, id=session_id)
     if request.method == "POST":
         session.delete()
-        messages.success(request, 'Work session deleted successfully.')
+        messages.success(request, 'Work session moved to the trash.')
         return redirect('superuser_list_work_sessions')
     
     context = {
@@ -374,6 +515,34 @@ def delete_work_session(request, session_id):
     }
     return render(request, 'superuser/confirm_work_session_deletion.html', context)
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def work_session_trash(request):
+    """List soft-deleted work sessions, most recently deleted first."""
+    sessions = WorkSession.all_objects.deleted().select_related(
+        'task', 'teacher__user'
+    ).order_by('-deleted_at', '-id')
+    page = Paginator(sessions, WorkSessionListService.PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, 'superuser/work_session_trash.html', {'page': page})
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def restore_work_session(request, session_id):
+    session = get_object_or_404(WorkSession.all_objects.deleted(), id=session_id)
+    if request.method == "POST":
+        session.restore()
+        messages.success(request, 'Work session restored.')
+    return redirect('work_session_trash')
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def purge_work_session(request, session_id):
+    session = get_object_or_404(WorkSession.all_objects.deleted(), id=session_id)
+    if request.method == "POST":
+        session.hard_delete()
+        messages.success(request, 'Work session permanently deleted.')
+    return redirect('work_session_trash')
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def manage_tasks(request):
@@ -472,63 +641,62 @@ def remove_task(request, task_id):
     return render(request, 'superuser/confirm_task_removal.html', {'task': task})
 
 
+async def arender(request, template_name, context):
+    """
+    render() for async views. Templates may still touch request.user, form
+    querysets or lazy relations, and those are sync-only ORM calls.
+    """
+    return await sync_to_async(render)(request, template_name, context)
+
+
+RECORD_WORK_FORMS = {
+    'manual': WorkSessionManualForm,
+    'clock': WorkSessionClockForm,
+    'time_range': WorkSessionTimeRangeForm,
+}
+
+
 @login_required
-def record_work(request, teacher_id=None):
+async def record_work(request, teacher_id=None):
+    user = await request.auser()
     # Determine the teacher for whom the work is being recorded
-    if not request.user.is_superuser:
-        teacher = get_object_or_404(Teacher, user=request.user)  # Teachers can only record their own work
+    if not user.is_superuser:
+        teacher = await aown_teacher(request)  # Teachers can only record their own work
     else:
         if teacher_id:
-            teacher = get_object_or_404(Teacher, id=teacher_id)  # Superusers specify a teacher
+            # Superusers specify a teacher
+            teacher = await aget_object_or_404(Teacher.objects.select_related('user'), id=teacher_id)
         else:
             return HttpResponseForbidden("Superusers must specify a teacher to record work for.")
 
+    entry_forms = {entry_type: form_class() for entry_type, form_class in RECORD_WORK_FORMS.items()}
     if request.method == 'POST':
         entry_type = request.POST.get('entry_type')
-
-        if entry_type == 'manual':
-            form = WorkSessionManualForm(request.POST)
-            if form.is_valid():
-                work_session = form.save(commit=False)
-                work_session.teacher = teacher
-                work_session.entry_type = 'manual'
-                work_session.save()
-                messages.success(request, f'Work hours recorded successfully for {teacher.user.username}!')
-                return redirect('record_work_with_teacher', teacher_id=teacher.id)
-
-        elif entry_type == 'clock':
-            form = WorkSessionClockForm(request.POST)
-            if form.is_valid():
-                work_session = form.save(commit=False)
-                work_session.teacher = teacher
-                work_session.entry_type = 'clock'
-                work_session.clock_in = timezone.now()
-                work_session.save()
-                messages.success(request, f'Clock-in recorded successfully for {teacher.user.username}!')
-                return redirect('record_work_with_teacher', teacher_id=teacher.id)
-
-        elif entry_type == 'time_range':
-            form = WorkSessionTimeRangeForm(request.POST)
-            if form.is_valid():
+        if entry_type in RECORD_WORK_FORMS:
+            form = entry_forms[entry_type] = RECORD_WORK_FORMS[entry_type](request.POST)
+            # Validating the task choice queries the database
+            if await sync_to_async(form.is_valid)():
                 work_session = form.save(commit=False)
                 work_session.teacher = teacher
-                work_session.entry_type = 'time_range'
-                work_session.save()
-                messages.success(request,
-                                 f'Work hours recorded successfully with a time range for {teacher.user.username}!')
+                work_session.entry_type = entry_type
+                if entry_type == 'clock':
+                    work_session.clock_in = timezone.now()
+                await work_session.asave()
+                if entry_type == 'clock':
+                    messages.success(request, f'Clock-in recorded successfully for {teacher.user.username}!')
+                elif entry_type == 'time_range':
+                    messages.success(request,
+                                     f'Work hours recorded successfully with a time range for {teacher.user.username}!')
+                else:
+                    messages.success(request, f'Work hours recorded successfully for {teacher.user.username}!')
                 return redirect('record_work_with_teacher', teacher_id=teacher.id)
 
-    else:
-        manual_form = WorkSessionManualForm()
-        clock_form = WorkSessionClockForm()
-        time_range_form = WorkSessionTimeRangeForm()
-
     # Get the active session for the teacher
-    active_session = WorkSession.objects.filter(
+    active_session = await WorkSession.objects.filter(
         teacher=teacher,
         entry_type='clock',
         clock_out__isnull=True
-    ).first()
+    ).select_related('task').afirst()
 
     # Get completed sessions for the teacher
     completed_sessions = WorkSession.objects.filter(
@@ -537,10 +705,10 @@ def record_work(request, teacher_id=None):
         id=active_session.id if active_session else None
     ).order_by('-created_at')[:10]
 
-    return render(request, 'record_work.html', {
-        'manual_form': manual_form,
-        'clock_form': clock_form,
-        'time_range_form': time_range_form,
+    return await arender(request, 'record_work.html', {
+        'manual_form': entry_forms['manual'],
+        'clock_form': entry_forms['clock'],
+        'time_range_form': entry_forms['time_range'],
         'active_session': active_session,
         'completed_sessions': completed_sessions,
         'teacher': teacher,
@@ -549,44 +717,148 @@ def record_work(request, teacher_id=None):
 
 @login_required
 @user_passes_test(is_teacher)
-def clock_out(request, session_id):
+async def clock_out(request, session_id):
     if request.method == 'POST':
-        session = get_object_or_404(
+        session = await aget_object_or_404(
             WorkSession,
             id=session_id,
-            teacher=request.user.teacher,
+            teacher=await aown_teacher(request),
             entry_type='clock',
             clock_out__isnull=True
         )
         session.clock_out = timezone.now()
-        session.save()
+        await session.asave()
         messages.success(request, 'Clocked out successfully!')
     return redirect('record_work')
 
 
+def kiosk_session_state(session):
+    return {
+        'session': session.id,
+        'state': 'clocked_in' if session.clock_out is None else 'clocked_out',
+        'task': session.task_id,
+        'clock_in': session.clock_in,
+        'clock_out': session.clock_out,
+        'hours': seconds_to_hours(session.duration_seconds) if session.duration_seconds is not None else None,
+        'amount': cents_to_amount(session.amount_cents) if session.amount_cents is not None else None,
+    }
+
+
+@csrf_exempt
+@require_POST
+def kiosk_clock(request):
+    """
+    Clock a teacher in or out from a door kiosk. The kiosk authenticates
+    with "Authorization: Token <kiosk token>" instead of a session and posts
+    {"action": "in" | "out", "task": <task id>}; the answer is the session's
+    state as JSON. No forms or templates, and one indexed lookup for the
+    open session before the single write.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    teacher_id = KioskToken.teacher_id_for(token) if scheme == 'Token' and token else None
+    if teacher_id is None:
+        response = JsonResponse({'error': 'Invalid or missing kiosk token'}, status=401)
+        response['WWW-Authenticate'] = 'Token'
+        return response
+
+    try:
+        data = json.loads(request.body)
+        action = data['action']
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Expected a JSON object with an action'}, status=400)
+    if action not in ('in', 'out'):
+        return JsonResponse({'error': 'Action must be "in" or "out"'}, status=400)
+
+    # Served by the worksession_live_open_clock partial index
+    open_session = WorkSession.objects.filter(
+        teacher_id=teacher_id,
+        entry_type='clock',
+        clock_out__isnull=True
+    ).first()
+
+    if action == 'in':
+        if open_session is not None:
+            return JsonResponse({'error': 'Already clocked in', **kiosk_session_state(open_session)}, status=409)
+        task_id = data.get('task')
+        task = None
+        if isinstance(task_id, int) and not isinstance(task_id, bool):
+            task = Task.objects.filter(pk=task_id, is_active=True).only('id', 'hourly_rate').first()
+        if task is None:
+            return JsonResponse({'error': 'Unknown or inactive task'}, status=400)
+        session = WorkSession(teacher_id=teacher_id, task=task, entry_type='clock', clock_in=timezone.now())
+        session.save()
+        return JsonResponse(kiosk_session_state(session), status=201)
+
+    if open_session is None:
+        return JsonResponse({'error': 'Not clocked in'}, status=409)
+    open_session.clock_out = timezone.now()
+    open_session.save()
+    return JsonResponse(kiosk_session_state(open_session))
+
+
+@csrf_exempt
+@require_POST
+def kiosk_sync(request):
+    """
+    Upload the clock events a kiosk queued while offline, as
+    {"events": [{"id", "token", "action", "at", "task"}, ...]} in the order
+    they happened. Each event carries the token of the teacher it is for.
+    The answer lists one result per event; events already applied by an
+    earlier upload come back as duplicates, so the kiosk can resend its
+    whole queue until it gets an answer.
+    """
+    try:
+        events = json.loads(request.body)['events']
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Expected a JSON object with a list of events'}, status=400)
+    if not isinstance(events, list):
+        return JsonResponse({'error': 'Expected a JSON object with a list of events'}, status=400)
+    if len(events) > KioskSyncService.MAX_EVENTS:
+        return JsonResponse({'error': f'At most {KioskSyncService.MAX_EVENTS} events per upload'}, status=400)
+    try:
+        results = KioskSyncService.sync(events)
+    except IntegrityError:
+        # Another upload of the same events committed first; resending sorts them out
+        return JsonResponse({'error': 'Events were uploaded concurrently; retry'}, status=409)
+    return JsonResponse({'results': results})
+
+
+def recent_sessions_page(request, teacher_id=None):
+    """Validator for recent_work_sessions: the teacher's sessions and the task names shown"""
+    if not request.user.is_superuser:
+        teacher_id = request.profile.id if isinstance(request.profile, Teacher) else None
+    if teacher_id is None:
+        return None
+    return PageValidatorService.fingerprint(
+        sessions=WorkSession.all_objects.filter(teacher_id=teacher_id),
+        tasks=Task.objects.all()
+    )
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser or u.is_teacher)  # Allow both roles to access
-def recent_work_sessions(request, teacher_id=None):
+@conditional_page(recent_sessions_page)
+async def recent_work_sessions(request, teacher_id=None):
+    user = await request.auser()
     # Check if the user is a teacher or a superuser
-    if not request.user.is_superuser:
-        # For teachers, get their own teacher instance
-        teacher = get_object_or_404(Teacher, user=request.user)
+    if not user.is_superuser:
+        # For teachers, their own teacher profile
+        teacher = await aown_teacher(request)
     else:
         # For superusers, get the teacher by ID
-        teacher = get_object_or_404(Teacher, id=teacher_id)
+        teacher = await aget_object_or_404(Teacher.objects.select_related('user'), id=teacher_id)
 
     # Fetch recent work sessions for the teacher
-    work_sessions = WorkSession.objects.filter(teacher=teacher).order_by('-created_at')[:10]
-
-    # Debugging: Print the teacher and work sessions to the console
-    print(f"Teacher: {teacher}")
-    print(f"Work Sessions: {work_sessions}")
+    work_sessions = [
+        session async for session in
+        WorkSession.objects.filter(teacher=teacher).select_related('task').order_by('-created_at')[:10]
+    ]
 
     context = {
         'teacher': teacher,
         'work_sessions': work_sessions,
     }
-    return render(request, 'recent_work_sessions.html', context)
+    return await arender(request, 'recent_work_sessions.html', context)
 
 
 @login_required
@@ -622,36 +894,28 @@ def create_salary_report(request):
             month = int(form.cleaned_data['month'])
             notes = form.cleaned_data['notes']
 
-            # Create start and end dates for the month
-            start_date = timezone.datetime(year, month, 1)
-            if month == 12:
-                end_date = timezone.datetime(year + 1, 1, 1)
-            else:
-                end_date = timezone.datetime(year, month + 1, 1)
-            end_date = end_date - timezone.timedelta(microseconds=1)
-
-            # Check if a report exists for this period
-            existing_reports = SalaryReport.objects.filter(
-                teacher=teacher,
-                start_date=start_date,
-                end_date=end_date
-            )
-            
-            if existing_reports.exists():
-                # Delete any existing reports for this period
-                existing_reports.delete()
-            
-            # Create a new report
-            report = SalaryReport.objects.create(
-                teacher=teacher,
-                start_date=start_date,
-                end_date=end_date,
-                created_by=request.user,
-                notes=notes
-            )
-
-            # Calculate salary details
-            report_data = SalaryCalculationService.calculate_salary(teacher, year, month)
+            # The month as create_for_month and generate_payroll store it, end exclusive
+            start_date, end_date = SalaryReport.month_period(year, month)
+
+            with transaction.atomic():
+                # Soft-delete earlier reports for this period, however their end was stored
+                now = timezone.now()
+                SalaryReport.objects.filter(
+                    teacher=teacher,
+                    start_date__gte=start_date,
+                    start_date__lt=end_date,
+                    is_deleted=False
+                ).update(is_deleted=True, deleted_at=now, updated_at=now)
+
+                # Create a new report and freeze its totals and details
+                report = SalaryReport(
+                    teacher=teacher,
+                    start_date=start_date,
+                    end_date=end_date,
+                    created_by=request.user,
+                    notes=notes
+                )
+                report_data = report.refresh_snapshot()
             
             # Since we're always creating a new report, we don't need to check if it was created
             message = f'Salary report created for {teacher.user.username} - {report_data["period"]}'
@@ -666,59 +930,96 @@ def create_salary_report(request):
     })
 
 
+def salary_report_page(request, teacher_id, year, month):
+    """
+    Validator for view_salary_report: the month's report rows. The page shows
+    the frozen snapshot, and session changes reach it through is_stale.
+    """
+    own_report = isinstance(request.profile, Teacher) and request.profile.id == teacher_id
+    if not (request.user.is_superuser or own_report):
+        return None  # The view answers with 403
+    start_date, end_date = SalaryReport.month_period(year, month)
+    return PageValidatorService.fingerprint(
+        reports=SalaryReport.objects.filter(
+            teacher_id=teacher_id, start_date__gte=start_date, start_date__lt=end_date, is_deleted=False
+        )
+    )
+
+
 @login_required
 @teacher_or_superuser
-def view_salary_report(request, teacher_id, year, month):
-    teacher = get_object_or_404(Teacher, id=teacher_id)
-    
-    # Get the report for this month
-    start_date = timezone.datetime(year, month, 1)
-    if month == 12:
-        end_date = timezone.datetime(year + 1, 1, 1)
+@read_from_replica
+@conditional_page(salary_report_page)
+async def view_salary_report(request, teacher_id, year, month):
+    if isinstance(request.profile, Teacher) and request.profile.id == teacher_id:
+        teacher = request.profile  # A teacher reading their own report
     else:
-        end_date = timezone.datetime(year, month + 1, 1)
-    end_date = end_date - timezone.timedelta(microseconds=1)
-    
-    # Get the report for this period
-    reports = SalaryReport.objects.filter(
-        teacher=teacher,
-        start_date=start_date,
-        end_date=end_date,
-        is_deleted=False
-    ).order_by('-created_at')
+        teacher = await aget_object_or_404(Teacher.objects.select_related('user'), id=teacher_id)
     
-    if not reports.exists():
-        # If no report exists, create a new one
-        report = SalaryReport.objects.create(
-            teacher=teacher,
-            start_date=start_date,
-            end_date=end_date,
-            created_by=request.user
-        )
-    else:
-        # If a report exists, use it
-        report = reports.first()
-
-    # Calculate the report data - FIXED: Use static method
-    report_data = SalaryCalculationService.calculate_salary(teacher, year, month)
+    # Get the report for this month, shaped like create_salary_report's
+    start_date, end_date = SalaryReport.month_period(year, month)
 
     # Check permissions
-    if request.user.is_superuser:
+    user = await request.auser()
+    if user.is_superuser:
         template = 'superuser/view_salary_report.html'
-    elif request.user == teacher.user:
+    elif user == teacher.user:
         template = 'teachers/view_salary_report.html'
     else:
         raise PermissionDenied("You do not have permission to view this report")
 
-    return render(request, template, {
+    # Get the report for this period
+    report = await SalaryReport.objects.filter(
+        teacher=teacher,
+        start_date__gte=start_date,
+        start_date__lt=end_date,
+        is_deleted=False
+    ).select_related('created_by').order_by('-created_at').afirst()
+
+    if report is not None and report.snapshot is not None:
+        report_data = report.snapshot_data()
+    else:
+        # Snapshots are frozen once saved, so never compute one from a lagging replica
+        with primary_reads():
+            if report is None:
+                # If no report exists, create a new one
+                report = SalaryReport(
+                    teacher=teacher,
+                    start_date=start_date,
+                    end_date=end_date,
+                    created_by=user
+                )
+            # Reports created before snapshots existed are frozen on first view
+            report_data = await sync_to_async(report.refresh_snapshot)()
+
+    return await arender(request, template, {
         'teacher': teacher,
         'report': report,
         'report_data': report_data
     })
 
 
+def salary_reports_with_totals(reports):
+    """Pair each report with its computed total using one bulk aggregation"""
+    reports = list(reports)
+    totals = SalaryCalculationService.calculate_salaries_bulk(
+        (report.teacher_id, report.start_date.year, report.start_date.month)
+        for report in reports
+    )
+    return [
+        {
+            'report': report,
+            'total_salary': totals[
+                (report.teacher_id, report.start_date.year, report.start_date.month)
+            ]['total_salary']
+        }
+        for report in reports
+    ]
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
+@read_from_replica
 def list_salary_reports(request, teacher_id=None):
     if teacher_id:
         teacher = get_object_or_404(Teacher, id=teacher_id)
@@ -731,17 +1032,9 @@ def list_salary_reports(request, teacher_id=None):
         reports = SalaryReport.objects.filter(
             is_deleted=False
         ).order_by('-start_date')
+    reports = reports.select_related('teacher__user', 'created_by')
 
-    # For each report, calculate the salary - FIXED: Use static method
-    reports_with_data = []
-    for report in reports:
-        year = report.start_date.year
-        month = report.start_date.month
-        report_data = SalaryCalculationService.calculate_salary(report.teacher, year, month)
-        reports_with_data.append({
-            'report': report,
-            'total_salary': report_data['total_salary']
-        })
+    reports_with_data = salary_reports_with_totals(reports)
 
     return render(request, 'superuser/list_salary_reports.html', {
         'teacher': teacher,
@@ -749,6 +1042,74 @@ def list_salary_reports(request, teacher_id=None):
     })
 
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def refresh_salary_report(request, report_id):
+    """Recompute a salary report's snapshot from the current work sessions."""
+    report = get_object_or_404(SalaryReport, id=report_id, is_deleted=False)
+    if request.method == 'POST':
+        report.refresh_snapshot()
+        messages.success(request, 'Salary report refreshed successfully.')
+    start = timezone.localtime(report.start_date)
+    return redirect('view_salary_report', teacher_id=report.teacher_id, year=start.year, month=start.month)
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def import_work_sessions(request):
+    """Bulk-import work sessions from an uploaded CSV timesheet."""
+    result = None
+    if request.method == "POST":
+        form = WorkSessionImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Parse the upload as a stream instead of reading it into memory
+            text = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            reader = csv.DictReader(text)
+            missing = WorkSessionImportService.missing_columns(reader.fieldnames)
+            if missing:
+                form.add_error('file', f"Missing columns: {', '.join(missing)}")
+            else:
+                try:
+                    created, rejected = WorkSessionImportService.import_rows(
+                        reader, dry_run=form.cleaned_data['dry_run']
+                    )
+                except (UnicodeDecodeError, csv.Error) as e:
+                    form.add_error('file', f"Could not read the CSV file: {e}")
+                else:
+                    result = {
+                        'created': created,
+                        'rejected': rejected,
+                        'dry_run': form.cleaned_data['dry_run'],
+                    }
+                    if created and not result['dry_run']:
+                        messages.success(request, f'Imported {created} work sessions.')
+    else:
+        form = WorkSessionImportForm()
+
+    return render(request, 'superuser/import_work_sessions.html', {'form': form, 'result': result})
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def export_payroll(request):
+    """Stream a payroll CSV for every teacher over a range of months."""
+    form = PayrollExportForm(request.GET or None)
+    if form.is_valid():
+        data = form.cleaned_data
+        rows = PayrollExportService.rows(
+            data['detail'], data['start_year'], data['start_month'], data['end_year'], data['end_month']
+        )
+        filename = (
+            f"payroll_{data['start_year']}-{data['start_month']:02d}_"
+            f"{data['end_year']}-{data['end_month']:02d}_{data['detail']}.csv"
+        )
+        response = StreamingHttpResponse(PayrollExportService.csv_lines(rows), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    return render(request, 'superuser/export_payroll.html', {'form': form})
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def delete_salary_report(request, report_id):
@@ -759,22 +1120,27 @@ def delete_salary_report(request, report_id):
     return redirect('list_salary_reports')
 
 
+def salary_reports_page(request):
+    """Validator for teacher_salary_reports: the reports, and the sessions and task rates behind their totals"""
+    if not isinstance(request.profile, Teacher):
+        return None
+    teacher_id = request.profile.id
+    return PageValidatorService.fingerprint(
+        reports=SalaryReport.objects.filter(teacher_id=teacher_id),
+        sessions=WorkSession.all_objects.filter(teacher_id=teacher_id),
+        tasks=Task.objects.all()
+    )
+
+
 @login_required
 @user_passes_test(lambda u: u.is_teacher)
+@read_from_replica
+@conditional_page(salary_reports_page)
 def teacher_salary_reports(request):
-    teacher = get_object_or_404(Teacher, user=request.user)
+    teacher = own_teacher(request)
     reports = SalaryReport.objects.filter(teacher=teacher).order_by('-start_date')
 
-    # For each report, calculate the salary (reuse logic)
-    reports_with_data = []
-    for report in reports:
-        year = report.start_date.year
-        month = report.start_date.month
-        report_data = SalaryCalculationService.calculate_salary(report.teacher, year, month)
-        reports_with_data.append({
-            'report': report,
-            'total_salary': report_data['total_salary']
-        })
+    reports_with_data = salary_reports_with_totals(reports)
 
     return render(request, 'teachers/teacher_salary_reports.html', {
         'reports': reports_with_data